@@ -0,0 +1,346 @@
+"""
+Materialized aggregate tables derived from the scores table.
+
+season_standings holds one row per (season, player) with rounds, total points,
+wins and average, so the leaderboard and the home widget are simple indexed
+reads.
+
+stats_cube holds one row per (season, course, player) with rounds, total
+points, best, worst and wins. Any /stats filter combination is answered by
+summing the matching cube rows instead of scanning scores. Missing seasons or
+courses are stored as '' so the unique key works on both databases.
+
+head_to_head holds one row per (season, player, opponent) pair with the
+player's wins, losses, ties and summed points margin, stored once per pair
+(player_name < opponent). Each player counts once per round (date, course,
+nine) - their first score there - so duplicate score rows don't add matches.
+
+Score write paths keep the tables up to date in the same transaction via
+record_round() and record_matchups(); rebuild_aggregates() recomputes them
+from scores for backfills, imports and cleanup scripts.
+
+Usage:
+    python aggregates.py                    # create tables and rebuild everything
+    python aggregates.py rebuild "2025 Season"  # rebuild only the given season(s)
+"""
+import os
+import sys
+import threading
+from data_versions import get_versions
+from db_helper import get_db
+
+def create_aggregate_tables(cursor, using_postgres=False):
+    """Create the aggregate tables and their indexes if they don't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS season_standings (
+            id SERIAL PRIMARY KEY,
+            season TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            rounds INTEGER NOT NULL DEFAULT 0,
+            total_points INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            avg_score DOUBLE PRECISION NOT NULL DEFAULT 0,
+            UNIQUE(season, player_name)
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS season_standings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            season TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            rounds INTEGER NOT NULL DEFAULT 0,
+            total_points INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            avg_score REAL NOT NULL DEFAULT 0,
+            UNIQUE(season, player_name)
+        )
+        ''')
+
+    # Leaderboard reads: WHERE season = ? ORDER BY avg_score DESC
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_season_standings_season_avg
+    ON season_standings (season, avg_score)
+    ''')
+
+def create_stats_cube_tables(cursor, using_postgres=False):
+    """Create stats_cube and its indexes if they don't exist"""
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS stats_cube (
+        id {'SERIAL PRIMARY KEY' if using_postgres else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
+        season TEXT NOT NULL,
+        course TEXT NOT NULL,
+        player_name TEXT NOT NULL,
+        rounds INTEGER NOT NULL DEFAULT 0,
+        total_points INTEGER NOT NULL DEFAULT 0,
+        best INTEGER,
+        worst INTEGER,
+        wins INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(season, course, player_name)
+    )
+    ''')
+
+    # The unique key serves season and season + course filters
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_stats_cube_player_season
+    ON stats_cube (player_name, season)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_stats_cube_course
+    ON stats_cube (course)
+    ''')
+
+def create_head_to_head_tables(cursor, using_postgres=False):
+    """Create head_to_head and its indexes if they don't exist"""
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS head_to_head (
+        id {'SERIAL PRIMARY KEY' if using_postgres else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
+        season TEXT NOT NULL,
+        player_name TEXT NOT NULL,
+        opponent TEXT NOT NULL,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        ties INTEGER NOT NULL DEFAULT 0,
+        margin INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(season, player_name, opponent)
+    )
+    ''')
+
+    # All-seasons reads group every row by pair
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_head_to_head_pair
+    ON head_to_head (player_name, opponent)
+    ''')
+
+def record_round(cursor, season, player_name, total, winner, course=None):
+    """Fold one newly inserted score row into season_standings and stats_cube"""
+
+    if not player_name or total is None:
+        return  # No score to count, as in the rebuild queries
+
+    cursor.execute('''
+        INSERT INTO stats_cube (season, course, player_name, rounds, total_points, best, worst, wins)
+        VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT (season, course, player_name) DO UPDATE SET
+            rounds = stats_cube.rounds + 1,
+            total_points = stats_cube.total_points + excluded.total_points,
+            best = CASE WHEN excluded.best > stats_cube.best THEN excluded.best ELSE stats_cube.best END,
+            worst = CASE WHEN excluded.worst < stats_cube.worst THEN excluded.worst ELSE stats_cube.worst END,
+            wins = stats_cube.wins + excluded.wins
+    ''', (season or '', course or '', player_name, total, total, total, 1 if winner == "Yes" else 0))
+
+    if not season:
+        return  # Rows without a season never show on the leaderboard
+
+    cursor.execute('''
+        INSERT INTO season_standings (season, player_name, rounds, total_points, wins, avg_score)
+        VALUES (?, ?, 1, ?, ?, ?)
+        ON CONFLICT (season, player_name) DO UPDATE SET
+            rounds = season_standings.rounds + 1,
+            total_points = season_standings.total_points + excluded.total_points,
+            wins = season_standings.wins + excluded.wins,
+            avg_score = (season_standings.total_points + excluded.total_points) * 1.0
+                        / (season_standings.rounds + 1)
+    ''', (season, player_name, total, 1 if winner == "Yes" else 0, total))
+
+def record_matchups(cursor, score_id, season, date, course, nine, player_name, total):
+    """Fold a newly inserted score row's results against the rest of its round into head_to_head"""
+
+    if not player_name or total is None:
+        return
+
+    # Everyone's first score in this round; a second row for the same player adds nothing
+    cursor.execute('''
+        SELECT player_name, total, id FROM scores
+        WHERE date = ? AND course = ? AND nine = ? AND total IS NOT NULL AND player_name IS NOT NULL
+        ORDER BY id
+    ''', (date, course, nine))
+    first = {}
+    for other, other_total, other_id in cursor.fetchall():
+        first.setdefault(other, (other_total, other_id))
+    if first.get(player_name, (None, score_id))[1] != score_id:
+        return
+
+    rows = []
+    for other, (other_total, _) in first.items():
+        if other == player_name:
+            continue
+        if player_name < other:
+            a, b, a_total, b_total = player_name, other, total, other_total
+        else:
+            a, b, a_total, b_total = other, player_name, other_total, total
+        rows.append((season or '', a, b, int(a_total > b_total), int(a_total < b_total),
+                     int(a_total == b_total), a_total - b_total))
+
+    if rows:
+        cursor.executemany('''
+            INSERT INTO head_to_head (season, player_name, opponent, wins, losses, ties, margin)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (season, player_name, opponent) DO UPDATE SET
+                wins = head_to_head.wins + excluded.wins,
+                losses = head_to_head.losses + excluded.losses,
+                ties = head_to_head.ties + excluded.ties,
+                margin = head_to_head.margin + excluded.margin
+        ''', rows)
+
+def rebuild_season_standings(cursor, seasons=None):
+    """Recompute season_standings from scores (all seasons, or just the given ones)"""
+
+    if seasons:
+        seasons = list(seasons)
+        placeholders = ", ".join("?" for _ in seasons)
+        cursor.execute(f"DELETE FROM season_standings WHERE season IN ({placeholders})", seasons)
+        season_filter = f"AND season IN ({placeholders})"
+        params = seasons
+    else:
+        cursor.execute("DELETE FROM season_standings")
+        season_filter = ""
+        params = ()
+
+    cursor.execute(f'''
+        INSERT INTO season_standings (season, player_name, rounds, total_points, wins, avg_score)
+        SELECT season, player_name,
+               COUNT(*),
+               SUM(total),
+               SUM(CASE WHEN winner = 'Yes' THEN 1 ELSE 0 END),
+               AVG(total * 1.0)
+        FROM scores
+        WHERE season IS NOT NULL AND player_name IS NOT NULL AND total IS NOT NULL {season_filter}
+        GROUP BY season, player_name
+    ''', params)
+
+def rebuild_stats_cube(cursor, seasons=None):
+    """Recompute stats_cube from scores (all seasons, or just the given ones)"""
+
+    if seasons:
+        seasons = list(seasons)
+        placeholders = ", ".join("?" for _ in seasons)
+        cursor.execute(f"DELETE FROM stats_cube WHERE season IN ({placeholders})", seasons)
+        season_filter = f"AND season IN ({placeholders})"
+        params = seasons
+    else:
+        cursor.execute("DELETE FROM stats_cube")
+        season_filter = ""
+        params = ()
+
+    cursor.execute(f'''
+        INSERT INTO stats_cube (season, course, player_name, rounds, total_points, best, worst, wins)
+        SELECT COALESCE(season, ''), COALESCE(course, ''), player_name,
+               COUNT(*),
+               SUM(total),
+               MAX(total),
+               MIN(total),
+               SUM(CASE WHEN winner = 'Yes' THEN 1 ELSE 0 END)
+        FROM scores
+        WHERE player_name IS NOT NULL AND total IS NOT NULL {season_filter}
+        GROUP BY COALESCE(season, ''), COALESCE(course, ''), player_name
+    ''', params)
+
+def rebuild_head_to_head(cursor, seasons=None):
+    """Recompute head_to_head from scores (all seasons, or just the given ones)"""
+
+    if seasons:
+        seasons = list(seasons)
+        placeholders = ", ".join("?" for _ in seasons)
+        cursor.execute(f"DELETE FROM head_to_head WHERE season IN ({placeholders})", seasons)
+    else:
+        cursor.execute("DELETE FROM head_to_head")
+        cursor.execute("SELECT DISTINCT COALESCE(season, '') FROM scores")
+        seasons = [row[0] for row in cursor.fetchall()]
+
+    # A season at a time: pairing every season at once makes the final grouping far slower
+    for season in seasons:
+        season_condition = "season = ?" if season else "season IS NULL"
+        # One row per player per round (their first), then each pair of those once
+        cursor.execute(f'''
+            INSERT INTO head_to_head (season, player_name, opponent, wins, losses, ties, margin)
+            WITH played AS (
+                SELECT date, course, nine, player_name, total
+                FROM scores
+                WHERE id IN (
+                    SELECT MIN(id) FROM scores
+                    WHERE {season_condition} AND total IS NOT NULL AND player_name IS NOT NULL
+                    GROUP BY date, course, nine, player_name
+                )
+            )
+            SELECT ?, a.player_name, b.player_name,
+                   SUM(CASE WHEN a.total > b.total THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN a.total < b.total THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN a.total = b.total THEN 1 ELSE 0 END),
+                   SUM(a.total - b.total)
+            FROM played a
+            JOIN played b
+              ON b.date = a.date AND b.course = a.course AND b.nine = a.nine
+             AND b.player_name > a.player_name
+            GROUP BY a.player_name, b.player_name
+        ''', ((season, season) if season else ('',)))
+
+def rebuild_aggregates(cursor, seasons=None):
+    """Recompute every aggregate table from scores (all seasons, or just the given ones)"""
+    rebuild_season_standings(cursor, seasons)
+    rebuild_stats_cube(cursor, seasons)
+    rebuild_head_to_head(cursor, seasons)
+
+# Dropdown values for /stats, cached per process until the scores data version changes
+_dimensions = None
+_dimensions_key = None
+_dimensions_lock = threading.Lock()
+
+def stats_dimensions(cursor):
+    """(seasons newest first, courses, players) present in scores"""
+    global _dimensions, _dimensions_key
+
+    key = get_versions(cursor, ['scores'])['scores'][0]
+    with _dimensions_lock:
+        if _dimensions is not None and _dimensions_key == key:
+            return _dimensions
+
+    cursor.execute("SELECT DISTINCT season, course, player_name FROM stats_cube")
+    seasons, courses, players = set(), set(), set()
+    for season, course, player_name in cursor.fetchall():
+        seasons.add(season)
+        courses.add(course)
+        players.add(player_name)
+
+    dimensions = (
+        sorted((s for s in seasons if s), reverse=True),
+        sorted(c for c in courses if c),
+        sorted(p for p in players if p),
+    )
+    with _dimensions_lock:
+        _dimensions, _dimensions_key = dimensions, key
+    return dimensions
+
+def main(argv):
+    using_postgres = os.environ.get('DATABASE_URL') is not None
+    seasons = argv[2:] if len(argv) > 1 and argv[1] == 'rebuild' else None
+
+    conn = get_db()
+    c = conn.cursor()
+
+    try:
+        create_aggregate_tables(c, using_postgres)
+        create_stats_cube_tables(c, using_postgres)
+        create_head_to_head_tables(c, using_postgres)
+        rebuild_aggregates(c, seasons)
+        conn.commit()
+
+        for table in ('season_standings', 'stats_cube', 'head_to_head'):
+            c.execute(f"SELECT COUNT(*) FROM {table}")
+            count = c.fetchone()[0]
+            print(f"✅ {table} rebuilt ({count} rows)")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding aggregates: {e}")
+        conn.rollback()
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("📊 Rebuilding aggregate tables...")
+    main(sys.argv)
@@ -1,11 +1,30 @@
 import os
 import json
+import io
 import sqlite3
 import subprocess
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
-
-from datetime import datetime, timedelta
-from db_helper import get_db
+from flask import Flask, Response, make_response, render_template, request, redirect, url_for, jsonify, session, g
+from flask import before_render_template, template_rendered
+
+from datetime import datetime, timedelta, timezone
+from db_helper import get_db, pool_stats, translation_cache_stats
+from aggregates import record_matchups, record_round, stats_dimensions
+from dashboard import DashboardSnapshot, fetch_dashboard
+from courses import get_course_catalog
+from live_store import HOLES_PER_ROUND, delete_round, latest_round, load_round, new_round_id, progress_text, purge_expired, save_round
+from live_events import event_stream, get_broker, publish_event, publish_round_changes
+from live_updates import discard_hole_updates, queue_hole_update
+from jobs import ensure_job_thread, enqueue_job, get_job
+from importers import score_content_hash
+from hole_stats import cached_hole_report
+from head_to_head import get_head_to_head
+from data_versions import bump_version, get_versions, versions_etag, versions_last_modified
+from fragment_cache import fragment_cache
+from request_timing import current_request, finish_request, render_finished, render_started, start_request
+import logging
+import metrics
+import profiler
+from app_logging import get_logger
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -58,6 +77,92 @@ CLUBHOUSE_PASSWORD = 'restorativehealing'
 # Admin password for administrative functions
 ADMIN_PASSWORD = 'pgg2024'
 
+def get_request_db():
+    """
+    Get the database connection for the current request.
+    Opened on first use and shared by every helper during the request, so the
+    whole request runs as a single transaction; released in close_request_db.
+    """
+    if 'db' not in g:
+        g.db = get_db()
+    return g.db
+
+@app.teardown_appcontext
+def close_request_db(exc):
+    """Commit (or roll back on error) and release the request's connection"""
+    conn = g.pop('db', None)
+    if conn is None:
+        return
+    try:
+        if exc is None:
+            conn.commit()
+        else:
+            conn.rollback()
+    finally:
+        conn.close()
+
+@app.before_request
+def start_request_timing():
+    rule = request.url_rule
+    start_request(rule.rule if rule is not None else '(unmatched)')
+
+@app.after_request
+def add_server_timing(response):
+    """Per-request db time, query count and render time for the browser's dev tools"""
+    timing = current_request()
+    if timing is not None:
+        response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    rule = request.url_rule
+    metrics.observe_request(rule.rule if rule is not None else '(unmatched)', request.method,
+                            response.status_code, current_request())
+    metrics.observe_process(pool_stats(), translation_cache_stats(), fragment_cache)
+    return response
+
+@app.teardown_request
+def finish_request_timing(exc):
+    finish_request()
+
+@app.before_request
+def start_request_profile():
+    """Opt-in cProfile of sampled requests, and of any request sent with the admin profile header"""
+    rule = request.url_rule
+    route = rule.rule if rule is not None else '(unmatched)'
+    if profiler.should_profile(route, request.headers.get(profiler.PROFILE_HEADER), ADMIN_PASSWORD):
+        g.profile = profiler.start_profile(route, request.method, request.full_path.rstrip('?'))
+
+@app.after_request
+def finish_request_profile(response):
+    active = g.pop('profile', None)
+    if active is not None:
+        profile = profiler.finish_profile(active, response.status_code)
+        response.headers['X-Profile-Id'] = str(profile.id)
+    return response
+
+@app.teardown_request
+def abandon_request_profile(exc):
+    # after_request doesn't run when the view raised
+    active = g.pop('profile', None)
+    if active is not None:
+        profiler.finish_profile(active, 500)
+
+def _template_started(sender, **extra):
+    render_started()
+
+def _template_finished(sender, **extra):
+    render_finished()
+
+before_render_template.connect(_template_started, app)
+template_rendered.connect(_template_finished, app)
+
+log = get_logger('app')
+
+# Number of complete matches shown in the home page's Recent Matches widget
+HOME_RECENT_MATCHES = 2
+
 # Authentication decorator
 def require_auth(f):
     """Decorator to require authentication for routes"""
@@ -68,6 +173,69 @@ def require_auth(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def conditional_get(*tables):
+    """
+    Decorator for pages that only read `tables`: answers 304 Not Modified when
+    none of them has been written since the browser's copy, after a single
+    data_versions lookup. The ETag also covers the query string and the date,
+    since pages show the current season.
+    """
+    def decorator(f):
+        def decorated_function(*args, **kwargs):
+            conn = get_request_db()
+            try:
+                versions = get_versions(conn.cursor(), tables)
+            except Exception as e:
+                log.warning("⚠️ Error fetching data versions: %s", e)
+                conn.rollback()
+                return f(*args, **kwargs)
+            g.data_versions = dict(versions)
+
+            today = datetime.today()
+            etag = versions_etag(versions, request.full_path, today.date())
+            start_of_day = datetime.combine(today.date(), datetime.min.time()).timestamp()
+            last_modified = datetime.fromtimestamp(
+                int(max(versions_last_modified(versions) or 0, start_of_day)), timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = request.if_modified_since is not None and request.if_modified_since >= last_modified
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        decorated_function.__name__ = f.__name__
+        return decorated_function
+    return decorator
+
+def cached_fragment(name, tables, args, render):
+    """
+    HTML for a page fragment from fragment_cache, calling render() only when
+    one of `tables` has been written since it was cached for these args
+    """
+    conn = get_request_db()
+    known = g.setdefault('data_versions', {})
+    missing = [table for table in tables if table not in known]
+    try:
+        if missing:
+            known.update(get_versions(conn.cursor(), missing))
+    except Exception as e:
+        log.warning("⚠️ Error fetching data versions: %s", e)
+        conn.rollback()
+        return render()
+
+    versions = tuple(known[table][0] for table in tables)
+    return fragment_cache.render(name, versions, args, render)
+
 # SMS functionality removed - manual texting preferred
 
 # Force HTTPS in production
@@ -119,88 +287,23 @@ def home():
     today = datetime.today()
     current_season = get_season_label(today)
 
-    conn = get_db()
-    c = conn.cursor()
-
-    # Get leaderboard data (top 5) - highest scores first for PGG Tour
-    try:
-        c.execute('''
-            SELECT player_name, COUNT(*) as rounds, AVG(total) as avg_score
-            FROM scores
-            WHERE season = ?
-            GROUP BY player_name
-            HAVING rounds >= 1
-            ORDER BY avg_score DESC
-            LIMIT 5
-        ''', (current_season,))
-        leaderboard_widget = c.fetchall()
-    except Exception as e:
-        print(f"⚠️ Error fetching leaderboard: {e}")
-        leaderboard_widget = []
-
-    # Get upcoming events (next 3) with player names
-    try:
-        c.execute("""
-            SELECT e.event_date, e.event_time, e.course, e.description,
-                   COUNT(ep.player_id) as participant_count,
-                   COALESCE(STRING_AGG(p.name, ', '), '') as player_names
-            FROM events e
-            LEFT JOIN event_participants ep ON e.id = ep.event_id
-            LEFT JOIN players p ON ep.player_id = p.id
-            WHERE e.event_date >= CURRENT_DATE
-            GROUP BY e.id
-            ORDER BY e.event_date, e.event_time
-            LIMIT 3
-        """)
-        upcoming_events_widget = c.fetchall()
-    except Exception as e:
-        print(f"⚠️ Error fetching upcoming events: {e}")
-        upcoming_events_widget = []
+    c = get_request_db().cursor()
 
-    # Get recent matches (last 2 complete matches)
+    # Leaderboard top 5, upcoming events, recent matches and pot totals in one round trip
     try:
-        recent_matches = get_recent_matches(c, limit=2)
+        snapshot = fetch_dashboard(c, current_season, match_limit=HOME_RECENT_MATCHES)
     except Exception as e:
-        print(f"⚠️ Error fetching recent matches: {e}")
-        recent_matches = []
-
-    # Get hole in one pot data
-    try:
-        c.execute("SELECT SUM(amount_owed) FROM hole_in_one_pot")
-        result = c.fetchone()
-        hole_in_one_pot = result[0] if result and result[0] else 0
-    except Exception as e:
-        print(f"⚠️ Error fetching hole-in-one pot: {e}")
-        hole_in_one_pot = 0
-
-    # Get total rounds played (for pot calculation)
-    try:
-        c.execute("SELECT COUNT(*) FROM scores")
-        result = c.fetchone()
-        total_rounds_played = result[0] if result and result[0] else 0
-    except Exception as e:
-        print(f"⚠️ Error fetching total rounds: {e}")
-        total_rounds_played = 0
-
-    # Get unique players count
-    try:
-        c.execute("SELECT COUNT(DISTINCT player_name) FROM scores")
-        result = c.fetchone()
-        unique_players = result[0] if result and result[0] else 0
-    except Exception as e:
-        print(f"⚠️ Error fetching unique players: {e}")
-        unique_players = 0
-
-    conn.close()
+        log.warning("⚠️ Error fetching dashboard: %s", e)
+        snapshot = DashboardSnapshot()
 
     return render_template("home.html",
                          season=current_season,
-                         leaderboard_widget=leaderboard_widget,
-                         upcoming_events_widget=upcoming_events_widget,
-                         recent_matches=recent_matches,
-                         hole_in_one_pot=hole_in_one_pot,
-                         total_rounds_played=total_rounds_played,
-                         unique_players=unique_players,
+                         leaderboard_widget=snapshot.leaderboard,
+                         upcoming_events_widget=snapshot.upcoming_events,
+                         recent_matches=snapshot.recent_matches,
+                         hole_in_one_pot=snapshot.hole_in_one_pot,
+                         total_rounds_played=snapshot.total_rounds_played,
+                         unique_players=snapshot.unique_players,
                          format_time_12hr=format_time_12hr)
 
 @app.route("/api/live-match-status")
@@ -208,20 +311,24 @@ def home():
 def live_match_status():
     """API endpoint to check if there's a live match in progress"""
 
-    print(f"🔍 Checking live match status...")
-    print(f"   - Active scorecard: {session.get('active_scorecard')}")
+    log.debug("🔍 Checking live match status")
 
-    # First check if there's an active scorecard session
-    if session.get('active_scorecard'):
-        scorecard_data = session.get('scorecard_data', {})
-        print(f"   - Scorecard data: {len(scorecard_data.get('players', []))} players")
+    return jsonify(live_match_payload(get_request_db().cursor(), request.args.get('round')))
 
-        if scorecard_data.get('players'):
-            # Build live data from session
+def live_match_payload(c, round_id=None):
+    """Current live match summary, shared by /api/live-match-status and the stream's snapshot"""
+
+    # First check the shared live round store (visible to every viewer and worker)
+    live_round = load_round(c, round_id) if round_id else latest_round(c)
+    if live_round:
+        log.debug("Live round %s: %d players", live_round['round_id'], len(live_round['players']))
+
+        if live_round['players']:
+            # Build live data from the store
             players_data = []
             max_holes = 0
 
-            for player_data in scorecard_data['players']:
+            for player_data in live_round['players']:
                 if player_data.get('name'):
                     total = sum([score for score in player_data.get('holes', []) if score > 0])
                     holes_played = len([score for score in player_data.get('holes', []) if score > 0])
@@ -238,26 +345,18 @@ def live_match_status():
                 # Sort by total score (highest first for PGG Tour)
                 players_data.sort(key=lambda x: x['total'], reverse=True)
 
-                # Determine progress text
-                if max_holes == 0:
-                    progress_text = "Starting Soon"
-                elif max_holes == 9:
-                    progress_text = "Round Complete"
-                else:
-                    progress_text = f"Through {max_holes} Hole{'s' if max_holes != 1 else ''}"
-
-                return jsonify({
+                return {
                     'hasLiveMatch': True,
-                    'progressText': progress_text,
+                    'progressText': progress_text(max_holes),
                     'players': players_data[:4],  # Top 4 players
                     'holesPlayed': max_holes,
+                    'course': live_round['course'],
+                    'nine': live_round['nine'],
+                    'roundId': live_round['round_id'],
                     'isLive': True  # Flag to indicate this is live data
-                })
-
-    # If no active session, check for submitted scores from today
-    conn = get_db()
-    c = conn.cursor()
+                }
 
+    # If no live round, check for submitted scores from today
     today = datetime.today().strftime('%Y-%m-%d')
     c.execute("""
         SELECT player_name, total,
@@ -268,13 +367,12 @@ def live_match_status():
     """, (today,))
 
     today_scores = c.fetchall()
-    conn.close()
 
     if not today_scores:
-        return jsonify({
+        return {
             'hasLiveMatch': False,
             'message': 'No match being played'
-        })
+        }
 
     # Check if there are any incomplete rounds (holes with 0 scores)
     players_data = []
@@ -297,59 +395,190 @@ def live_match_status():
     # Sort by total score (highest first for PGG Tour)
     players_data.sort(key=lambda x: x['total'], reverse=True)
 
-    # Determine progress text
-    if max_holes_played == 0:
-        progress_text = "Starting Soon"
-    elif max_holes_played == 9:
-        progress_text = "Round Complete"
-    else:
-        progress_text = f"Through {max_holes_played} Hole{'s' if max_holes_played != 1 else ''}"
-
-    return jsonify({
+    return {
         'hasLiveMatch': True,
-        'progressText': progress_text,
+        'progressText': progress_text(max_holes_played),
         'players': players_data[:4],  # Top 4 players
         'holesPlayed': max_holes_played
-    })
+    }
+
+@app.route("/api/live-match-stream")
+@require_auth
+def live_match_stream():
+    """
+    Server-Sent Events feed of live scoring deltas for the home page.
+    Starts with a snapshot (same shape as /api/live-match-status) unless the
+    browser is resuming with Last-Event-ID; see live_events.py.
+    """
+
+    broker = get_broker()
+    if not broker.reserve():
+        # Every stream holds a thread; the page falls back to polling /api/live-match-status
+        return Response("Too many live viewers\n", status=503, mimetype='text/plain',
+                        headers={'Retry-After': '60'})
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('lastEventId'))
+    except (TypeError, ValueError):
+        last_id = None
+
+    snapshot = None
+    try:
+        if last_id is None or not broker.can_resume(last_id):
+            # Take the position first so nothing published during the query is missed
+            last_id = broker.last_id
+            snapshot = live_match_payload(get_request_db().cursor(), request.args.get('round'))
+    except Exception:
+        broker.release()
+        raise
+
+    # The generator runs after this request's connection has been released
+    response = Response(event_stream(broker, last_id, snapshot),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Called when the stream ends or the viewer goes away, even before the first frame
+    response.call_on_close(broker.release)
+    return response
 
 @app.route("/api/update-live-scorecard", methods=["POST"])
 @require_auth
 def update_live_scorecard():
-    """Update live scorecard data in session"""
+    """Update the live round in the shared store (the session only keeps its id)"""
 
     try:
         data = request.get_json()
 
-        # Debug logging
-        print(f"📱 Live scorecard update received: {len(data.get('players', []))} players")
-        for player in data.get('players', []):
-            print(f"   - {player.get('name', 'Unknown')}: {player.get('total', 0)} points")
-
-        # Mark that there's an active scorecard session
-        session['active_scorecard'] = True
-        session['scorecard_data'] = {
-            'players': data.get('players', []),
-            'course': data.get('course', ''),
-            'nine': data.get('nine', ''),
-            'last_updated': datetime.now().isoformat()
-        }
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("📱 Live scorecard update received: %s",
+                      ", ".join(f"{p.get('name', 'Unknown')}={p.get('total', 0)}" for p in data.get('players', [])))
+
+        round_id = session.get('live_round_id')
+        if not round_id:
+            round_id = new_round_id()
+            session['live_round_id'] = round_id
 
-        print(f"✅ Session updated - active_scorecard: {session.get('active_scorecard')}")
+        c = get_request_db().cursor()
+        previous = load_round(c, round_id)
+        players = save_round(c, round_id, data.get('course', ''), data.get('nine', ''), data.get('players', []),
+                             seq=int(data.get('seq') or 0))
+        publish_round_changes(c, round_id, previous['players'] if previous else [], players)
+        purge_expired(c)
 
-        return jsonify({'success': True, 'debug': f"Updated {len(data.get('players', []))} players"})
+        log.debug("✅ Live round updated", extra={'round_id': round_id})
+
+        return jsonify({'success': True, 'roundId': round_id, 'debug': f"Updated {len(data.get('players', []))} players"})
 
     except Exception as e:
-        print(f"❌ Error updating live scorecard: {e}")
+        log.error("❌ Error updating live scorecard: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route("/api/live-scorecard/hole", methods=["PATCH"])
+@require_auth
+def update_live_scorecard_hole():
+    """
+    Record one hole change: {"player", "hole", "score", "seq"} plus optional course/nine.
+    Changes are coalesced and written once per debounce window (see live_updates.py).
+    """
+
+    data = request.get_json(silent=True) or {}
+    try:
+        player = (data.get('player') or '').strip()
+        hole = int(data['hole'])
+        score = max(int(data.get('score') or 0), 0)
+        seq = int(data['seq'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'player, hole, score and seq are required'}), 400
+
+    if not player or not 1 <= hole <= HOLES_PER_ROUND or seq < 1:
+        return jsonify({'success': False, 'error': 'Invalid player, hole or seq'}), 400
+
+    round_id = session.get('live_round_id')
+    if not round_id:
+        round_id = new_round_id()
+        session['live_round_id'] = round_id
+
+    queued = queue_hole_update(round_id, player, hole, score, seq,
+                               data.get('course', ''), data.get('nine', ''))
+
+    return jsonify({'success': True, 'roundId': round_id, 'seq': seq, 'queued': queued})
+
+# Maximum number of matches returned by the course typeahead
+COURSE_SEARCH_LIMIT = 20
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint (request, database and cache metrics for all workers)"""
+    if not metrics.authorized(request.args.get('token'), request.headers.get('Authorization')):
+        return Response("Forbidden\n", status=403, mimetype='text/plain')
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route("/admin/profiles", methods=["GET", "POST"])
+@require_auth
+def request_profiles():
+    """Recent request profiles kept by this worker, grouped by route"""
+    if request.method == "POST":
+        if request.form.get("password", "").strip() != ADMIN_PASSWORD:
+            return render_template("profiles.html", error="Invalid admin password.")
+        session['profiles_admin'] = True
+        return redirect(url_for('request_profiles'))
+
+    if not session.get('profiles_admin'):
+        return render_template("profiles.html")
+
+    return render_template("profiles.html", unlocked=True,
+                           profiles=profiler.get_store().by_route(),
+                           sample_rate=profiler.PROFILE_SAMPLE_RATE,
+                           keep=profiler.PROFILE_KEEP,
+                           header=profiler.PROFILE_HEADER,
+                           worker_pid=os.getpid())
+
+@app.route("/admin/profiles/<int:profile_id>.<fmt>")
+@require_auth
+def download_profile(profile_id, fmt):
+    """One profile as pstats text (.txt), a pstats file (.prof) or folded stacks (.folded)"""
+    if not session.get('profiles_admin'):
+        return redirect(url_for('request_profiles'))
+
+    profile = profiler.get_store().get(profile_id)
+    if profile is None:
+        return Response("Profile not found (it may have been rotated out, or taken by another worker)\n",
+                        status=404, mimetype='text/plain')
+
+    if fmt == 'txt':
+        return Response(profile.pstats_text(), mimetype='text/plain')
+    if fmt == 'prof':
+        return Response(profile.pstats_bytes(), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.prof'})
+    if fmt == 'folded':
+        return Response(profile.folded_stacks(), mimetype='text/plain',
+                        headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.folded'})
+    return Response("Unknown format\n", status=404, mimetype='text/plain')
+
+@app.route("/api/courses")
+@require_auth
+def search_courses():
+    """Course typeahead for select2: /api/courses?q=<text> returns the top matches"""
+
+    query = request.args.get('q', '')
+    try:
+        limit = min(int(request.args.get('limit', COURSE_SEARCH_LIMIT)), 50)
+    except ValueError:
+        limit = COURSE_SEARCH_LIMIT
+
+    matches = get_course_catalog().search(query, limit=limit)
+    return jsonify({'results': [{'id': course, 'text': course} for course in matches]})
+
 @app.route("/api/debug-session")
 @require_auth
 def debug_session():
     """Debug endpoint to check session data"""
+    round_id = session.get('live_round_id')
+    live_round = load_round(get_request_db().cursor(), round_id) if round_id else None
     return jsonify({
-        'active_scorecard': session.get('active_scorecard', False),
-        'has_scorecard_data': bool(session.get('scorecard_data')),
-        'player_count': len(session.get('scorecard_data', {}).get('players', [])),
+        'live_round_id': round_id,
+        'has_live_round': live_round is not None,
+        'player_count': len(live_round['players']) if live_round else 0,
         'session_keys': list(session.keys())
     })
 
@@ -372,7 +601,7 @@ def scorecard():
         course = request.form.get("course")
         nine = request.form.get("nine")
 
-        conn = get_db()
+        conn = get_request_db()
         c = conn.cursor()
 
         # First pass: Collect all player data
@@ -405,37 +634,63 @@ def scorecard():
         for player_data in players_data:
             winner = "Yes" if player_data['total'] == max_score and max_score > 0 else "No"
 
+            # A live round is always kept. Only the importer drops rows by hash, so a second
+            # real round with the same player, date, course, nine and total is stored unhashed
+            content_hash = score_content_hash(date, nine, player_data['name'], player_data['total'], course)
+            c.execute("SELECT 1 FROM scores WHERE content_hash = ?", (content_hash,))
+            if c.fetchone():
+                log.info("ℹ️ Score matches an existing round, storing it without a content hash",
+                         extra={'player': player_data['name']})
+                content_hash = None
+
             # Insert into database
             c.execute('''
                 INSERT INTO scores (
                     date, course, nine, player_name, mulligan,
                     hole_1, hole_2, hole_3, hole_4, hole_5,
                     hole_6, hole_7, hole_8, hole_9,
-                    total, winner, season
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    total, winner, season, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 date, course, nine, player_data['name'], player_data['mulligan'],
-                *player_data['holes'], player_data['total'], winner, season
+                *player_data['holes'], player_data['total'], winner, season, content_hash
             ))
+            score_id = c.lastrowid
+            bump_version(c, 'scores')
+
+            # Keep the leaderboard, the stats cube and head-to-head records in step with the new row
+            record_round(c, season, player_data['name'], player_data['total'], winner, course)
+            record_matchups(c, score_id, season, date, course, nine, player_data['name'], player_data['total'])
 
             # Update hole-in-one pot for this player (+$1 per round)
             update_hole_in_one_pot(player_data['name'])
 
+        # The round is final now - stop showing it as live
+        round_id = session.pop('live_round_id', None)
+        if round_id:
+            discard_hole_updates(round_id)
+            delete_round(c, round_id)
+
+        for player_data in players_data:
+            publish_event(c, {
+                'type': 'final',
+                'roundId': round_id,
+                'player': player_data['name'],
+                'total': player_data['total'],
+                'holesPlayed': sum(1 for score in player_data['holes'] if score > 0),
+                'progressText': progress_text(9),
+                'course': course,
+                'nine': nine,
+            })
+
         conn.commit()
-        conn.close()
 
         return redirect(url_for("scorecard"))
 
     # Load player names from database
-    conn_players = get_db()
-    c_players = conn_players.cursor()
-    c_players.execute("SELECT name FROM players WHERE active = 1 ORDER BY name")
-    players = [row[0] for row in c_players.fetchall()]
-    conn_players.close()
-
-    # GET request: Load course list for the dropdown
-    with open("static/course_list.json") as f:
-        courses = json.load(f)
+    c = get_request_db().cursor()
+    c.execute("SELECT name FROM players WHERE active = 1 ORDER BY name")
+    players = [row[0] for row in c.fetchall()]
 
     # Check for error messages
     error_type = request.args.get('error')
@@ -444,75 +699,40 @@ def scorecard():
     if error_type == 'invalid_password':
         error_message = "Invalid admin password. Please try again."
 
-    return render_template("scorecard.html", courses=courses, players=players, error_message=error_message)
+    return render_template("scorecard.html", players=players, error_message=error_message)
 
 @app.route("/leaderboard")
 @require_auth
+@conditional_get('scores')
 def leaderboard():
     # Step 1: Get the current season based on today's date
     today = datetime.today()
     current_season = get_season_label(today)
 
-    # Step 2: Fetch only rows from that season
-    conn = get_db()
-    c = conn.cursor()
-
-    try:
-        c.execute('''
-            SELECT player_name, COUNT(*) as rounds, AVG(total) as avg_score
-            FROM scores
-            WHERE season = ?
-            GROUP BY player_name
-            HAVING rounds >= 1
-            ORDER BY avg_score DESC
-        ''', (current_season,))
-
-        leaderboard_data = c.fetchall()
-    except Exception as e:
-        print(f"⚠️ Error fetching leaderboard: {e}")
-        leaderboard_data = []
-    finally:
-        conn.close()
-
-    # Step 3: Pass season into the template
-    return render_template("leaderboard.html", leaderboard=leaderboard_data, season=current_season)
-
-@app.route("/stats")
-@require_auth
-def stats():
-    """Stats page with filtering and comprehensive statistics"""
-
-    conn = get_db()
-    c = conn.cursor()
-
-    # Get filter parameters
-    season_filter = request.args.get('season', '')
-    course_filter = request.args.get('course', '')
-    player_filter = request.args.get('player', '')
+    # Step 2: Fetch only rows from that season (skipped while the cached table is current)
+    def render_table():
+        c = get_request_db().cursor()
+        try:
+            c.execute('''
+                SELECT player_name, rounds, avg_score
+                FROM season_standings
+                WHERE season = ? AND rounds >= 1
+                ORDER BY avg_score DESC
+            ''', (current_season,))
 
-    # Get all unique values for dropdowns
-    try:
-        c.execute("SELECT DISTINCT season FROM scores WHERE season IS NOT NULL ORDER BY season DESC")
-        seasons = [row[0] for row in c.fetchall()]
-    except Exception as e:
-        print(f"⚠️ Error fetching seasons: {e}")
-        seasons = []
+            leaderboard_data = c.fetchall()
+        except Exception as e:
+            log.warning("⚠️ Error fetching leaderboard: %s", e)
+            leaderboard_data = []
+        return render_template("_leaderboard_table.html", leaderboard=leaderboard_data)
 
-    try:
-        c.execute("SELECT DISTINCT course FROM scores WHERE course IS NOT NULL AND course != '' ORDER BY course")
-        courses = [row[0] for row in c.fetchall()]
-    except Exception as e:
-        print(f"⚠️ Error fetching courses: {e}")
-        courses = []
+    leaderboard_table = cached_fragment('leaderboard_table', ('scores',), (current_season,), render_table)
 
-    try:
-        c.execute("SELECT DISTINCT player_name FROM scores WHERE player_name IS NOT NULL AND player_name != '' ORDER BY player_name")
-        players = [row[0] for row in c.fetchall()]
-    except Exception as e:
-        print(f"⚠️ Error fetching players: {e}")
-        players = []
+    # Step 3: Pass season into the template
+    return render_template("leaderboard.html", leaderboard_table=leaderboard_table, season=current_season)
 
-    # Build WHERE clause based on filters
+def stats_where_clause(season_filter, course_filter, player_filter):
+    """WHERE clause and params for the /stats filters (works on scores and stats_cube)"""
     where_conditions = []
     params = []
 
@@ -529,64 +749,76 @@ def stats():
         params.append(player_filter)
 
     where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    return where_clause, params
+
+@app.route("/stats")
+@require_auth
+@conditional_get('scores', 'awards')
+def stats():
+    """Stats page with filtering and comprehensive statistics"""
+
+    conn = get_request_db()
+    c = conn.cursor()
+
+    # Get filter parameters
+    season_filter = request.args.get('season', '')
+    course_filter = request.args.get('course', '')
+    player_filter = request.args.get('player', '')
+
+    # Dropdown values change only when the cube gains rows, so they're cached per process
+    try:
+        seasons, courses, players = stats_dimensions(c)
+    except Exception as e:
+        log.warning("⚠️ Error fetching filter values: %s", e)
+        seasons, courses, players = [], [], []
+
+    where_clause, params = stats_where_clause(season_filter, course_filter, player_filter)
 
-    # Get player statistics (without awards to avoid duplication)
+    # Player statistics, summed from the precomputed (season, course, player) cube
     player_stats_query = f"""
         SELECT
-            s.player_name,
-            COUNT(s.id) as rounds_played,
-            AVG(s.total) as avg_score,
-            MAX(s.total) as best_score,
-            MIN(s.total) as worst_score,
-            SUM(CASE WHEN s.winner = 'Yes' THEN 1 ELSE 0 END) as wins,
-            COUNT(DISTINCT s.course) as courses_played,
-            COUNT(DISTINCT s.season) as seasons_played
-        FROM scores s
+            player_name,
+            SUM(rounds) as rounds_played,
+            SUM(total_points) * 1.0 / SUM(rounds) as avg_score,
+            MAX(best) as best_score,
+            MIN(worst) as worst_score,
+            SUM(wins) as wins,
+            COUNT(DISTINCT NULLIF(course, '')) as courses_played,
+            COUNT(DISTINCT NULLIF(season, '')) as seasons_played
+        FROM stats_cube
         {where_clause}
-        GROUP BY s.player_name
-        ORDER BY s.player_name
+        GROUP BY player_name
+        ORDER BY player_name
     """
 
     try:
         c.execute(player_stats_query, params)
         player_stats = c.fetchall()
     except Exception as e:
-        print(f"⚠️ Error fetching player stats: {e}")
+        log.warning("⚠️ Error fetching player stats: %s", e)
         player_stats = []
 
-    # Get awards count for each player separately
-    awards_count_query = f"""
-        SELECT a.player_name, COUNT(a.id) as award_count
-        FROM awards a
-        WHERE a.player_name IN (
-            SELECT DISTINCT s.player_name FROM scores s {where_clause}
-        )
-        GROUP BY a.player_name
-    """
-
-    try:
-        c.execute(awards_count_query, params)
-        awards_counts = dict(c.fetchall())
-    except Exception as e:
-        print(f"⚠️ Error fetching awards count: {e}")
-        awards_counts = {}
-
-    # Get detailed awards for each player (for the filtered data)
-    awards_query = f"""
-        SELECT a.player_name, a.season, a.award_category, a.description
-        FROM awards a
-        WHERE a.player_name IN (
-            SELECT DISTINCT s.player_name FROM scores s {where_clause}
-        )
-        ORDER BY a.player_name, a.season DESC, a.award_category
-    """
-
-    try:
-        c.execute(awards_query, params)
-        awards_data = c.fetchall()
-    except Exception as e:
-        print(f"⚠️ Error fetching awards: {e}")
-        awards_data = []
+    # Awards for the players shown, in one query; counts are derived from the rows
+    stat_players = [row[0] for row in player_stats]
+    awards_data = []
+    if stat_players:
+        placeholders = ", ".join("?" for _ in stat_players)
+        awards_query = f"""
+            SELECT a.player_name, a.season, a.award_category, a.description
+            FROM awards a
+            WHERE a.player_name IN ({placeholders})
+            ORDER BY a.player_name, a.season DESC, a.award_category
+        """
+
+        try:
+            c.execute(awards_query, stat_players)
+            awards_data = c.fetchall()
+        except Exception as e:
+            log.warning("⚠️ Error fetching awards: %s", e)
+
+    awards_counts = {}
+    for player_name, *_ in awards_data:
+        awards_counts[player_name] = awards_counts.get(player_name, 0) + 1
 
     # Group awards by player
     player_awards = {}
@@ -611,8 +843,6 @@ def stats():
     c.execute(recent_rounds_query, params)
     recent_rounds = c.fetchall()
 
-    conn.close()
-
     return render_template("stats.html",
                          player_stats=player_stats,
                          recent_rounds=recent_rounds,
@@ -627,9 +857,93 @@ def stats():
                              'player': player_filter
                          })
 
+@app.route("/stats/holes")
+@require_auth
+def stats_holes():
+    """Per-hole averages, distributions, consistency and streaks for the /stats filters"""
+
+    conn = get_request_db()
+    c = conn.cursor()
+
+    season_filter = request.args.get('season', '')
+    course_filter = request.args.get('course', '')
+    player_filter = request.args.get('player', '')
+
+    try:
+        seasons, courses, players = stats_dimensions(c)
+    except Exception as e:
+        log.warning("⚠️ Error fetching filter values: %s", e)
+        seasons, courses, players = [], [], []
+
+    try:
+        report = cached_hole_report(c, season_filter, course_filter, player_filter)
+    except Exception as e:
+        log.warning("⚠️ Error computing hole stats: %s", e)
+        report = None
+
+    return render_template("stats_holes.html",
+                         report=report,
+                         seasons=seasons,
+                         courses=courses,
+                         players=players,
+                         current_filters={
+                             'season': season_filter,
+                             'course': course_filter,
+                             'player': player_filter
+                         })
+
+# Most players drawn in the head-to-head grid (rows x columns cells)
+HEAD_TO_HEAD_MATRIX_PLAYERS = 40
+
+@app.route("/stats/head-to-head")
+@require_auth
+def head_to_head():
+    """Wins, losses, ties and average margin between every pair of players"""
+
+    conn = get_request_db()
+    c = conn.cursor()
+
+    season_filter = request.args.get('season', '')
+    player_filter = request.args.get('player', '')
+
+    try:
+        seasons, _, _ = stats_dimensions(c)
+    except Exception as e:
+        log.warning("⚠️ Error fetching filter values: %s", e)
+        seasons = []
+
+    try:
+        matrix = get_head_to_head(c, season_filter)
+    except Exception as e:
+        log.warning("⚠️ Error computing head-to-head: %s", e)
+        matrix = None
+
+    # The full grid is only drawn for the active roster; anyone else is one player filter away
+    matrix_players = []
+    if matrix:
+        c.execute("SELECT name FROM players WHERE active = 1")
+        roster = {row[0] for row in c.fetchall()}
+        matrix_players = matrix.matrix_players(roster, HEAD_TO_HEAD_MATRIX_PLAYERS)
+
+    return render_template("head_to_head.html",
+                         matrix=matrix,
+                         matrix_players=matrix_players,
+                         seasons=seasons,
+                         current_filters={
+                             'season': season_filter,
+                             'player': player_filter
+                         })
+
+@app.route("/api/head-to-head")
+@require_auth
+def head_to_head_api():
+    """Head-to-head matrix as JSON (?season= for one season)"""
+    c = get_request_db().cursor()
+    return jsonify(get_head_to_head(c, request.args.get('season', '')).as_dict())
+
 @app.route("/stats/import", methods=["POST"])
 def import_scores():
-    """Import historical scores data from CSV (password protected)"""
+    """Queue an import of historical scores from an uploaded CSV file or pasted text (password protected)"""
 
     # Simple password protection
     password = request.form.get("import_password", "")
@@ -639,115 +953,63 @@ def import_scores():
     # Check if user wants to clear existing data first
     clear_data = request.form.get("clear_existing", "") == "yes"
 
-    scores_data = request.form.get("scores_data", "").strip()
-
-    if not scores_data:
+    job_id = queue_import("import_scores", {'clear_existing': clear_data},
+                          read_import_lines("scores_file", "scores_data"))
+    if not job_id:
         return redirect(url_for("stats"))
 
-    conn = get_db()
-    c = conn.cursor()
+    return redirect(url_for("stats", job=job_id))
 
-    imported_count = 0
-    error_count = 0
+def read_import_lines(file_field, text_field):
+    """Lines of an uploaded file if one was chosen (read as they're consumed), otherwise of the pasted textarea"""
+    upload = request.files.get(file_field)
+    if upload and upload.filename:
+        return _decode_upload(upload.stream)
+    return io.StringIO(request.form.get(text_field, ""), newline='')
 
-    try:
-        # Clear existing scores if requested
-        if clear_data:
-            c.execute("DELETE FROM scores")
-            print("🗑️ Cleared all existing scores")
+def _decode_upload(stream):
+    for i, raw in enumerate(stream):
+        line = raw.decode('utf-8', errors='replace')
+        yield line.lstrip('\ufeff') if i == 0 else line
 
-        # Parse CSV data: Date,Player,Score,Nine (one line per player per nine)
-        lines = scores_data.split('\n')
+def queue_import(kind, payload, lines):
+    """Enqueue a background import job (runs after this request commits); None if the input was blank"""
+    job_id = enqueue_job(get_request_db().cursor(), kind, payload, lines)
+    if job_id:
+        ensure_job_thread()
+        log.info("📥 Queued %s job %s", kind, job_id)
+    return job_id
 
-        # First pass: collect all data by date and nine to determine winners
-        rounds_data = {}  # {(date, nine): [(player, score), ...]}
+# Rejected lines included in /jobs/<id>; the CSV download has all of them
+JOB_ERRORS_SHOWN = 100
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line or line.startswith('#') or line.startswith('Date'):  # Skip empty lines, comments, and header
-                continue
+@app.route("/jobs/<int:job_id>")
+@require_auth
+def job_status(job_id):
+    """Status, progress counters, duration and rejected lines of a background job"""
 
-            try:
-                parts = [part.strip() for part in line.split(',')]
-                if len(parts) >= 3:  # Minimum: date, player, score
-                    date = parts[0]
-                    player_name = parts[1]
-                    try:
-                        score = int(parts[2])
-                    except ValueError:
-                        print(f"⚠️ Invalid score on line {line_num}: {parts[2]}")
-                        error_count += 1
-                        continue
-
-                    nine = parts[3] if len(parts) > 3 and parts[3] in ['Front', 'Back'] else 'Front'
-
-                    # Calculate season from date
-                    try:
-                        date_obj = datetime.strptime(date, '%Y-%m-%d')
-                        season = get_season_label(date_obj)
-                    except:
-                        # Try different date formats
-                        try:
-                            date_obj = datetime.strptime(date, '%m/%d/%Y')
-                            season = get_season_label(date_obj)
-                            date = date_obj.strftime('%Y-%m-%d')  # Convert to standard format
-                        except:
-                            try:
-                                date_obj = datetime.strptime(date, '%m/%d/%y')
-                                season = get_season_label(date_obj)
-                                date = date_obj.strftime('%Y-%m-%d')  # Convert to standard format
-                            except:
-                                print(f"⚠️ Invalid date format on line {line_num}: {date}")
-                                error_count += 1
-                                continue
-
-                    # Group by round (date + nine)
-                    round_key = (date, nine)
-                    if round_key not in rounds_data:
-                        rounds_data[round_key] = []
-                    rounds_data[round_key].append((player_name, score, season))
+    job = get_job(get_request_db().cursor(), job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
 
-            except Exception as e:
-                print(f"⚠️ Error parsing line {line_num} '{line}': {e}")
-                error_count += 1
-
-        # Second pass: insert data with correct winner determination
-        for (date, nine), players_in_round in rounds_data.items():
-            if not players_in_round:
-                continue
-
-            # Find winner (highest score in PGG Tour)
-            max_score = max(score for _, score, _ in players_in_round)
-
-            # Insert each player's data
-            for player_name, score, season in players_in_round:
-                winner = "Yes" if score == max_score else "No"
-
-                c.execute('''
-                    INSERT INTO scores (
-                        date, course, nine, player_name, mulligan,
-                        hole_1, hole_2, hole_3, hole_4, hole_5,
-                        hole_6, hole_7, hole_8, hole_9,
-                        total, winner, season
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    date, "Historical Course", nine, player_name, "No",
-                    0, 0, 0, 0, 0, 0, 0, 0, 0,  # Individual hole scores not available
-                    score, winner, season
-                ))
-
-                imported_count += 1
+    result = job.pop('result')
+    job['skipped'] = result.skipped if result else 0
+    job['errors'] = [{'line': line_num, 'input': line, 'error': reason}
+                     for line_num, line, reason in result.errors[:JOB_ERRORS_SHOWN]] if result else []
+    job['errorReportUrl'] = url_for('job_error_report', job_id=job_id) if result and result.error_count else None
+    return jsonify(job)
 
-        conn.commit()
-        print(f"✅ Import completed: {imported_count} records imported, {error_count} errors")
+@app.route("/jobs/<int:job_id>/errors.csv")
+@require_auth
+def job_error_report(job_id):
+    """Download the lines an import job rejected, with the reason for each"""
 
-    except Exception as e:
-        print(f"❌ Import failed: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+    job = get_job(get_request_db().cursor(), job_id)
+    if job is None or job['result'] is None:
+        return "Job report not found", 404
 
-    return redirect(url_for("stats"))
+    return Response(job['result'].error_report_csv(), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename=job-{job_id}-errors.csv'})
 
 @app.route("/schedule")
 @require_auth
@@ -763,7 +1025,7 @@ def schedule():
     elif error_type == 'missing_fields':
         error_message = "Please fill in all required fields."
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     # Get upcoming events with participant counts and player names
@@ -787,16 +1049,9 @@ def schedule():
     c.execute("SELECT id, name, email FROM players WHERE active = 1 ORDER BY name")
     players = c.fetchall()
 
-    # Load course list for dropdown
-    with open("static/course_list.json") as f:
-        courses = json.load(f)
-
-    conn.close()
-
     return render_template("schedule.html",
                          upcoming_events=upcoming_events,
                          players=players,
-                         courses=courses,
                          datetime=datetime,
                          format_time_12hr=format_time_12hr,
                          error_message=error_message)
@@ -821,7 +1076,7 @@ def create_event():
     if not event_date or not selected_players:
         return redirect(url_for("schedule") + "?error=missing_fields")
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -840,31 +1095,27 @@ def create_event():
                 VALUES (?, ?, 'invited')
             """, (event_id, player_id))
 
+        bump_version(c, 'events')
         conn.commit()
 
         # Event created successfully - admin can manually text players
-        print(f"✅ Event created successfully for {len(selected_players)} players")
-        print(f"📅 Event: {event_date} at {event_time}")
-        print(f"🏌️ Course: {course}")
-
-        # Get player names for logging
-        player_names = []
-        for player_id in selected_players:
-            c.execute("SELECT name FROM players WHERE id = ?", (player_id,))
-            result = c.fetchone()
-            if result:
-                player_names.append(result[0])
-
-        print(f"👥 Players: {', '.join(player_names)}")
-        print("📱 Admin should manually text players about the event")
+        if log.isEnabledFor(logging.INFO):
+            # Get player names for logging
+            player_names = []
+            for player_id in selected_players:
+                c.execute("SELECT name FROM players WHERE id = ?", (player_id,))
+                result = c.fetchone()
+                if result:
+                    player_names.append(result[0])
+
+            log.info("✅ Event created - admin should manually text players",
+                     extra={'date': event_date, 'time': event_time, 'course': course,
+                            'players': ", ".join(player_names)})
 
     except Exception as e:
-        print(f"Error creating event: {e}")
+        log.error("Error creating event: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("schedule"))
 
 # SMS invitation functionality removed - manual texting preferred
@@ -873,14 +1124,12 @@ def create_event():
 def manage_players():
     """Player management page for editing emails and contact info"""
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     c.execute("SELECT id, name, email, phone, active FROM players ORDER BY name")
     players = c.fetchall()
 
-    conn.close()
-
     return render_template("manage_players.html", players=players)
 
 @app.route("/players/update", methods=["POST"])
@@ -891,7 +1140,7 @@ def update_player():
     email = request.form.get("email")
     phone = request.form.get("phone")
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -900,23 +1149,27 @@ def update_player():
             SET email = ?, phone = ?
             WHERE id = ?
         """, (email, phone, player_id))
+        bump_version(c, 'players')
 
         conn.commit()
 
     except Exception as e:
-        print(f"Error updating player: {e}")
+        log.error("Error updating player: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("manage_players"))
 
 @app.route("/roster")
+@conditional_get('players', 'scores', 'awards')
 def roster():
     """Roster management page"""
+    roster_table = cached_fragment('roster_table', ('players', 'scores', 'awards'), (), render_roster_table)
+    return render_template("roster.html", roster_table=roster_table)
+
+def render_roster_table():
+    """The roster table with each player's rounds, wins and awards"""
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     # Get all players with their stats (without awards to avoid duplication)
@@ -962,9 +1215,7 @@ def roster():
             'description': description
         })
 
-    conn.close()
-
-    return render_template("roster.html", players=players, player_awards=player_awards, awards_counts=awards_counts)
+    return render_template("_roster_table.html", players=players, player_awards=player_awards, awards_counts=awards_counts)
 
 @app.route("/roster/add", methods=["POST"])
 def add_player():
@@ -983,7 +1234,7 @@ def add_player():
     if not name:
         return redirect(url_for("roster"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -991,19 +1242,17 @@ def add_player():
             INSERT INTO players (name, email, phone, active)
             VALUES (?, ?, ?, 1)
         """, (name, email or None, phone or None))
+        bump_version(c, 'players')
 
         conn.commit()
 
     except sqlite3.IntegrityError:
         # Player name already exists
-        print(f"Player {name} already exists")
+        log.info("Player %s already exists", name)
     except Exception as e:
-        print(f"Error adding player: {e}")
+        log.error("Error adding player: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("roster"))
 
 @app.route("/roster/update", methods=["POST"])
@@ -1019,7 +1268,7 @@ def update_roster_player():
     if not player_id or not name:
         return redirect(url_for("roster"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1028,46 +1277,63 @@ def update_roster_player():
             SET name = ?, email = ?, phone = ?, active = ?
             WHERE id = ?
         """, (name, email or None, phone or None, active, player_id))
+        bump_version(c, 'players')
 
         conn.commit()
 
     except Exception as e:
-        print(f"Error updating player: {e}")
+        log.error("Error updating player: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("roster"))
 
 @app.route("/roster/delete/<int:player_id>", methods=["POST"])
 def delete_player(player_id):
     """Deactivate a player (soft delete)"""
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
         # Soft delete - just mark as inactive
         c.execute("UPDATE players SET active = 0 WHERE id = ?", (player_id,))
+        bump_version(c, 'players')
         conn.commit()
 
     except Exception as e:
-        print(f"Error deactivating player: {e}")
+        log.error("Error deactivating player: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("roster"))
 
 @app.route("/awards")
+@conditional_get('awards', 'players')
 def awards():
     """Awards page showing winners by season"""
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
+    awards_list = cached_fragment('awards_list', ('awards',), (), render_awards_list)
+
+    # Get all players for admin dropdown
+    c.execute("SELECT name FROM players WHERE active = 1 ORDER BY name")
+    players = [row[0] for row in c.fetchall()]
+
+    # Get distinct award categories for dropdown
+    c.execute("SELECT DISTINCT award_category FROM awards ORDER BY award_category")
+    categories = [row[0] for row in c.fetchall()]
+
+    return render_template("awards.html",
+                         awards_list=awards_list,
+                         players=players,
+                         categories=categories)
+
+def render_awards_list():
+    """Award cards grouped by season"""
+
+    c = get_request_db().cursor()
+
     # Get all awards grouped by season (include ID for editing)
     c.execute("""
         SELECT id, season, award_category, player_name, description, award_date
@@ -1090,20 +1356,7 @@ def awards():
             'award_date': award_date
         })
 
-    # Get all players for admin dropdown
-    c.execute("SELECT name FROM players WHERE active = 1 ORDER BY name")
-    players = [row[0] for row in c.fetchall()]
-
-    # Get distinct award categories for dropdown
-    c.execute("SELECT DISTINCT award_category FROM awards ORDER BY award_category")
-    categories = [row[0] for row in c.fetchall()]
-
-    conn.close()
-
-    return render_template("awards.html",
-                         awards_by_season=awards_by_season,
-                         players=players,
-                         categories=categories)
+    return render_template("_awards_list.html", awards_by_season=awards_by_season)
 
 @app.route("/awards/add", methods=["POST"])
 def add_award():
@@ -1127,7 +1380,7 @@ def add_award():
     if not season or not final_category or not player_name:
         return redirect(url_for("awards"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1135,78 +1388,31 @@ def add_award():
             INSERT INTO awards (season, award_category, player_name, description, award_date, created_by)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (season, final_category, player_name, description, award_date, "Admin"))
+        bump_version(c, 'awards')
 
         conn.commit()
-        print(f"✅ Added award: {final_category} to {player_name} for {season}")
+        log.info("✅ Added award: %s to %s for %s", final_category, player_name, season)
 
     except Exception as e:
-        print(f"❌ Error adding award: {e}")
+        log.error("❌ Error adding award: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("awards"))
 
 @app.route("/awards/import", methods=["POST"])
 def import_awards():
-    """Import historical awards data (password protected)"""
+    """Queue an import of historical awards data (password protected)"""
 
     # Simple password protection
     password = request.form.get("import_password", "")
     if password != ADMIN_PASSWORD:
         return redirect(url_for("awards"))
 
-    awards_data = request.form.get("awards_data", "").strip()
-
-    if not awards_data:
+    job_id = queue_import("import_awards", {}, read_import_lines("awards_file", "awards_data"))
+    if not job_id:
         return redirect(url_for("awards"))
 
-    conn = get_db()
-    c = conn.cursor()
-
-    imported_count = 0
-    error_count = 0
-
-    try:
-        # Parse CSV-like data: Season,Category,Player,Description,Date
-        lines = awards_data.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):  # Skip empty lines and comments
-                continue
-
-            try:
-                parts = [part.strip() for part in line.split(',')]
-                if len(parts) >= 3:  # Minimum: season, category, player
-                    season = parts[0]
-                    category = parts[1]
-                    player = parts[2]
-                    description = parts[3] if len(parts) > 3 else ""
-                    award_date = parts[4] if len(parts) > 4 else ""
-
-                    c.execute("""
-                        INSERT INTO awards (season, award_category, player_name, description, award_date, created_by)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (season, category, player, description, award_date, "Import"))
-
-                    imported_count += 1
-
-            except Exception as e:
-                print(f"⚠️ Error importing line '{line}': {e}")
-                error_count += 1
-
-        conn.commit()
-        print(f"✅ Imported {imported_count} awards, {error_count} errors")
-
-    except Exception as e:
-        print(f"❌ Error during import: {e}")
-        conn.rollback()
-
-    finally:
-        conn.close()
-
-    return redirect(url_for("awards"))
+    return redirect(url_for("awards", job=job_id))
 
 @app.route("/awards/edit/<int:award_id>", methods=["POST"])
 def edit_award(award_id):
@@ -1230,7 +1436,7 @@ def edit_award(award_id):
     if not season or not final_category or not player_name:
         return redirect(url_for("awards"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1239,17 +1445,15 @@ def edit_award(award_id):
             SET season = ?, award_category = ?, player_name = ?, description = ?, award_date = ?
             WHERE id = ?
         """, (season, final_category, player_name, description, award_date, award_id))
+        bump_version(c, 'awards')
 
         conn.commit()
-        print(f"✅ Updated award ID {award_id}: {final_category} to {player_name} for {season}")
+        log.info("✅ Updated award ID %s: %s to %s for %s", award_id, final_category, player_name, season)
 
     except Exception as e:
-        print(f"❌ Error updating award: {e}")
+        log.error("❌ Error updating award: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("awards"))
 
 @app.route("/awards/delete/<int:award_id>", methods=["POST"])
@@ -1261,7 +1465,7 @@ def delete_award(award_id):
     if password != ADMIN_PASSWORD:
         return redirect(url_for("awards"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1271,23 +1475,22 @@ def delete_award(award_id):
 
         if award_info:
             c.execute("DELETE FROM awards WHERE id = ?", (award_id,))
+            bump_version(c, 'awards')
             conn.commit()
-            print(f"✅ Deleted award: {award_info[0]} - {award_info[1]} ({award_info[2]})")
+            log.info("✅ Deleted award: %s - %s (%s)", award_info[0], award_info[1], award_info[2])
 
     except Exception as e:
-        print(f"❌ Error deleting award: {e}")
+        log.error("❌ Error deleting award: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("awards"))
 
 @app.route("/hole-in-one")
+@conditional_get('hole_in_one_pot', 'hole_in_one_history', 'players')
 def hole_in_one():
     """Hole-in-one pot tracking and history page"""
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     # Get current pot status
@@ -1314,18 +1517,11 @@ def hole_in_one():
     c.execute("SELECT name FROM players WHERE active = 1 ORDER BY name")
     players = [row[0] for row in c.fetchall()]
 
-    # Load course list for dropdown
-    with open("static/course_list.json") as f:
-        courses = json.load(f)
-
-    conn.close()
-
     return render_template("hole_in_one.html",
                          total_pot=total_pot,
                          player_balances=player_balances,
                          hole_in_one_history=hole_in_one_history,
-                         players=players,
-                         courses=courses)
+                         players=players)
 
 @app.route("/hole-in-one/record", methods=["POST"])
 def record_hole_in_one():
@@ -1345,7 +1541,7 @@ def record_hole_in_one():
     if not player_name or not course or not hole_number or not event_date:
         return redirect(url_for("hole_in_one"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1367,81 +1563,31 @@ def record_hole_in_one():
                 original_balance = 0.0,
                 paid = 1
         """)
+        bump_version(c, 'hole_in_one_history', 'hole_in_one_pot')
 
         conn.commit()
-        print(f"✅ Recorded hole-in-one: {player_name} won ${pot_amount:.2f} pot!")
+        log.info("✅ Recorded hole-in-one: %s won $%.2f pot!", player_name, pot_amount)
 
     except Exception as e:
-        print(f"❌ Error recording hole-in-one: {e}")
+        log.error("❌ Error recording hole-in-one: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("hole_in_one"))
 
 @app.route("/hole-in-one/upload-balances", methods=["POST"])
 def upload_hole_in_one_balances():
-    """Upload current player balances (password protected)"""
+    """Queue an upload of current player balances (password protected)"""
 
     # Simple password protection
     password = request.form.get("password", "")
     if password != ADMIN_PASSWORD:
         return redirect(url_for("hole_in_one"))
 
-    balances_data = request.form.get("balances_data", "").strip()
-
-    if not balances_data:
+    job_id = queue_import("upload_balances", {}, read_import_lines("balances_file", "balances_data"))
+    if not job_id:
         return redirect(url_for("hole_in_one"))
 
-    conn = get_db()
-    c = conn.cursor()
-
-    updated_count = 0
-    error_count = 0
-
-    try:
-        # Parse CSV-like data: Player,Amount
-        lines = balances_data.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):  # Skip empty lines and comments
-                continue
-
-            try:
-                parts = [part.strip() for part in line.split(',')]
-                if len(parts) >= 2:
-                    player_name = parts[0]
-                    amount = float(parts[1])
-
-                    # Cap at $50
-                    amount = min(amount, 50.0)
-
-                    # Update or insert player balance
-                    c.execute("""
-                        INSERT OR REPLACE INTO hole_in_one_pot
-                        (player_name, amount_owed, total_contributed, last_updated)
-                        VALUES (?, ?, 0.0, ?)
-                    """, (player_name, amount, datetime.now().isoformat()))
-
-                    updated_count += 1
-                    print(f"✅ Updated {player_name}: ${amount:.2f}")
-
-            except Exception as e:
-                print(f"⚠️ Error importing line '{line}': {e}")
-                error_count += 1
-
-        conn.commit()
-        print(f"✅ Updated {updated_count} player balances, {error_count} errors")
-
-    except Exception as e:
-        print(f"❌ Error during balance upload: {e}")
-        conn.rollback()
-
-    finally:
-        conn.close()
-
-    return redirect(url_for("hole_in_one"))
+    return redirect(url_for("hole_in_one", job=job_id))
 
 @app.route("/hole-in-one/toggle-paid/<player_name>", methods=["POST"])
 def toggle_paid_status(player_name):
@@ -1452,7 +1598,7 @@ def toggle_paid_status(player_name):
     if password != ADMIN_PASSWORD:
         return redirect(url_for("hole_in_one"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1474,7 +1620,7 @@ def toggle_paid_status(player_name):
                         last_updated = ?
                     WHERE player_name = ?
                 """, (amount_owed, datetime.now().isoformat(), player_name))
-                print(f"✅ Marked {player_name} as PAID - ${amount_owed:.2f} balance cleared")
+                log.info("✅ Marked %s as PAID - $%.2f balance cleared", player_name, amount_owed)
             else:  # Marking as unpaid (restore their original balance)
                 c.execute("""
                     UPDATE hole_in_one_pot
@@ -1483,17 +1629,15 @@ def toggle_paid_status(player_name):
                         last_updated = ?
                     WHERE player_name = ?
                 """, (datetime.now().isoformat(), player_name))
-                print(f"✅ Marked {player_name} as UNPAID - ${original_balance:.2f} balance restored")
+                log.info("✅ Marked %s as UNPAID - $%.2f balance restored", player_name, original_balance)
 
+            bump_version(c, 'hole_in_one_pot')
             conn.commit()
 
     except Exception as e:
-        print(f"❌ Error toggling paid status: {e}")
+        log.error("❌ Error toggling paid status: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("hole_in_one"))
 
 @app.route("/hole-in-one/record-payment", methods=["POST"])
@@ -1517,7 +1661,7 @@ def record_hole_in_one_payment():
     except ValueError:
         return redirect(url_for("hole_in_one"))
 
-    conn = get_db()
+    conn = get_request_db()
     c = conn.cursor()
 
     try:
@@ -1539,105 +1683,56 @@ def record_hole_in_one_payment():
                 SET amount_owed = ?, total_contributed = ?, last_updated = ?
                 WHERE player_name = ?
             """, (new_owed, new_contributed, datetime.now().isoformat(), player_name))
+            bump_version(c, 'hole_in_one_pot')
 
             conn.commit()
-            print(f"✅ Recorded payment: {player_name} paid ${payment_applied:.2f} via {payment_method}")
-            print(f"   New balance: Owes ${new_owed:.2f}, Total contributed: ${new_contributed:.2f}")
+            log.info("✅ Recorded payment: %s paid $%.2f via %s", player_name, payment_applied, payment_method,
+                     extra={'owes': f"{new_owed:.2f}", 'contributed': f"{new_contributed:.2f}"})
 
         else:
-            print(f"❌ Player {player_name} not found in hole-in-one pot")
+            log.warning("❌ Player %s not found in hole-in-one pot", player_name)
 
     except Exception as e:
-        print(f"❌ Error recording payment: {e}")
+        log.error("❌ Error recording payment: %s", e)
         conn.rollback()
 
-    finally:
-        conn.close()
-
     return redirect(url_for("hole_in_one"))
 
 def update_hole_in_one_pot(player_name):
-    """Update pot when a player plays a round (called from score entry)"""
-
-    conn = get_db()
-    c = conn.cursor()
+    """
+    Update pot when a player plays a round (called from score entry).
+    Runs on the request's connection so it commits (or rolls back) together
+    with the scores it belongs to.
+    """
 
-    try:
-        # Check current balance first
-        c.execute("SELECT amount_owed FROM hole_in_one_pot WHERE player_name = ?", (player_name,))
-        result = c.fetchone()
+    c = get_request_db().cursor()
+    bump_version(c, 'hole_in_one_pot')
 
-        if result:
-            current_owed = result[0]
-            # Only add $1 if they haven't reached the $50 cap
-            if current_owed < 50.0:
-                new_amount = min(current_owed + 1.0, 50.0)  # Cap at $50
-                c.execute("""
-                    UPDATE hole_in_one_pot
-                    SET amount_owed = ?,
-                        original_balance = ?,
-                        last_updated = ?
-                    WHERE player_name = ?
-                """, (new_amount, new_amount, datetime.now().isoformat(), player_name))
+    # Check current balance first
+    c.execute("SELECT amount_owed FROM hole_in_one_pot WHERE player_name = ?", (player_name,))
+    result = c.fetchone()
 
-                if current_owed + 1.0 >= 50.0:
-                    print(f"🎯 {player_name} has reached the $50 cap!")
-        else:
-            # If player doesn't exist in pot table, create them with $1
+    if result:
+        current_owed = result[0]
+        # Only add $1 if they haven't reached the $50 cap
+        if current_owed < 50.0:
+            new_amount = min(current_owed + 1.0, 50.0)  # Cap at $50
             c.execute("""
-                INSERT INTO hole_in_one_pot (player_name, amount_owed, total_contributed, original_balance)
-                VALUES (?, 1.0, 0.0, 1.0)
-            """, (player_name,))
-
-        conn.commit()
-
-    except Exception as e:
-        print(f"❌ Error updating hole-in-one pot for {player_name}: {e}")
-        conn.rollback()
-
-    finally:
-        conn.close()
-
-def get_recent_matches(cursor, limit=2):
-    """Get recent complete matches grouped by date, course, and nine"""
-
-    # Get distinct matches (date + course + nine combinations) with scores
-    cursor.execute("""
-        SELECT DISTINCT date, course, nine
-        FROM scores
-        WHERE date IS NOT NULL AND course IS NOT NULL AND nine IS NOT NULL
-        ORDER BY date DESC, course, nine DESC
-        LIMIT ?
-    """, (limit * 2,))  # Get more to ensure we have enough complete matches
-
-    match_combinations = cursor.fetchall()
-
-    recent_matches = []
-
-    for date, course, nine in match_combinations:
-        if len(recent_matches) >= limit:
-            break
-
-        # Get all players for this specific match
-        cursor.execute("""
-            SELECT player_name, total, winner
-            FROM scores
-            WHERE date = ? AND course = ? AND nine = ?
-            ORDER BY total DESC
-        """, (date, course, nine))
-
-        players = cursor.fetchall()
-
-        # Only include matches with at least 2 players
-        if len(players) >= 2:
-            recent_matches.append({
-                'date': date,
-                'course': course,
-                'nine': nine,
-                'players': players
-            })
+                UPDATE hole_in_one_pot
+                SET amount_owed = ?,
+                    original_balance = ?,
+                    last_updated = ?
+                WHERE player_name = ?
+            """, (new_amount, new_amount, datetime.now().isoformat(), player_name))
 
-    return recent_matches
+            if current_owed + 1.0 >= 50.0:
+                log.info("🎯 %s has reached the $50 cap!", player_name)
+    else:
+        # If player doesn't exist in pot table, create them with $1
+        c.execute("""
+            INSERT INTO hole_in_one_pot (player_name, amount_owed, total_contributed, original_balance)
+            VALUES (?, 1.0, 0.0, 1.0)
+        """, (player_name,))
 
 if __name__ == "__main__":
     import os
@@ -0,0 +1,162 @@
+"""
+Structured logging for the web app and its background threads.
+
+Loggers from get_logger() put records on an in-memory queue, and a listener
+thread writes them to stdout as logfmt lines. Requests never wait on stdout
+or the Heroku log drain:
+
+    ts=2026-10-18T09:53:05Z level=info logger=pgg.live route=/api/update-live-scorecard msg="✅ Live round updated" round_id=ab12
+
+Anything passed in extra= becomes a key=value field, and the current route
+(from request_timing) is added automatically. Set LOG_LEVEL (default INFO)
+to choose how much is written. Disabled levels cost a single level check, so
+per-row and per-poll messages are logged at DEBUG.
+
+LOG_ROUTE_SAMPLES keeps only one in N info/debug records from a noisy route,
+for example "/api/live-match-status=50,/api/live-scorecard/hole=10". Warnings
+and errors are always written. If the queue fills up (LOG_QUEUE_SIZE) new
+records are dropped and counted rather than blocking the request.
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from request_timing import current_request
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_ROUTE_SAMPLES = os.environ.get('LOG_ROUTE_SAMPLES', '')
+
+ROOT_LOGGER = 'pgg'
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'route'}
+
+def parse_route_samples(spec):
+    """"/a=10,/b=50" -> {'/a': 10, '/b': 50}"""
+    samples = {}
+    for item in spec.split(','):
+        route, _, rate = item.strip().rpartition('=')
+        if route and rate.isdigit() and int(rate) > 1:
+            samples[route] = int(rate)
+    return samples
+
+def _quote(value):
+    text = str(value)
+    if text and not any(ch in text for ch in ' "=\n\t'):
+        return text
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+class LogfmtFormatter(logging.Formatter):
+    """One key=value line per record; extra= fields follow the message"""
+    def format(self, record):
+        parts = [
+            f"ts={datetime.fromtimestamp(record.created, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            f"level={record.levelname.lower()}",
+            f"logger={record.name}",
+        ]
+        route = getattr(record, 'route', None)
+        if route:
+            parts.append(f"route={_quote(route)}")
+        parts.append(f"msg={_quote(record.getMessage())}")
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                parts.append(f"{key}={_quote(value)}")
+        if record.exc_text:
+            parts.append(f"exc={_quote(record.exc_text)}")
+        return " ".join(parts)
+
+class RouteSampler(logging.Filter):
+    """Tags records with the current route and thins out info/debug from noisy routes"""
+    def __init__(self, samples):
+        super().__init__()
+        self.samples = samples
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        timing = current_request()
+        record.route = timing.route if timing is not None else None
+        rate = self.samples.get(record.route)
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self._counts.get(record.route, 0)
+            self._counts[record.route] = count + 1
+        return count % rate == 0
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Render the message now (args may change after the call) but leave formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_handler = None
+_listener = None
+_logging_pid = None
+_logging_lock = threading.Lock()
+
+def ensure_logging():
+    """Start this process's queue listener (threads don't survive a fork, so one per process)"""
+    global _handler, _listener, _logging_pid
+
+    pid = os.getpid()
+    if _logging_pid == pid:
+        return
+
+    with _logging_lock:
+        if _logging_pid == pid:
+            return
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(LogfmtFormatter())
+        listener = QueueListener(log_queue, stream, respect_handler_level=False)
+
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(RouteSampler(parse_route_samples(LOG_ROUTE_SAMPLES)))
+
+        root = logging.getLogger(ROOT_LOGGER)
+        if _handler is not None:
+            root.removeHandler(_handler)  # Inherited from the parent process; its listener isn't running here
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+
+        listener.start()
+        if _logging_pid is None:
+            atexit.register(stop_logging)
+        _handler, _listener, _logging_pid = handler, listener, pid
+
+def stop_logging():
+    """Flush queued records (called at exit)"""
+    if _listener is not None and _logging_pid == os.getpid():
+        _listener.stop()
+
+def get_logger(name):
+    """Logger 'pgg.<name>' writing through the queue"""
+    ensure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def dropped_records():
+    return _handler.dropped if _handler is not None else 0
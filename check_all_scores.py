@@ -5,6 +5,8 @@ Check all scores in the database and provide deletion options
 
 import sqlite3
 from datetime import datetime
+from aggregates import rebuild_aggregates
+from data_versions import bump_version
 
 def check_all_scores():
     """Show all scores in the database"""
@@ -55,14 +57,14 @@ def delete_score_by_id(score_id):
     
     try:
         # Show what we're about to delete
-        c.execute("SELECT date, player_name, course, nine, total FROM scores WHERE id = ?", (score_id,))
+        c.execute("SELECT date, player_name, course, nine, total, season FROM scores WHERE id = ?", (score_id,))
         score_data = c.fetchone()
         
         if not score_data:
             print(f"❌ No score found with ID {score_id}")
             return False
         
-        date, player, course, nine, total = score_data
+        date, player, course, nine, total, season = score_data
         print(f"\n📋 Score to delete:")
         print(f"   ID {score_id}: {player} - {total} pts")
         print(f"   Course: {course}, Nine: {nine}, Date: {date}")
@@ -71,6 +73,9 @@ def delete_score_by_id(score_id):
         
         if confirm.lower() == 'yes':
             c.execute("DELETE FROM scores WHERE id = ?", (score_id,))
+            # Keep the leaderboard and stats cube consistent with the deletion
+            rebuild_aggregates(c, {season} if season else None)
+            bump_version(c, 'scores')
             conn.commit()
             print(f"✅ Successfully deleted score ID {score_id}")
             return True
@@ -110,14 +115,16 @@ def delete_multiple_scores():
         c = conn.cursor()
         
         valid_ids = []
+        seasons = set()
         for score_id in score_ids:
-            c.execute("SELECT date, player_name, course, nine, total FROM scores WHERE id = ?", (score_id,))
+            c.execute("SELECT date, player_name, course, nine, total, season FROM scores WHERE id = ?", (score_id,))
             score_data = c.fetchone()
             
             if score_data:
-                date, player, course, nine, total = score_data
+                date, player, course, nine, total, season = score_data
                 print(f"   ID {score_id}: {player} - {total} pts ({course}, {nine}) on {date}")
                 valid_ids.append(score_id)
+                seasons.add(season)
             else:
                 print(f"   ID {score_id}: ❌ NOT FOUND")
         
@@ -132,6 +139,10 @@ def delete_multiple_scores():
             for score_id in valid_ids:
                 c.execute("DELETE FROM scores WHERE id = ?", (score_id,))
             
+            # Keep the leaderboard and stats cube consistent with the deletion
+            rebuild_aggregates(c, {season for season in seasons if season})
+            bump_version(c, 'scores')
+            
             conn.commit()
             print(f"✅ Successfully deleted {len(valid_ids)} scores")
         else:
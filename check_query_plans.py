@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Check that every query the app and job worker issue is served by an index.
+
+Builds a large synthetic SQLite database (or uses DATABASE_URL), applies the
+migrations, then runs EXPLAIN on each SELECT/UPDATE/DELETE found in the
+modules listed in QUERY_MODULES.
+Exits non-zero if any filtered query falls back to a sequential scan of one
+of the large tables.
+
+Queries without a WHERE clause or JOIN are skipped - they read the whole
+table by design, so no index can help them. The same goes for WHERE clauses
+that only skip NULL rows and for scalar subqueries over a whole table.
+
+Usage:
+    python check_query_plans.py               # synthetic SQLite database
+    python check_query_plans.py --rows 500000
+    DATABASE_URL=... python check_query_plans.py   # EXPLAIN against Postgres
+"""
+import ast
+import importlib
+import itertools
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from migrations import apply_migrations
+
+# Tables that grow with league history - a full scan of these is a failure
+LARGE_TABLES = ('scores', 'awards', 'hole_in_one_pot', 'season_standings', 'stats_cube',
+                'head_to_head', 'jobs', 'job_inputs', 'live_events')
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose queries run on the request path or in the job worker
+QUERY_MODULES = (
+    'app.py', 'dashboard.py', 'aggregates.py', 'hole_stats.py', 'head_to_head.py',
+    'live_store.py', 'live_events.py', 'jobs.py', 'importers.py', 'data_versions.py',
+)
+
+# Values substituted into f-string queries built from filters
+FSTRING_VARIANTS = {
+    'where_clause': [
+        "",
+        "WHERE season = ?",
+        "WHERE course = ?",
+        "WHERE player_name = ?",
+        "WHERE season = ? AND course = ?",
+        "WHERE season = ? AND player_name = ?",
+    ],
+    # IN (...) lists built from earlier results
+    'placeholders': ["?", "?, ?, ?"],
+    # Aggregate rebuilds: all seasons, or just the ones a write touched
+    'season_filter': ["", "AND season IN (?)", "AND season IN (?, ?, ?)"],
+    'season_condition': ["season = ?", "season IS NULL"],
+}
+
+BASE_SCHEMA = [
+    '''CREATE TABLE scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT, course TEXT, nine TEXT, player_name TEXT, mulligan TEXT,
+        hole_1 INTEGER, hole_2 INTEGER, hole_3 INTEGER, hole_4 INTEGER, hole_5 INTEGER,
+        hole_6 INTEGER, hole_7 INTEGER, hole_8 INTEGER, hole_9 INTEGER,
+        total INTEGER, winner TEXT, season TEXT
+    )''',
+    '''CREATE TABLE awards (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        season TEXT NOT NULL, award_category TEXT NOT NULL, player_name TEXT NOT NULL,
+        description TEXT, award_date TEXT,
+        created_date TEXT DEFAULT CURRENT_TIMESTAMP, created_by TEXT DEFAULT 'Admin'
+    )''',
+    '''CREATE TABLE hole_in_one_pot (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_name TEXT NOT NULL, amount_owed REAL DEFAULT 0.0,
+        total_contributed REAL DEFAULT 0.0, paid BOOLEAN DEFAULT 0,
+        original_balance REAL DEFAULT 0.0, last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE hole_in_one_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_name TEXT NOT NULL, course TEXT NOT NULL, hole_number INTEGER NOT NULL,
+        event_date TEXT NOT NULL, pot_amount REAL NOT NULL, description TEXT,
+        recorded_date TEXT DEFAULT CURRENT_TIMESTAMP, recorded_by TEXT DEFAULT 'Admin'
+    )''',
+    '''CREATE TABLE players (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL, email TEXT, phone TEXT,
+        active BOOLEAN DEFAULT 1, created_date TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_date TEXT NOT NULL, event_time TEXT, course TEXT, description TEXT,
+        max_players INTEGER DEFAULT 4, created_by TEXT,
+        created_date TEXT DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'scheduled'
+    )''',
+    '''CREATE TABLE event_participants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER, player_id INTEGER, status TEXT DEFAULT 'invited',
+        invited_date TEXT DEFAULT CURRENT_TIMESTAMP, response_date TEXT,
+        UNIQUE(event_id, player_id)
+    )''',
+]
+
+class _StringAgg:
+    """STRING_AGG for SQLite builds older than 3.44 (app.py uses the Postgres name)"""
+    def __init__(self):
+        self.values = []
+
+    def step(self, value, separator):
+        if value is not None:
+            self.values.append((str(value), separator))
+
+    def finalize(self):
+        if not self.values:
+            return None
+        out = self.values[0][0]
+        for value, separator in self.values[1:]:
+            out += separator + value
+        return out
+
+def build_synthetic_sqlite(path, rows):
+    """Create and fill a SQLite database large enough for meaningful plans"""
+
+    conn = sqlite3.connect(path)
+    conn.create_aggregate('STRING_AGG', 2, _StringAgg)
+    c = conn.cursor()
+    for ddl in BASE_SCHEMA:
+        c.execute(ddl)
+
+    rng = random.Random(42)
+    players = [f"Player {i}" for i in range(60)]
+    courses = [f"Course {i}" for i in range(300)]
+    start = date(2015, 1, 1)
+
+    def score_rows():
+        for i in range(rows):
+            day = start + timedelta(days=rng.randrange(3650))
+            season = f"{day.year + 1 if day.month >= 11 else day.year} Season"
+            holes = [rng.randint(0, 4) for _ in range(9)]
+            yield (day.isoformat(), rng.choice(courses), rng.choice(('Front', 'Back')),
+                   rng.choice(players), 'No', *holes, sum(holes),
+                   'Yes' if rng.random() < 0.3 else 'No', season)
+
+    c.executemany('''
+        INSERT INTO scores (date, course, nine, player_name, mulligan,
+                            hole_1, hole_2, hole_3, hole_4, hole_5, hole_6, hole_7, hole_8, hole_9,
+                            total, winner, season)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', score_rows())
+    c.executemany("INSERT INTO awards (season, award_category, player_name) VALUES (?, ?, ?)",
+                  ((f"{2015 + i % 10} Season", f"Award {i % 25}", f"Member {i}") for i in range(rows // 10)))
+    c.executemany("INSERT INTO hole_in_one_pot (player_name, amount_owed) VALUES (?, ?)",
+                  ((f"Member {i}", i % 50) for i in range(rows // 10)))
+    c.executemany("INSERT INTO players (name) VALUES (?)", ((p,) for p in players))
+    conn.commit()
+
+    apply_migrations(conn, using_postgres=False, verbose=False)
+
+    # Job and live event history builds up alongside the scores
+    now = 1_700_000_000.0
+    c.executemany("INSERT INTO jobs (kind, status, payload, created_at, finished_at) VALUES (?, ?, ?, ?, ?)",
+                  (('import_scores', 'done' if i % 50 else 'failed', '{}', now + i, now + i + 5)
+                   for i in range(rows // 20)))
+    c.executemany("INSERT INTO job_inputs (job_id, data) VALUES (?, ?)",
+                  ((i % (rows // 20 or 1) + 1, 'date,course') for i in range(rows // 20)))
+    c.executemany("INSERT INTO live_events (payload, created_at) VALUES (?, ?)",
+                  (('{}', now + i) for i in range(rows // 10)))
+    c.execute("ANALYZE")
+    conn.commit()
+    return conn
+
+def _render_fstring(node, values):
+    parts = []
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(value.value)
+        elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name):
+            parts.append(values[value.value.id])
+        else:
+            raise KeyError(ast.dump(value))
+    return "".join(parts)
+
+def _module_strings(source_path):
+    """Module-level string constants (query text and column lists built at import time)"""
+    module = importlib.import_module(os.path.splitext(source_path)[0])
+    return {name: value for name, value in vars(module).items()
+            if name.isupper() and isinstance(value, str)}
+
+def extract_queries(source_path):
+    """Yield (line number, sql) for every query literal passed to .execute() in a file"""
+
+    with open(os.path.join(SOURCE_DIR, source_path)) as f:
+        tree = ast.parse(f.read())
+    constants = None
+
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'execute' and node.args):
+            continue
+
+        arg = node.args[0]
+        # Queries are sometimes built into a variable first: c.execute(query, params)
+        if isinstance(arg, ast.Name):
+            if arg.id.isupper():
+                # A module-level query constant: take its value as imported
+                constants = constants if constants is not None else _module_strings(source_path)
+                if arg.id in constants:
+                    yield node.lineno, constants[arg.id]
+                    continue
+            arg = _find_assignment(tree, arg.id, node.lineno)
+
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            yield node.lineno, arg.value
+        elif isinstance(arg, ast.JoinedStr):
+            names = {v.value.id for v in arg.values
+                     if isinstance(v, ast.FormattedValue) and isinstance(v.value, ast.Name)}
+            if any(name.isupper() for name in names):
+                constants = constants if constants is not None else _module_strings(source_path)
+            fixed = {name: constants[name] for name in names if name.isupper() and name in constants}
+            variable = sorted(names - set(fixed))
+            if not names or not set(variable).issubset(FSTRING_VARIANTS):
+                print(f"ℹ️ Skipping dynamic query at {source_path}:{node.lineno}")
+                continue
+            # Every combination of the filter variants
+            for combo in itertools.product(*(FSTRING_VARIANTS[name] for name in variable)):
+                yield node.lineno, _render_fstring(arg, {**fixed, **dict(zip(variable, combo))})
+
+def _find_assignment(tree, name, before_line):
+    """Latest `name = <expr>` above before_line, used for `query = f'''...'''` patterns"""
+    found = None
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and node.lineno < before_line
+                and any(isinstance(t, ast.Name) and t.id == name for t in node.targets)):
+            if found is None or node.lineno > found.lineno:
+                found = node
+    return found.value if found is not None else None
+
+def _sample_params(sql):
+    """Plausible parameter values, typed by the text in front of each placeholder"""
+    params = []
+    for match in re.finditer(r'\?', sql):
+        before = sql[:match.start()].rstrip().upper()
+        if re.search(r'(LIMIT|ID [=<>]|ID IN \(|ATTEMPTS [<>]=?)$', before):
+            params.append(20)
+        elif re.search(r'_AT [<>]=?$', before):
+            params.append(1_700_000_000.0)
+        elif before.endswith('DATE =') or before.endswith('DATE >='):
+            params.append('2024-06-01')
+        else:
+            params.append('2024 Season')
+    return params
+
+def _is_filtered(sql):
+    """True unless the query reads whole tables (no JOIN, and WHERE only skips NULL rows)"""
+    if re.search(r'\bJOIN\b', sql, re.IGNORECASE):
+        return True
+    for clause in re.findall(r'\bWHERE\b(.*?)(?=\bGROUP\b|\bORDER\b|\bLIMIT\b|$)', sql,
+                             re.IGNORECASE | re.DOTALL):
+        for condition in re.split(r'\bAND\b', clause, flags=re.IGNORECASE):
+            if condition.strip() and not re.fullmatch(r'\s*[\w.]+\s+IS\s+NOT\s+NULL\s*', condition,
+                                                      re.IGNORECASE):
+                return True
+    return False
+
+# A scalar subquery over a whole table, e.g. (SELECT SUM(amount_owed) FROM hole_in_one_pot)
+WHOLE_TABLE_SUBQUERY = re.compile(r'\(\s*SELECT\b(?:[^()]|\([^()]*\))*?\bFROM\s+\w+\s*\)', re.IGNORECASE)
+
+def _table_aliases(sql):
+    """Map every name a large table is referred to by (table name and aliases)"""
+    # Whole-table subqueries read everything by design, like unfiltered queries
+    sql = WHOLE_TABLE_SUBQUERY.sub('NULL', sql)
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        if table in LARGE_TABLES:
+            aliases[table] = table
+            if alias and alias.upper() not in ('WHERE', 'SET', 'GROUP', 'ORDER', 'LEFT', 'JOIN', 'ON', 'LIMIT'):
+                aliases[alias] = table
+    return aliases
+
+def sqlite_seq_scans(conn, sql):
+    aliases = _table_aliases(sql)
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, _sample_params(sql)).fetchall()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        match = re.match(r'SCAN (\w+)$', detail)
+        if match and match.group(1) in aliases:
+            scans.append(aliases[match.group(1)])
+    return scans
+
+def postgres_seq_scans(conn, sql):
+    c = conn.cursor()
+    c.execute("EXPLAIN " + sql, _sample_params(sql))
+    plan = "\n".join(row[0] for row in c.fetchall())
+    conn.rollback()
+    tables = set(_table_aliases(sql).values())
+    return [table for table in re.findall(r'Seq Scan on (\w+)', plan) if table in tables]
+
+def check(conn, explain, source_paths=QUERY_MODULES):
+    failures = 0
+    checked = 0
+    for source_path in source_paths:
+        failures, checked = _check_file(conn, explain, source_path, failures, checked)
+
+    print(f"📊 Checked {checked} queries in {len(source_paths)} modules, {failures} problem(s)")
+    return failures
+
+def _check_file(conn, explain, source_path, failures, checked):
+    for lineno, sql in extract_queries(source_path):
+        statement = sql.strip()
+        if not re.match(r'(SELECT|WITH|UPDATE|DELETE|INSERT\b[^;]*?\b(SELECT|WITH))\b', statement,
+                        re.IGNORECASE | re.DOTALL):
+            continue
+        if not _is_filtered(statement):
+            continue
+
+        checked += 1
+        try:
+            scans = explain(conn, statement)
+        except Exception as e:
+            print(f"❌ {source_path}:{lineno} could not be explained: {e}")
+            failures += 1
+            continue
+
+        if scans:
+            failures += 1
+            first_line = " ".join(statement.split())[:90]
+            print(f"❌ {source_path}:{lineno} sequential scan on {', '.join(sorted(set(scans)))}: {first_line}")
+
+    return failures, checked
+
+def main(argv):
+    rows = 200000
+    if '--rows' in argv:
+        rows = int(argv[argv.index('--rows') + 1])
+
+    if os.environ.get('DATABASE_URL'):
+        from db_helper import get_db
+        conn = get_db()
+        try:
+            failures = check(conn, postgres_seq_scans)
+        finally:
+            conn.close()
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"🔧 Building synthetic database with {rows} score rows...")
+            conn = build_synthetic_sqlite(os.path.join(tmp, 'plans.db'), rows)
+            try:
+                failures = check(conn, sqlite_seq_scans)
+            finally:
+                conn.close()
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -5,6 +5,8 @@ Check recent scores in the database
 
 import sqlite3
 from datetime import datetime, timedelta
+from aggregates import rebuild_aggregates
+from data_versions import bump_version
 
 def check_recent_scores():
     """Show recent scores from the last few days"""
@@ -78,7 +80,7 @@ def delete_by_date(date_str):
     
     try:
         # Show what we're about to delete
-        c.execute("SELECT id, player_name, course, nine, total FROM scores WHERE date = ?", (date_str,))
+        c.execute("SELECT id, player_name, course, nine, total, season FROM scores WHERE date = ?", (date_str,))
         scores_to_delete = c.fetchall()
         
         if not scores_to_delete:
@@ -86,7 +88,7 @@ def delete_by_date(date_str):
             return
         
         print(f"📋 Found {len(scores_to_delete)} scores to delete from {date_str}:")
-        for score_id, player, course, nine, total in scores_to_delete:
+        for score_id, player, course, nine, total, season in scores_to_delete:
             print(f"   ID {score_id}: {player} - {total} pts ({course}, {nine})")
         
         confirm = input(f"\nDelete ALL {len(scores_to_delete)} scores from {date_str}? (yes/no): ")
@@ -94,6 +96,11 @@ def delete_by_date(date_str):
         if confirm.lower() == 'yes':
             c.execute("DELETE FROM scores WHERE date = ?", (date_str,))
             deleted_count = c.rowcount
+            
+            # Keep the leaderboard and stats cube consistent with the deletion
+            rebuild_aggregates(c, {row[5] for row in scores_to_delete if row[5]})
+            bump_version(c, 'scores')
+            
             conn.commit()
             print(f"✅ Successfully deleted {deleted_count} scores from {date_str}")
         else:
@@ -114,14 +121,14 @@ def delete_by_id(score_id):
     
     try:
         # Show what we're about to delete
-        c.execute("SELECT date, player_name, course, nine, total FROM scores WHERE id = ?", (score_id,))
+        c.execute("SELECT date, player_name, course, nine, total, season FROM scores WHERE id = ?", (score_id,))
         score_data = c.fetchone()
         
         if not score_data:
             print(f"❌ No score found with ID {score_id}")
             return
         
-        date, player, course, nine, total = score_data
+        date, player, course, nine, total, season = score_data
         print(f"📋 Score to delete:")
         print(f"   ID {score_id}: {player} - {total} pts ({course}, {nine}) on {date}")
         
@@ -129,6 +136,9 @@ def delete_by_id(score_id):
         
         if confirm.lower() == 'yes':
             c.execute("DELETE FROM scores WHERE id = ?", (score_id,))
+            # Keep the leaderboard and stats cube consistent with the deletion
+            rebuild_aggregates(c, {season} if season else None)
+            bump_version(c, 'scores')
             conn.commit()
             print(f"✅ Successfully deleted score ID {score_id}")
         else:
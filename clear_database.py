@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from data_versions import bump_version
 
 def clear_database():
     """Clear all records from the golf_scores database"""
@@ -23,6 +24,9 @@ def clear_database():
         else:
             # Delete all records from the scores table
             c.execute("DELETE FROM scores")
+            c.execute("DELETE FROM season_standings")
+            c.execute("DELETE FROM stats_cube")
+            bump_version(c, 'scores')
             
             # Commit the changes
             conn.commit()
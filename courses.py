@@ -0,0 +1,126 @@
+"""
+Process-level cache of static/course_list.json.
+
+The course list is parsed once per worker and reloaded only when the file's
+mtime changes (e.g. after scrape_courses.py runs). Alongside the parsed list
+the catalog carries an in-memory prefix/trigram index that backs the
+/api/courses typeahead, so pages no longer embed every course name.
+
+Matching ignores case, spaces and punctuation, so "ames golf and" finds
+"Ames Golfand Country Club" and "401 par" finds "401Par Golf,Par3Course.".
+"""
+import bisect
+import json
+import os
+import re
+import threading
+
+from app_logging import get_logger
+
+log = get_logger('courses')
+
+COURSE_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'course_list.json')
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def normalize_words(text):
+    """Lowercase words with punctuation stripped: "Golf,Par3" -> ["golf", "par3"]"""
+    return _NON_ALNUM.sub(' ', text.lower()).split()
+
+def _trigrams(compact):
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+class CourseCatalog:
+    """Parsed course list plus a prefix/trigram search index"""
+    def __init__(self, courses, mtime):
+        self.courses = tuple(courses)
+        self.mtime = mtime
+
+        # compact form: normalized words joined without spaces ("amesgolfandcountryclub")
+        self._compact = []
+        self._course_words = []
+        self._trigram_index = {}  # trigram -> set of course positions
+        word_prefixes = []        # sorted (word, position) pairs for short-prefix lookups
+
+        for position, course in enumerate(self.courses):
+            words = normalize_words(course)
+            compact = "".join(words)
+            self._compact.append(compact)
+            self._course_words.append(words)
+            for word in words:
+                word_prefixes.append((word, position))
+            for gram in _trigrams(compact):
+                self._trigram_index.setdefault(gram, set()).add(position)
+
+        word_prefixes.sort()
+        self._words = [word for word, _ in word_prefixes]
+        self._word_positions = [position for _, position in word_prefixes]
+
+    def _prefix_candidates(self, prefix):
+        """Courses with a word (or the whole name) starting with a short prefix"""
+        candidates = set()
+        start = bisect.bisect_left(self._words, prefix)
+        for i in range(start, len(self._words)):
+            if not self._words[i].startswith(prefix):
+                break
+            candidates.add(self._word_positions[i])
+        return candidates
+
+    def search(self, query, limit=20):
+        """Top `limit` course names matching query, best matches first"""
+        words = normalize_words(query or "")
+        needle = "".join(words)
+        if not needle:
+            return list(self.courses[:limit])
+
+        if len(needle) < 3:
+            candidates = self._prefix_candidates(needle)
+        else:
+            postings = [self._trigram_index.get(gram) for gram in _trigrams(needle)]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+        ranked = []
+        for position in candidates:
+            compact = self._compact[position]
+            offset = compact.find(needle)
+            if offset < 0:
+                continue  # Trigrams matched out of order
+            course = self.courses[position]
+            word_start = any(w.startswith(words[0]) for w in self._course_words[position])
+            ranked.append((offset != 0, not word_start, offset, len(course), course))
+
+        ranked.sort()
+        return [entry[-1] for entry in ranked[:limit]]
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_course_catalog(path=COURSE_LIST_PATH):
+    """Return the cached catalog, reloading it if the file changed on disk"""
+    global _catalog
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    catalog = _catalog
+    if catalog is not None and catalog.mtime == mtime:
+        return catalog
+
+    with _catalog_lock:
+        if _catalog is not None and _catalog.mtime == mtime:
+            return _catalog
+
+        if mtime is None:
+            log.warning("⚠️ Course list not found: %s", path)
+            courses = []
+        else:
+            with open(path) as f:
+                courses = json.load(f)
+
+        _catalog = CourseCatalog(courses, mtime)
+        return _catalog
@@ -0,0 +1,137 @@
+"""
+Data provider for the /home dashboard.
+
+Everything the dashboard shows (leaderboard top 5, upcoming events, recent
+matches, hole-in-one pot, round and player counts) is fetched with a single
+combined SQL statement, so rendering /home costs one round trip to the database.
+Each section's rows are tagged with a section number and position and cast to
+text so the UNION ALL branches line up on both SQLite and Postgres.
+"""
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+LEADERBOARD_SIZE = 5
+UPCOMING_EVENTS_SIZE = 3
+
+SECTION_LEADERBOARD = 0
+SECTION_EVENTS = 1
+SECTION_MATCHES = 2
+SECTION_TOTALS = 3
+
+DASHBOARD_QUERY = f"""
+    WITH recent AS (
+        SELECT date, course, nine
+        FROM scores
+        WHERE date IS NOT NULL AND course IS NOT NULL AND nine IS NOT NULL
+        GROUP BY date, course, nine
+        HAVING COUNT(*) >= 2
+        ORDER BY date DESC, course, nine DESC
+        LIMIT ?
+    )
+    SELECT {SECTION_LEADERBOARD} AS section, position,
+           player_name, CAST(rounds AS TEXT), CAST(avg_score AS TEXT),
+           NULL, NULL, NULL
+    FROM (
+        SELECT player_name, rounds, avg_score,
+               ROW_NUMBER() OVER (ORDER BY avg_score DESC) AS position
+        FROM season_standings
+        WHERE season = ? AND rounds >= 1
+        ORDER BY avg_score DESC
+        LIMIT {LEADERBOARD_SIZE}
+    ) leaderboard
+
+    UNION ALL
+
+    SELECT {SECTION_EVENTS}, position,
+           event_date, event_time, course, description,
+           CAST(participant_count AS TEXT), player_names
+    FROM (
+        SELECT e.event_date, e.event_time, e.course, e.description,
+               COUNT(ep.player_id) AS participant_count,
+               COALESCE(GROUP_CONCAT(p.name, ', '), '') AS player_names,
+               ROW_NUMBER() OVER (ORDER BY e.event_date, e.event_time) AS position
+        FROM events e
+        LEFT JOIN event_participants ep ON e.id = ep.event_id
+        LEFT JOIN players p ON ep.player_id = p.id
+        WHERE e.event_date >= CURRENT_DATE
+        GROUP BY e.id
+        ORDER BY e.event_date, e.event_time
+        LIMIT {UPCOMING_EVENTS_SIZE}
+    ) upcoming
+
+    UNION ALL
+
+    SELECT {SECTION_MATCHES},
+           ROW_NUMBER() OVER (ORDER BY s.date DESC, s.course, s.nine DESC, s.total DESC),
+           s.date, s.course, s.nine, s.player_name, CAST(s.total AS TEXT), s.winner
+    FROM recent r
+    JOIN scores s ON s.date = r.date AND s.course = r.course AND s.nine = r.nine
+
+    UNION ALL
+
+    SELECT {SECTION_TOTALS}, 1,
+           CAST((SELECT SUM(amount_owed) FROM hole_in_one_pot) AS TEXT),
+           CAST((SELECT COUNT(*) FROM scores) AS TEXT),
+           CAST((SELECT COUNT(DISTINCT player_name) FROM scores) AS TEXT),
+           NULL, NULL, NULL
+
+    ORDER BY section, position
+"""
+
+@dataclass
+class DashboardSnapshot:
+    """Everything /home renders, fetched in one round trip"""
+    leaderboard: List[Tuple[str, int, float]] = field(default_factory=list)
+    upcoming_events: List[Tuple[str, str, str, str, int, str]] = field(default_factory=list)
+    recent_matches: List[dict] = field(default_factory=list)
+    hole_in_one_pot: float = 0.0
+    total_rounds_played: int = 0
+    unique_players: int = 0
+
+def group_match_rows(rows):
+    """
+    Group (date, course, nine, player_name, total, winner) rows, ordered by match,
+    into [{'date', 'course', 'nine', 'players': [(player_name, total, winner), ...]}]
+    """
+    matches = []
+    current_key = None
+    for date, course, nine, player_name, total, winner in rows:
+        if (date, course, nine) != current_key:
+            current_key = (date, course, nine)
+            matches.append({
+                'date': date,
+                'course': course,
+                'nine': nine,
+                'players': []
+            })
+        matches[-1]['players'].append((player_name, total, winner))
+    return matches
+
+def _int(value):
+    return int(float(value)) if value is not None else 0
+
+def _float(value):
+    return float(value) if value is not None else 0.0
+
+def fetch_dashboard(cursor, season, match_limit=2):
+    """Run the combined dashboard query and unpack it into a DashboardSnapshot"""
+
+    cursor.execute(DASHBOARD_QUERY, (match_limit, season))
+
+    snapshot = DashboardSnapshot()
+    match_rows = []
+
+    for section, _, c1, c2, c3, c4, c5, c6 in cursor.fetchall():
+        if section == SECTION_LEADERBOARD:
+            snapshot.leaderboard.append((c1, _int(c2), _float(c3)))
+        elif section == SECTION_EVENTS:
+            snapshot.upcoming_events.append((c1, c2, c3, c4, _int(c5), c6))
+        elif section == SECTION_MATCHES:
+            match_rows.append((c1, c2, c3, c4, _int(c5), c6))
+        elif section == SECTION_TOTALS:
+            snapshot.hole_in_one_pot = _float(c1)
+            snapshot.total_rounds_played = _int(c2)
+            snapshot.unique_players = _int(c3)
+
+    snapshot.recent_matches = group_match_rows(match_rows)
+    return snapshot
@@ -0,0 +1,69 @@
+"""
+Per-table data versions for HTTP conditional GET.
+
+Every write to a table that pages read (scores, awards, players, the
+hole-in-one tables, events) calls bump_version() in the same transaction,
+which increments that table's row in data_versions and stamps the time.
+A page's ETag is derived from the versions of the tables it reads, and its
+Last-Modified from the newest stamp, so an unchanged page can answer
+304 Not Modified after a single indexed lookup instead of re-querying and
+re-rendering.
+"""
+import hashlib
+import time
+
+def create_data_version_tables(cursor, using_postgres=False):
+    """Create the data_versions table if it doesn't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            id SERIAL PRIMARY KEY,
+            table_name TEXT UNIQUE NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at DOUBLE PRECISION NOT NULL
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT UNIQUE NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        )
+        ''')
+
+def bump_version(cursor, *tables):
+    """Record that these tables changed (visible once the caller's transaction commits)"""
+    now = time.time()
+    for table in tables:
+        cursor.execute('''
+            INSERT INTO data_versions (table_name, version, updated_at)
+            VALUES (?, 1, ?)
+            ON CONFLICT (table_name) DO UPDATE SET
+                version = data_versions.version + 1,
+                updated_at = excluded.updated_at
+        ''', (table, now))
+
+def get_versions(cursor, tables):
+    """{table: (version, updated_at)}; tables never written since tracking began are (0, None)"""
+    tables = list(tables)
+    placeholders = ", ".join("?" for _ in tables)
+    cursor.execute(f"SELECT table_name, version, updated_at FROM data_versions WHERE table_name IN ({placeholders})",
+                   tables)
+    versions = {table: (0, None) for table in tables}
+    for table, version, updated_at in cursor.fetchall():
+        versions[table] = (version, updated_at)
+    return versions
+
+def versions_etag(versions, *extra):
+    """Opaque tag for a set of table versions plus anything else the page depends on"""
+    key = "|".join(f"{table}:{versions[table][0]}" for table in sorted(versions))
+    key += "|" + "|".join(str(value) for value in extra)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+def versions_last_modified(versions):
+    """Newest write time across the tables, or None if none has been written yet"""
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    return max(stamps) if stamps else None
@@ -3,7 +3,97 @@ Database helper module to handle both SQLite (local) and Postgres (production)
 Provides a unified interface that works with both databases
 """
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from request_timing import record_fetch, record_query
+
+# Connection pool settings (per gunicorn worker process)
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '5'))
+POOL_BORROW_TIMEOUT = float(os.environ.get('DB_POOL_BORROW_TIMEOUT', '10'))
+POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))
+POOL_HEALTH_CHECK_AFTER = float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+
+# Rows per round trip for PostgresCursor.executemany
+EXECUTE_BATCH_PAGE_SIZE = int(os.environ.get('DB_EXECUTE_BATCH_PAGE_SIZE', '500'))
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became available within the borrow timeout"""
+
+# Bounded LRU cache of SQLite -> Postgres query translations
+TRANSLATION_CACHE_SIZE = int(os.environ.get('DB_TRANSLATION_CACHE_SIZE', '256'))
+
+_translation_cache = OrderedDict()
+_translation_lock = threading.Lock()
+_translation_hits = 0
+_translation_misses = 0
+
+_INSERT_RE = re.compile(r'^\s*INSERT\s+INTO', re.IGNORECASE | re.MULTILINE)
+
+def translate_query(query, has_params):
+    """
+    Convert SQLite syntax to Postgres syntax.
+    Returns (postgres_query, is_insert, fetch_returning)
+    """
+    # Convert SQLite ? placeholders to Postgres %s placeholders
+    if has_params:
+        query = query.replace('?', '%s')
+
+    # Convert SQLite-specific functions to Postgres equivalents
+    # GROUP_CONCAT -> STRING_AGG (syntax is compatible)
+    query = query.replace('GROUP_CONCAT', 'STRING_AGG')
+
+    # date('now') -> CURRENT_DATE
+    query = query.replace("date('now')", 'CURRENT_DATE')
+
+    # Handle INSERT queries to get last inserted ID for Postgres
+    # Only add RETURNING for simple, single-line INSERT statements
+    is_insert = bool(_INSERT_RE.match(query.strip()))
+    if is_insert and 'RETURNING' not in query.upper():
+        # Only add RETURNING for simple single-line INSERTs (no SELECT, VALUES only)
+        if 'VALUES' in query.upper() and 'SELECT' not in query.upper():
+            # Check if it's a simple VALUES insert (single line or simple multi-line)
+            lines = query.strip().split('\n')
+            if len(lines) <= 3:  # Simple INSERT with VALUES on one or two lines
+                # Add RETURNING id at the end, before semicolon if present
+                query = query.rstrip(';').rstrip() + ' RETURNING id'
+
+    fetch_returning = is_insert and 'RETURNING' in query.upper()
+    return query, is_insert, fetch_returning
+
+def cached_translate_query(query, has_params):
+    """translate_query() behind a bounded LRU keyed by the raw SQLite query text"""
+    global _translation_hits, _translation_misses
+    key = (query, has_params)
+
+    with _translation_lock:
+        cached = _translation_cache.get(key)
+        if cached is not None:
+            _translation_cache.move_to_end(key)
+            _translation_hits += 1
+            return cached
+        _translation_misses += 1
+
+    translated = translate_query(query, has_params)
+
+    with _translation_lock:
+        _translation_cache[key] = translated
+        if len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+            _translation_cache.popitem(last=False)
+    return translated
+
+def translation_cache_stats():
+    """Hit/miss counters for the query translation cache"""
+    with _translation_lock:
+        return {
+            'hits': _translation_hits,
+            'misses': _translation_misses,
+            'size': len(_translation_cache),
+            'max_size': TRANSLATION_CACHE_SIZE,
+        }
 
 class PostgresCursor:
     """Wrapper for Postgres cursor to make it SQLite-compatible"""
@@ -13,39 +103,18 @@ class PostgresCursor:
     
     def execute(self, query, params=None):
         """Execute query, converting SQLite syntax to Postgres syntax"""
-        import re
-        
-        # Store original query for checking if it's an INSERT
-        original_query = query
-        
-        # Convert SQLite ? placeholders to Postgres %s placeholders
-        if params is not None:
-            query = query.replace('?', '%s')
-        
-        # Convert SQLite-specific functions to Postgres equivalents
-        # GROUP_CONCAT -> STRING_AGG (syntax is compatible)
-        query = query.replace('GROUP_CONCAT', 'STRING_AGG')
+        original = query
+        query, is_insert, fetch_returning = cached_translate_query(query, params is not None)
         
-        # date('now') -> CURRENT_DATE
-        query = query.replace("date('now')", 'CURRENT_DATE')
-        query = query.replace("date(\'now\')", 'CURRENT_DATE')
-        
-        # Handle INSERT queries to get last inserted ID for Postgres
-        # Only add RETURNING for simple, single-line INSERT statements
-        is_insert = re.match(r'^\s*INSERT\s+INTO', query.strip(), re.IGNORECASE | re.MULTILINE)
-        if is_insert and 'RETURNING' not in query.upper():
-            # Only add RETURNING for simple single-line INSERTs (no SELECT, VALUES only)
-            if 'VALUES' in query.upper() and 'SELECT' not in query.upper():
-                # Check if it's a simple VALUES insert (single line or simple multi-line)
-                lines = query.strip().split('\n')
-                if len(lines) <= 3:  # Simple INSERT with VALUES on one or two lines
-                    # Add RETURNING id at the end, before semicolon if present
-                    query = query.rstrip(';').rstrip() + ' RETURNING id'
-        
-        result = self._cursor.execute(query, params)
+        started = time.perf_counter()
+        try:
+            result = self._cursor.execute(query, params)
+        finally:
+            # psycopg2 buffers the whole result, so this covers fetching too
+            record_query(original, time.perf_counter() - started, self._cursor.rowcount)
         
         # If INSERT with RETURNING, fetch the ID
-        if 'RETURNING' in query.upper() and is_insert:
+        if fetch_returning:
             try:
                 row = self._cursor.fetchone()
                 if row:
@@ -55,6 +124,20 @@ class PostgresCursor:
                 pass
         
         return result
+
+    def executemany(self, query, seq_of_params):
+        """Batched executemany (psycopg2's own sends one statement per row)"""
+        from psycopg2.extras import execute_batch
+
+        original = query
+        query, _, fetch_returning = cached_translate_query(query, True)
+        if fetch_returning and query.endswith(' RETURNING id'):
+            query = query[:-len(' RETURNING id')]  # Added by translate_query; no ids wanted here
+        started = time.perf_counter()
+        try:
+            execute_batch(self._cursor, query, seq_of_params, page_size=EXECUTE_BATCH_PAGE_SIZE)
+        finally:
+            record_query(original, time.perf_counter() - started, self._cursor.rowcount)
     
     @property
     def lastrowid(self):
@@ -83,10 +166,53 @@ class PostgresCursor:
         # Forward all other attributes to the real cursor
         return getattr(self._cursor, name)
 
+class TimedSQLiteCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports statement timings (rows are produced while fetching)"""
+    _record = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record = record_query(sql, time.perf_counter() - started, self.rowcount,
+                                        fetch_pending=self.description is not None)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record = record_query(sql, time.perf_counter() - started, self.rowcount)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        record_fetch(self._record, time.perf_counter() - started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        record_fetch(self._record, time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        record_fetch(self._record, time.perf_counter() - started, len(rows))
+        return rows
+
+class TimedSQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors are TimedSQLiteCursor"""
+    def cursor(self, factory=TimedSQLiteCursor):
+        return super().cursor(factory)
+
 class PostgresConnection:
     """Wrapper for Postgres connection to make it SQLite-compatible"""
-    def __init__(self, conn):
+    def __init__(self, conn, pool=None):
         self._conn = conn
+        self._pool = pool
         self._last_inserted_id = None
     
     def cursor(self):
@@ -102,7 +228,14 @@ class PostgresConnection:
         return self._conn.rollback()
     
     def close(self):
-        return self._conn.close()
+        """Return the connection to its pool (or really close it if unpooled)"""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return  # Already closed/returned
+        if self._pool is not None:
+            self._pool.release(conn)
+        else:
+            conn.close()
     
     def __enter__(self):
         return self
@@ -114,10 +247,171 @@ class PostgresConnection:
             self.commit()
         self.close()
 
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of psycopg2 connections.
+    One pool exists per process so gunicorn workers never share sockets.
+    """
+    def __init__(self, dsn, max_size=POOL_MAX_SIZE, borrow_timeout=POOL_BORROW_TIMEOUT,
+                 max_idle=POOL_MAX_IDLE, health_check_after=POOL_HEALTH_CHECK_AFTER):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.borrow_timeout = borrow_timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._lock = threading.Condition()
+        self._idle = []  # [(connection, returned_at), ...] - most recently returned last
+        self._in_use = 0
+
+        # Gauges
+        self._borrows = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._discarded = 0
+
+    def _connect(self):
+        import psycopg2
+        return psycopg2.connect(self.dsn)
+
+    def _discard(self, conn):
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_for):
+        """Check a pooled connection before handing it out again"""
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self, now):
+        """Close connections that have sat idle longer than max_idle (lock held)"""
+        keep = []
+        for conn, returned_at in self._idle:
+            if now - returned_at > self.max_idle:
+                self._discard(conn)
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+
+    def acquire(self):
+        """Borrow a connection, waiting up to borrow_timeout for one to free up"""
+        started = time.monotonic()
+        deadline = started + self.borrow_timeout
+        waited = False
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._evict_idle(time.time())
+
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    idle_for = time.time() - returned_at
+                elif self._in_use < self.max_size:
+                    conn = None
+                    self._in_use += 1
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection available after {self.borrow_timeout:.1f}s")
+                    waited = True
+                    self._lock.wait(remaining)
+                    continue
+
+                self._borrows += 1
+                if waited:
+                    wait_time = now - started
+                    self._waits += 1
+                    self._wait_time_total += wait_time
+                    self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            # Connect / health check outside the lock
+            try:
+                if conn is None:
+                    return self._connect()
+                if self._is_healthy(conn, idle_for):
+                    return conn
+                self._discard(conn)
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._in_use -= 1
+                    self._lock.notify()
+                raise
+
+    def release(self, conn):
+        """Return a borrowed connection, resetting any open transaction"""
+        healthy = not conn.closed
+        if healthy:
+            try:
+                conn.rollback()
+            except Exception:
+                healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, time.time()))
+            else:
+                self._discard(conn)
+            self._lock.notify()
+
+    def stats(self):
+        """Gauges for monitoring: in-use, idle and wait time"""
+        with self._lock:
+            return {
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'borrows': self._borrows,
+                'waits': self._waits,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_max': self._wait_time_max,
+                'discarded': self._discarded,
+            }
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool(database_url):
+    """Return this process's connection pool, creating it after a fork"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(database_url)
+                _pool_pid = pid
+    return _pool
+
+def pool_stats():
+    """Gauges for the current process's pool (None when running on SQLite)"""
+    if _pool is None or _pool_pid != os.getpid():
+        return None
+    return _pool.stats()
+
 def get_db():
     """
     Get database connection - uses Postgres on Heroku, SQLite locally
     Returns a connection object compatible with both SQLite and Postgres
+    Postgres connections are borrowed from a per-worker pool; close() returns them
     """
     database_url = os.environ.get('DATABASE_URL')
     
@@ -128,9 +422,8 @@ def get_db():
             database_url = database_url.replace('postgres://', 'postgresql://', 1)
         
         try:
-            import psycopg2
-            pg_conn = psycopg2.connect(database_url)
-            return PostgresConnection(pg_conn)
+            pool = get_pool(database_url)
+            return PostgresConnection(pool.acquire(), pool)
         except ImportError:
             print("⚠️ Warning: psycopg2 not installed. Install with: pip install psycopg2-binary")
             raise
@@ -139,5 +432,5 @@ def get_db():
             raise
     else:
         # Development: Use SQLite
-        return sqlite3.connect('golf_scores.db')
+        return sqlite3.connect('golf_scores.db', factory=TimedSQLiteConnection)
 
@@ -5,6 +5,8 @@ Delete all scores from today's date
 
 import sqlite3
 from datetime import datetime
+from aggregates import rebuild_aggregates
+from data_versions import bump_version
 
 def delete_todays_scores():
     """Delete all scores from today's date"""
@@ -18,7 +20,7 @@ def delete_todays_scores():
     
     try:
         # First, show what we're about to delete
-        c.execute("SELECT player_name, course, nine, total FROM scores WHERE date = ?", (today,))
+        c.execute("SELECT player_name, course, nine, total, season FROM scores WHERE date = ?", (today,))
         scores_to_delete = c.fetchall()
         
         if not scores_to_delete:
@@ -26,13 +28,17 @@ def delete_todays_scores():
             return
         
         print(f"📋 Found {len(scores_to_delete)} scores to delete:")
-        for player, course, nine, total in scores_to_delete:
+        for player, course, nine, total, season in scores_to_delete:
             print(f"   - {player}: {total} points ({course}, {nine})")
         
         # Delete the scores
         c.execute("DELETE FROM scores WHERE date = ?", (today,))
         deleted_count = c.rowcount
         
+        # Keep the leaderboard and stats cube consistent with the deletion
+        rebuild_aggregates(c, {row[4] for row in scores_to_delete if row[4]})
+        bump_version(c, 'scores')
+        
         conn.commit()
         print(f"✅ Successfully deleted {deleted_count} scores from {today}")
         
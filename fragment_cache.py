@@ -0,0 +1,74 @@
+"""
+In-process cache of rendered HTML fragments (the big tables on /leaderboard,
+/awards and /roster).
+
+An entry is keyed by (fragment name, filter args) and remembers the
+data_versions of the tables it was rendered from. Writes bump those versions
+(see data_versions.bump_version), so an entry rendered before a write no
+longer matches on the next lookup in any worker and is re-rendered in place.
+Least recently used entries are evicted once the cache holds more than
+FRAGMENT_CACHE_MAX_ENTRIES fragments or FRAGMENT_CACHE_MAX_BYTES of HTML.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', '128'))
+FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+
+class FragmentCache:
+    """Bounded LRU of (name, args) -> (versions, size, html)"""
+    def __init__(self, max_entries=FRAGMENT_CACHE_MAX_ENTRIES, max_bytes=FRAGMENT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, versions, args=()):
+        """Cached HTML rendered at exactly these versions, or None"""
+        key = (name, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, name, versions, args, html):
+        html = Markup(html)
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return html
+
+        key = (name, args)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (versions, size, html)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def render(self, name, versions, args, render):
+        """Cached fragment, or render() it (returning HTML) and cache the result"""
+        html = self.get(name, versions, args)
+        if html is None:
+            html = self.put(name, versions, args, render())
+        return html
+
+fragment_cache = FragmentCache()
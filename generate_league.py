@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Build a synthetic league database for load testing.
+
+Generates players (who join, improve and drift away over the years), seasons
+following get_season_label, 4-player rounds with hole_1..hole_9 points and
+a winner, season awards computed from those rounds, weekly events with
+invited participants, hole-in-one pot balances and history. Then rebuilds
+season_standings and stats_cube.
+
+Rounds are counted the way /stats counts them: one score row per player.
+Rows are generated with numpy a season at a time and written in bulk - COPY
+on Postgres, executemany on SQLite - with the scores indexes dropped during
+the load and rebuilt afterwards.
+
+Usage:
+    python generate_league.py                        # 100,000 rounds -> synthetic_league.db
+    python generate_league.py --rounds 1000000 --seasons 12 --players 800
+    python generate_league.py --db golf_scores.db --force   # replace the local database
+    DATABASE_URL=... python generate_league.py --rounds 1000000 --force   # Postgres
+
+--force is needed to overwrite an existing SQLite file or to clear a Postgres
+database that already has scores. --seed makes the output reproducible.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from aggregates import rebuild_aggregates
+from courses import COURSE_LIST_PATH
+from data_versions import bump_version
+from db_helper import TimedSQLiteConnection, get_db
+from importers import SCORE_COLUMNS, get_season_label, score_content_hash
+from migrations import apply_migrations
+
+GROUP_SIZE = 4
+HOLES = 9
+# Score rows generated and written per batch
+GENERATE_BATCH_ROUNDS = 200000
+
+FIRST_NAMES = ('Andrew', 'Ben', 'Brett', 'Chris', 'Curtis', 'Dan', 'Dave', 'Eric', 'Greg', 'Jake',
+               'Jason', 'Jeff', 'Joe', 'John', 'Josh', 'Kevin', 'Kyle', 'Luke', 'Mark', 'Matt',
+               'Mike', 'Nate', 'Nick', 'Pat', 'Paul', 'Pete', 'Rob', 'Ryan', 'Sam', 'Scott',
+               'Sean', 'Steve', 'Tim', 'Todd', 'Tom', 'Tony', 'Travis', 'Tyler', 'Will', 'Zach')
+LAST_NAMES = ('Anderson', 'Baker', 'Brooks', 'Carter', 'Collins', 'Cook', 'Davis', 'Evans', 'Fisher',
+              'Foster', 'Gray', 'Hanna', 'Harris', 'Howell', 'Hughes', 'Jensen', 'Kelly', 'Lembach',
+              'Miller', 'Morgan', 'Murphy', 'Nelson', 'Olson', 'Parker', 'Plato', 'Price', 'Reed',
+              'Salata', 'Schultz', 'Shaw', 'Stewart', 'Sullivan', 'Turner', 'Vogel', 'Walker',
+              'Ward', 'Watson', 'Weber', 'Wright', 'Young')
+
+# Relative number of rounds played by month (Jan..Dec) and by weekday (Mon..Sun)
+MONTH_WEIGHTS = (0.2, 0.2, 0.5, 1.0, 1.6, 2.0, 2.2, 2.1, 1.7, 1.1, 0.5, 0.2)
+WEEKDAY_WEIGHTS = (0.6, 0.8, 1.0, 1.4, 0.9, 1.8, 1.6)
+
+LEAGUE_TABLES = ('scores', 'awards', 'players', 'events', 'event_participants',
+                 'hole_in_one_pot', 'hole_in_one_history')
+
+def _base_schema(using_postgres):
+    """League tables as the setup_*.py scripts create them (migrations add the rest)"""
+    pk = "id SERIAL PRIMARY KEY" if using_postgres else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    return [
+        f'''CREATE TABLE IF NOT EXISTS scores (
+            {pk},
+            date TEXT, course TEXT, nine TEXT, player_name TEXT, mulligan TEXT,
+            hole_1 INTEGER, hole_2 INTEGER, hole_3 INTEGER, hole_4 INTEGER, hole_5 INTEGER,
+            hole_6 INTEGER, hole_7 INTEGER, hole_8 INTEGER, hole_9 INTEGER,
+            total INTEGER, winner TEXT, season TEXT
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS awards (
+            {pk},
+            season TEXT NOT NULL, award_category TEXT NOT NULL, player_name TEXT NOT NULL,
+            description TEXT, award_date TEXT,
+            created_date TEXT DEFAULT CURRENT_TIMESTAMP, created_by TEXT DEFAULT 'Admin'
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS players (
+            {pk},
+            name TEXT UNIQUE NOT NULL, email TEXT, phone TEXT,
+            active BOOLEAN DEFAULT TRUE, created_date TEXT DEFAULT CURRENT_TIMESTAMP
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS events (
+            {pk},
+            event_date TEXT NOT NULL, event_time TEXT, course TEXT, description TEXT,
+            max_players INTEGER DEFAULT 4, created_by TEXT,
+            created_date TEXT DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'scheduled'
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS event_participants (
+            {pk},
+            event_id INTEGER, player_id INTEGER, status TEXT DEFAULT 'invited',
+            invited_date TEXT DEFAULT CURRENT_TIMESTAMP, response_date TEXT,
+            UNIQUE(event_id, player_id)
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS hole_in_one_pot (
+            {pk},
+            player_name TEXT NOT NULL, amount_owed REAL DEFAULT 0.0,
+            total_contributed REAL DEFAULT 0.0, paid BOOLEAN DEFAULT FALSE,
+            original_balance REAL DEFAULT 0.0, last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS hole_in_one_history (
+            {pk},
+            player_name TEXT NOT NULL, course TEXT NOT NULL, hole_number INTEGER NOT NULL,
+            event_date TEXT NOT NULL, pot_amount REAL NOT NULL, description TEXT,
+            recorded_date TEXT DEFAULT CURRENT_TIMESTAMP, recorded_by TEXT DEFAULT 'Admin'
+        )''',
+    ]
+
+def bulk_insert(cursor, table, columns, rows):
+    """COPY on Postgres (the cursor wrapper forwards copy_expert), executemany on SQLite"""
+    column_list = ', '.join(columns)
+    if hasattr(cursor, 'copy_expert'):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buf)
+    else:
+        cursor.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in columns)})",
+                           rows)
+
+def _table_indexes(cursor, using_postgres, table):
+    """(name, CREATE INDEX statement) for a table's indexes, primary key and constraints excluded"""
+    if using_postgres:
+        cursor.execute('''
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = ? AND indexname NOT IN (SELECT conname FROM pg_constraint)
+        ''', (table,))
+    else:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                       (table,))
+    return cursor.fetchall()
+
+class League:
+    """The generated players and calendar, shared by every table's generator"""
+    def __init__(self, rng, players, seasons, courses, today):
+        self.rng = rng
+        self.today = today
+
+        # Seasons run Nov 1 - Oct 31 and the last one is the current season
+        last_year = int(get_season_label(today).split()[0])
+        self.first_day = date(last_year - seasons, 11, 1)
+        self.season_labels = [f"{last_year - seasons + 1 + i} Season" for i in range(seasons)]
+
+        names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+        if players > len(names):
+            names += [f"Player {i}" for i in range(players - len(names))]
+        picked = rng.choice(len(names), size=players, replace=False)
+        self.players = [names[i] for i in picked]
+
+        # Careers: most of the league is there from the start, the rest join later;
+        # some stop playing. Every season keeps at least a full group.
+        self.joined = np.where(rng.random(players) < 0.5, 0, rng.integers(0, seasons, players))
+        self.left = np.minimum(self.joined + 1 + rng.geometric(0.15, players), seasons + 1)
+        self.active = self.left > seasons - 1
+        # Mean points per hole, the yearly improvement, and how often they play
+        self.skill = np.clip(rng.normal(1.5, 0.3, players), 0.6, 2.6)
+        self.improvement = rng.normal(0.03, 0.04, players)
+        self.appetite = rng.lognormal(0.0, 0.6, players)
+
+        self.courses = courses
+        popularity = 1.0 / np.arange(1, len(courses) + 1)
+        self.course_weights = popularity / popularity.sum()
+
+    def season_days(self, index):
+        """Dates of one season up to today, and the relative chance of a round on each"""
+        start = date(self.first_day.year + index, 11, 1)
+        end = min(date(start.year + 1, 10, 31), self.today)
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        weights = np.array([MONTH_WEIGHTS[d.month - 1] * WEEKDAY_WEIGHTS[d.weekday()] for d in days])
+        return days, weights
+
+    def season_players(self, index):
+        members = np.flatnonzero((self.joined <= index) & (self.left > index))
+        if len(members) < GROUP_SIZE:
+            members = np.argsort(-self.appetite)[:GROUP_SIZE]
+        return members
+
+def _load_courses(count, rng):
+    try:
+        with open(COURSE_LIST_PATH) as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        catalog = []
+    if len(catalog) < count:
+        return [f"Course {i + 1}" for i in range(count)]
+    return [catalog[i] for i in rng.choice(len(catalog), size=count, replace=False)]
+
+def generate_scores(cursor, league, rounds):
+    """Write `rounds` score rows; returns per-season stats and the hole-in-one candidates"""
+
+    rng = league.rng
+    matches_total = max(rounds // GROUP_SIZE, 1)
+
+    # Matches are spread over seasons by the number of playable days in each
+    calendars = [league.season_days(i) for i in range(len(league.season_labels))]
+    season_weight = np.array([weights.sum() for _, weights in calendars])
+    season_matches = np.floor(matches_total * season_weight / season_weight.sum()).astype(int)
+    season_matches[-1] += matches_total - season_matches.sum()
+
+    season_stats = []
+    seen_hashes = set()
+    written = 0
+    batch_matches = max(GENERATE_BATCH_ROUNDS // GROUP_SIZE, 1)
+
+    for index, (label, (days, day_weights)) in enumerate(zip(league.season_labels, calendars)):
+        members = league.season_players(index)
+        player_count = len(league.players)
+        rounds_played = np.zeros(player_count, dtype=np.int64)
+        points = np.zeros(player_count, dtype=np.int64)
+        points_sq = np.zeros(player_count, dtype=np.int64)
+        wins = np.zeros(player_count, dtype=np.int64)
+
+        day_labels = [d.isoformat() for d in days]
+        # Match dates in play order, so ids grow with dates as they do in real use
+        match_days = np.sort(rng.choice(len(days), size=season_matches[index], p=day_weights / day_weights.sum()))
+
+        for start in range(0, len(match_days), batch_matches):
+            chunk_days = match_days[start:start + batch_matches]
+            n = len(chunk_days)
+
+            # Four different members per match, keener players picked more often
+            keys = rng.random((n, len(members))) ** (1.0 / league.appetite[members])
+            group = members[np.argpartition(-keys, GROUP_SIZE - 1, axis=1)[:, :GROUP_SIZE]]
+
+            mean = np.clip(league.skill[group] + league.improvement[group] * (index - league.joined[group]),
+                           0.3, 3.2)
+            holes = rng.binomial(4, (mean / 4.0)[..., None], size=(n, GROUP_SIZE, HOLES))
+            totals = holes.sum(axis=2)
+            best = totals.max(axis=1, keepdims=True)
+            winner = (totals == best) & (best > 0)
+
+            courses = rng.choice(len(league.courses), size=n, p=league.course_weights)
+            nines = rng.random(n) < 0.5
+            mulligans = rng.random((n, GROUP_SIZE)) < 0.15
+
+            np.add.at(rounds_played, group.ravel(), 1)
+            np.add.at(points, group.ravel(), totals.ravel())
+            np.add.at(points_sq, group.ravel(), (totals ** 2).ravel())
+            np.add.at(wins, group.ravel(), winner.ravel())
+
+            rows = []
+            names = league.players
+            for m, (day, course, back, players, cards, scores, won, mull) in enumerate(zip(
+                    chunk_days.tolist(), courses.tolist(), nines.tolist(), group.tolist(),
+                    holes.tolist(), totals.tolist(), winner.tolist(), mulligans.tolist())):
+                day_label = day_labels[day]
+                course_name = league.courses[course]
+                nine = 'Back' if back else 'Front'
+                for player, card, total, is_winner, mulligan in zip(players, cards, scores, won, mull):
+                    name = names[player]
+                    content_hash = score_content_hash(day_label, nine, name, total, course_name)
+                    if content_hash in seen_hashes:
+                        content_hash = None  # Same as a row already written; left unhashed like backfill does
+                    else:
+                        seen_hashes.add(content_hash)
+                    rows.append((day_label, course_name, nine, name, 'Yes' if mulligan else 'No',
+                                 *card, total, 'Yes' if is_winner else 'No', label, content_hash))
+
+            bulk_insert(cursor, 'scores', SCORE_COLUMNS, rows)
+            written += len(rows)
+            print(f"   {written:,} rounds written ({label})", end="\r")
+
+        season_stats.append((label, rounds_played, points, points_sq, wins))
+
+    print()
+    return season_stats
+
+def generate_awards(cursor, league, season_stats):
+    """Season awards decided from the generated rounds (completed seasons only)"""
+
+    rng = league.rng
+    rows = []
+    previous_avg = None
+    for index, (label, rounds_played, points, points_sq, wins) in enumerate(season_stats):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg = np.where(rounds_played > 0, points / np.maximum(rounds_played, 1), np.nan)
+            std = np.sqrt(np.maximum(points_sq / np.maximum(rounds_played, 1) - avg ** 2, 0))
+
+        # Award contenders played at least 5 rounds and more than the bottom quarter of the league
+        played = rounds_played[rounds_played > 0]
+        qualified = rounds_played >= (max(5, np.percentile(played, 25)) if len(played) else 1)
+        last_season = index == len(season_stats) - 1
+        if last_season or not qualified.any():
+            previous_avg = avg
+            continue
+
+        year = label.split()[0]
+        award_date = f"{year}-10-31"
+        names = league.players
+
+        def pick(values):
+            return names[int(np.nanargmax(np.where(qualified, values, np.nan)))]
+
+        rows.append((label, "Season Champion", pick(avg), f"{year} PGG Tour champion", award_date))
+        rows.append((label, "Most Wins", pick(wins.astype(float)), "Most individual round victories", award_date))
+        rows.append((label, "Most Consistent", pick(-std), "Most consistent scoring throughout season", award_date))
+        rookies = qualified & (league.joined == index)
+        if index > 0 and rookies.any():
+            rows.append((label, "Rookie of the Year", names[int(np.nanargmax(np.where(rookies, avg, np.nan)))],
+                         "Outstanding performance in first season", award_date))
+        if previous_avg is not None:
+            improved = qualified & ~np.isnan(previous_avg)
+            if improved.any():
+                rows.append((label, "Most Improved Player",
+                             names[int(np.nanargmax(np.where(improved, avg - previous_avg, np.nan)))],
+                             "Greatest improvement from previous season", award_date))
+        sporting = np.flatnonzero(qualified)
+        rows.append((label, "Sportsmanship Award", names[int(rng.choice(sporting))],
+                     "Exemplary sportsmanship and team spirit", award_date))
+        previous_avg = avg
+
+    bulk_insert(cursor, 'awards', ('season', 'award_category', 'player_name', 'description', 'award_date'), rows)
+    return len(rows)
+
+def generate_players(cursor, league):
+    rows = []
+    for i, name in enumerate(league.players):
+        email = name.lower().replace(' ', '.') + "@example.com"
+        rows.append((name, email, f"555-{1000 + i:04d}", 1 if league.active[i] else 0))
+    bulk_insert(cursor, 'players', ('name', 'email', 'phone', 'active'), rows)
+
+def generate_events(cursor, league, weeks_ahead=6):
+    """A Thursday evening event every week of the league's history and a few weeks ahead"""
+
+    rng = league.rng
+    cursor.execute("SELECT id, name FROM players")
+    player_ids = {name: player_id for player_id, name in cursor.fetchall()}
+
+    first = league.first_day + timedelta(days=(3 - league.first_day.weekday()) % 7)
+    last = league.today + timedelta(weeks=weeks_ahead)
+    event_dates = [first + timedelta(weeks=n) for n in range((last - first).days // 7 + 1)]
+
+    rows = []
+    for event_date in event_dates:
+        course = league.courses[int(rng.choice(len(league.courses), p=league.course_weights))]
+        rows.append((event_date.isoformat(), "18:00", course, "Weekly league night", GROUP_SIZE * 2, "Admin"))
+    bulk_insert(cursor, 'events', ('event_date', 'event_time', 'course', 'description', 'max_players', 'created_by'),
+                rows)
+
+    season_index = {label: i for i, label in enumerate(league.season_labels)}
+    cursor.execute("SELECT id, event_date FROM events ORDER BY id")
+    participants = []
+    for event_id, event_date in cursor.fetchall():
+        # Events past the end of the current season invite its members
+        season = season_index.get(get_season_label(date.fromisoformat(event_date)), len(league.season_labels) - 1)
+        members = league.season_players(season)
+        invited = rng.choice(members, size=min(len(members), GROUP_SIZE * 2), replace=False)
+        for player in invited.tolist():
+            participants.append((event_id, player_ids[league.players[player]], 'invited'))
+    bulk_insert(cursor, 'event_participants', ('event_id', 'player_id', 'status'), participants)
+    return len(rows), len(participants)
+
+def generate_hole_in_one(cursor, league, season_stats, ace_rate=1 / 3000):
+    """$1 a round into the pot, capped at $50 a season, plus the odd hole-in-one that emptied it"""
+
+    rng = league.rng
+    _, current_rounds, _, _, _ = season_stats[-1]
+    pot = []
+    for i, name in enumerate(league.players):
+        if not league.active[i]:
+            continue
+        owed = float(min(current_rounds[i], 50))
+        paid = rng.random() < 0.3
+        contributed = owed if paid else float(rng.integers(0, int(owed) + 1))
+        pot.append((name, 0.0 if paid else owed - contributed, contributed, 1 if paid else 0, owed))
+    bulk_insert(cursor, 'hole_in_one_pot',
+                ('player_name', 'amount_owed', 'total_contributed', 'paid', 'original_balance'), pot)
+
+    total_rounds = sum(int(stats[1].sum()) for stats in season_stats)
+    history = []
+    for _ in range(rng.binomial(total_rounds, ace_rate) if total_rounds else 0):
+        season = int(rng.integers(0, len(league.season_labels)))
+        days, weights = league.season_days(season)
+        day = days[int(rng.choice(len(days), p=weights / weights.sum()))]
+        player = league.players[int(rng.choice(league.season_players(season)))]
+        course = league.courses[int(rng.choice(len(league.courses), p=league.course_weights))]
+        history.append((player, course, int(rng.integers(1, HOLES + 1)), day.isoformat(),
+                        float(rng.integers(40, 400)), "Hole-in-one!"))
+    bulk_insert(cursor, 'hole_in_one_history',
+                ('player_name', 'course', 'hole_number', 'event_date', 'pot_amount', 'description'), history)
+    return len(pot), len(history)
+
+def generate_league(conn, using_postgres, rounds, seasons, players, courses, seed=None, today=None):
+    """Fill an empty (or cleared) database; returns a summary dict"""
+
+    rng = np.random.default_rng(seed)
+    league = League(rng, players, seasons, _load_courses(courses, rng), today or date.today())
+    c = conn.cursor()
+
+    for ddl in _base_schema(using_postgres):
+        c.execute(ddl)
+    conn.commit()
+    apply_migrations(conn, using_postgres, verbose=False)
+
+    c.execute("SELECT COUNT(*) FROM scores")
+    if c.fetchone()[0]:
+        for table in LEAGUE_TABLES:
+            c.execute(f"DELETE FROM {table}")
+
+    # Indexes are rebuilt once at the end instead of being maintained row by row
+    indexes = _table_indexes(c, using_postgres, 'scores')
+    for name, _ in indexes:
+        c.execute(f"DROP INDEX {name}")
+
+    generate_players(c, league)
+    season_stats = generate_scores(c, league, rounds)
+
+    for _, ddl in indexes:
+        c.execute(ddl)
+
+    awards = generate_awards(c, league, season_stats)
+    events, participants = generate_events(c, league)
+    pot, aces = generate_hole_in_one(c, league, season_stats)
+
+    rebuild_aggregates(c)
+    bump_version(c, *LEAGUE_TABLES)
+    conn.commit()
+
+    c.execute("ANALYZE")
+    conn.commit()
+
+    return {
+        'players': players,
+        'seasons': f"{league.season_labels[0]} - {league.season_labels[-1]}",
+        'rounds': sum(int(stats[1].sum()) for stats in season_stats),
+        'awards': awards,
+        'events': events,
+        'event participants': participants,
+        'pot rows': pot,
+        'hole-in-ones': aces,
+    }
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def parse_args(args):
+    """Command line options; unknown or malformed ones exit before anything is touched"""
+    parser = argparse.ArgumentParser(description="Build a synthetic league database for load testing.")
+    parser.add_argument('--rounds', type=_positive_int, default=100000,
+                        help="score rows to generate (default: 100000)")
+    parser.add_argument('--seasons', type=_positive_int, default=10, help="seasons to spread them over (default: 10)")
+    parser.add_argument('--players', type=_positive_int,
+                        help="league size (default: about 100 rounds per player a season, at least 60)")
+    parser.add_argument('--courses', type=_positive_int, default=12, help="courses to play (default: 12)")
+    parser.add_argument('--seed', type=int, help="random seed, for reproducible output")
+    parser.add_argument('--db', default='synthetic_league.db',
+                        help="SQLite file to create (default: synthetic_league.db; ignored with DATABASE_URL)")
+    parser.add_argument('--force', action='store_true',
+                        help="replace an existing SQLite file or the league data in a Postgres database")
+    options = parser.parse_args(args)
+    if options.players is None:
+        # Enough players for about 100 rounds each a season, as in the real league
+        options.players = max(60, options.rounds // (options.seasons * 100))
+    return options
+
+def main(argv):
+    options = parse_args(argv[1:])
+    rounds, seasons, players = options.rounds, options.seasons, options.players
+    courses, seed, force = options.courses, options.seed, options.force
+    using_postgres = os.environ.get('DATABASE_URL') is not None
+
+    if using_postgres:
+        conn = get_db()
+        c = conn.cursor()
+        c.execute("SELECT to_regclass('scores') IS NOT NULL")
+        if c.fetchone()[0] and not force:
+            c.execute("SELECT COUNT(*) FROM scores")
+            if c.fetchone()[0]:
+                conn.close()
+                print("❌ This database already has scores; pass --force to replace the league data")
+                sys.exit(1)
+        target = "Postgres"
+    else:
+        path = options.db
+        if os.path.exists(path):
+            if not force:
+                print(f"❌ {path} already exists; pass --force to replace it")
+                sys.exit(1)
+            os.remove(path)
+        conn = sqlite3.connect(path, factory=TimedSQLiteConnection)
+        # A throwaway file: skip the rollback journal and fsyncs while loading
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        target = path
+
+    print(f"🏌️ Generating {rounds:,} rounds, {players} players, {seasons} seasons into {target}...")
+    started = time.time()
+    try:
+        summary = generate_league(conn, using_postgres, rounds, seasons, players, courses, seed)
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Generation failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    for key, value in summary.items():
+        print(f"   {key}: {value:,}" if isinstance(value, int) else f"   {key}: {value}")
+    print(f"✅ Done in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,43 @@
+"""
+gunicorn settings (picked up automatically from the working directory).
+
+Sizing, per worker process (WEB_CONCURRENCY workers on Heroku):
+
+- GUNICORN_THREADS request threads (default 12).
+- Up to LIVE_STREAM_MAX_CONNECTIONS of those (default: half) may be held by
+  /api/live-match-stream viewers; further viewers get a 503 and the home
+  page polls instead, so scoring and page requests always have threads left.
+- DB_POOL_MAX_SIZE Postgres connections (default: one per thread plus
+  POOL_BACKGROUND_CONNECTIONS for the live event poller, the hole update
+  flush and the job worker), so a request thread never waits on the pool.
+  Keep WEB_CONCURRENCY x DB_POOL_MAX_SIZE under the database's connection
+  limit - lower GUNICORN_THREADS rather than the pool if it doesn't fit.
+
+Each setting is only a default: an explicit environment variable wins.
+
+The PROMETHEUS_MULTIPROC_DIR set here is inherited by every worker, so each
+one writes its metrics to a shared directory and /metrics can sum them.
+"""
+import glob
+import os
+
+# Connections used outside request threads (live event poller, hole flush, job worker)
+POOL_BACKGROUND_CONNECTIONS = 3
+
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '12'))
+
+os.environ.setdefault('LIVE_STREAM_MAX_CONNECTIONS', str(max(threads // 2, 1)))
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(threads + POOL_BACKGROUND_CONNECTIONS))
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/pgg-prometheus')
+
+def on_starting(server):
+    # Values left over from a previous run would be added to this one's
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,126 @@
+"""
+Head-to-head records between every pair of players.
+
+Two players met when both have a score for the same (date, course, nine).
+The pair records are materialized per season in the head_to_head table
+(see aggregates.py), which score writes keep current, so a season is one
+indexed read and all seasons one grouped read - never a self-join of scores
+on the request path. Each pair is stored once (player_name < opponent) and
+mirrored here for the other player.
+
+Matrices are cached per process for each season (and for all seasons) until
+the scores data version changes, i.e. until new scores arrive.
+"""
+import threading
+
+from data_versions import get_versions
+
+class HeadToHead:
+    """N x N records; record(a, b) is a's results against b"""
+    def __init__(self, season, players, records):
+        self.season = season
+        self.players = players
+        self._records = records  # (player, opponent) -> (wins, losses, ties, margin total)
+        self._matches = None
+
+    def record(self, player, opponent):
+        """{'wins', 'losses', 'ties', 'matches', 'avg_margin'} or None if they never met"""
+        found = self._records.get((player, opponent))
+        if found is None:
+            return None
+        wins, losses, ties, margin = found
+        matches = wins + losses + ties
+        return {
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'matches': matches,
+            'avg_margin': margin / matches,
+        }
+
+    def matches_played(self, player):
+        """Matches against everyone (a player counts once per round, per opponent)"""
+        if self._matches is None:
+            totals = {}
+            for (name, _), (wins, losses, ties, _) in self._records.items():
+                totals[name] = totals.get(name, 0) + wins + losses + ties
+            self._matches = totals
+        return self._matches.get(player, 0)
+
+    def matrix_players(self, roster, limit):
+        """
+        Players for the HTML matrix: those on the roster (everyone, if none of
+        them are), at most `limit` of them - the ones with the most matches
+        """
+        players = [player for player in self.players if player in roster] or self.players
+        if len(players) > limit:
+            players = sorted(sorted(players, key=self.matches_played, reverse=True)[:limit])
+        return players
+
+    def opponents(self, player):
+        """(opponent, record) for everyone this player has met"""
+        return [(opponent, self.record(player, opponent)) for opponent in self.players
+                if (player, opponent) in self._records]
+
+    def as_dict(self):
+        """JSON form: players plus a row-major matrix (null where two players never met)"""
+        matrix = []
+        for player in self.players:
+            row = []
+            for opponent in self.players:
+                record = self.record(player, opponent)
+                if record is not None:
+                    record = {
+                        'wins': record['wins'],
+                        'losses': record['losses'],
+                        'ties': record['ties'],
+                        'matches': record['matches'],
+                        'avgMargin': round(record['avg_margin'], 2),
+                    }
+                row.append(record)
+            matrix.append(row)
+        return {'season': self.season, 'players': self.players, 'matrix': matrix}
+
+def compute_head_to_head(cursor, season=None):
+    """Build the matrix for one season (or every season) from head_to_head"""
+
+    if season:
+        cursor.execute("""
+            SELECT player_name, opponent, wins, losses, ties, margin
+            FROM head_to_head
+            WHERE season = ?
+        """, (season,))
+    else:
+        cursor.execute("""
+            SELECT player_name, opponent, SUM(wins), SUM(losses), SUM(ties), SUM(margin)
+            FROM head_to_head
+            GROUP BY player_name, opponent
+        """)
+
+    records = {}
+    players = set()
+    for player, opponent, wins, losses, ties, margin in cursor.fetchall():
+        records[(player, opponent)] = (wins, losses, ties, margin)
+        records[(opponent, player)] = (losses, wins, ties, -margin)
+        players.update((player, opponent))
+
+    return HeadToHead(season, sorted(players), records)
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+def get_head_to_head(cursor, season=None):
+    """compute_head_to_head(), reused until scores change"""
+
+    season = season or None
+    version = get_versions(cursor, ['scores'])['scores'][0]
+
+    with _matrices_lock:
+        cached = _matrices.get(season)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    matrix = compute_head_to_head(cursor, season)
+    with _matrices_lock:
+        _matrices[season] = (version, matrix)
+    return matrix
@@ -0,0 +1,381 @@
+"""
+Per-hole statistics computed with NumPy.
+
+The scores table keeps hole_1..hole_9 for every round entered on the
+scorecard. load_hole_matrix() reads them for a /stats filter into one
+(rounds x 9) integer array, and every statistic on /stats/holes - per-hole
+averages, score distributions, consistency (standard deviation), scoring
+streaks and best/worst holes per player and per course - is computed from
+that array with grouped array operations rather than Python loops over rows.
+
+Imported historical rounds only carry a total (their holes are all 0), so
+rounds whose holes don't add up to the total are left out.
+
+Every statistic reduces to sums a season can be folded into: per-hole
+sums, squares and bucket counts, and for streaks each player's longest,
+leading and trailing runs. cached_hole_report() keeps one HolePartial per
+(season, course filter, player filter) and merges the seasons a report
+needs, so all-seasons views are a merge of small arrays, and a new
+scorecard only reloads its own season. Partials are checked against a
+per-season fingerprint of season_standings, which is only re-read after
+the scores data version changes.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_versions import get_versions
+from live_store import HOLES_PER_ROUND
+
+# Season partials kept per process (one per season per filter combination)
+HOLE_STATS_CACHE_SIZE = int(os.environ.get('HOLE_STATS_CACHE_SIZE', '256'))
+
+# Distribution buckets: 0, 1, 2 and "3 or more" points on a hole
+DISTRIBUTION_BUCKETS = 4
+
+HOLE_COLUMNS = ", ".join(f"COALESCE(hole_{n}, 0)" for n in range(1, HOLES_PER_ROUND + 1))
+
+class HoleMatrix:
+    """Hole scores for a set of rounds, in play order (date, then entry order)"""
+    def __init__(self, players, courses, holes):
+        # Labels are stored once; rows refer to them by index
+        self.player_names, self.player_idx = np.unique(np.asarray(players, dtype=object), return_inverse=True)
+        self.course_names, self.course_idx = np.unique(np.asarray(courses, dtype=object), return_inverse=True)
+        self.holes = np.asarray(holes, dtype=np.int32).reshape(-1, HOLES_PER_ROUND)
+
+    @property
+    def rounds(self):
+        return self.holes.shape[0]
+
+def load_hole_matrix(cursor, where_clause="", params=()):
+    """Read the hole scores matching a /stats WHERE clause; returns (HoleMatrix, rounds skipped)"""
+
+    cursor.execute(f"""
+        SELECT player_name, COALESCE(course, '') || ' ' || COALESCE(nine, ''), total, {HOLE_COLUMNS}
+        FROM scores
+        {where_clause}
+        ORDER BY date, id
+    """, params)
+    rows = cursor.fetchall()
+
+    if not rows:
+        return HoleMatrix([], [], np.zeros((0, HOLES_PER_ROUND))), 0
+
+    players, courses, totals, *hole_columns = zip(*rows)
+    holes = np.column_stack(hole_columns).astype(np.int32)
+    totals = np.array([total or 0 for total in totals], dtype=np.int32)
+
+    # Imported rounds have a total but no hole detail
+    keep = holes.sum(axis=1) == totals
+    players = np.array([name or '' for name in players], dtype=object)[keep]
+    courses = np.asarray(courses, dtype=object)[keep]
+    return HoleMatrix(players, courses, holes[keep]), int((~keep).sum())
+
+def hole_distribution(holes):
+    """(9 x DISTRIBUTION_BUCKETS) share of rounds scoring 0, 1, 2 and 3+ on each hole"""
+    if holes.shape[0] == 0:
+        return np.zeros((HOLES_PER_ROUND, DISTRIBUTION_BUCKETS))
+
+    buckets = np.clip(holes, 0, DISTRIBUTION_BUCKETS - 1)
+    cells = np.arange(HOLES_PER_ROUND) * DISTRIBUTION_BUCKETS + buckets
+    counts = np.bincount(cells.ravel(), minlength=HOLES_PER_ROUND * DISTRIBUTION_BUCKETS)
+    return counts.reshape(HOLES_PER_ROUND, DISTRIBUTION_BUCKETS) / holes.shape[0]
+
+def scoring_streaks(player_idx, players, holes):
+    """
+    Per player: (longest run of consecutive holes with points, current run),
+    following each player's rounds in play order.
+    """
+
+    longest = np.zeros(players, dtype=int)
+    current = np.zeros(players, dtype=int)
+    if holes.shape[0] == 0:
+        return longest, current
+
+    # One flat sequence of holes per player, players one after another
+    order = np.argsort(player_idx, kind='stable')
+    scored = (holes[order] > 0).ravel()
+    owner = np.repeat(player_idx[order], HOLES_PER_ROUND)
+
+    new_player = np.ones(len(owner), dtype=bool)
+    new_player[1:] = owner[1:] != owner[:-1]
+
+    # Running count of scoring holes, reset after every miss and at every new player
+    scored_so_far = np.cumsum(scored)
+    reset_to = np.where(~scored, scored_so_far, np.where(new_player, scored_so_far - 1, 0))
+    run = scored_so_far - np.maximum.accumulate(reset_to)
+
+    np.maximum.at(longest, owner, run)
+    last = np.flatnonzero(np.append(new_player[1:], True))
+    current[owner[last]] = run[last]
+    return longest, current
+
+def _leading_runs(player_idx, players, holes):
+    """Per player: scoring holes before their first miss (every hole, if they never missed)"""
+
+    leading = np.zeros(players, dtype=int)
+    if holes.shape[0] == 0:
+        return leading
+
+    order = np.argsort(player_idx, kind='stable')
+    scored = (holes[order] > 0).ravel()
+    owner = np.repeat(player_idx[order], HOLES_PER_ROUND)
+    position = np.arange(len(owner))
+
+    start = np.full(players, len(owner))
+    np.minimum.at(start, owner, position)
+    first_miss = np.full(players, len(owner))
+    np.minimum.at(first_miss, owner[~scored], position[~scored])
+    holes_played = np.bincount(owner, minlength=players)
+
+    played = holes_played > 0
+    leading[played] = np.minimum(first_miss[played] - start[played], holes_played[played])
+    return leading
+
+class HolePartial:
+    """
+    Mergeable sums behind a hole report. Per player the streak summary is
+    (longest run, leading run, trailing run, every hole scored), which is
+    enough to join runs across the boundary between two periods.
+    """
+    def __init__(self, rounds, skipped, sums, squares, buckets, player_names, player_counts, player_sums,
+                 player_squares, longest, leading, trailing, unbroken, course_names, course_counts,
+                 course_sums, course_squares):
+        self.rounds = rounds
+        self.skipped = skipped
+        self.sums = sums
+        self.squares = squares
+        self.buckets = buckets
+        self.player_names = player_names
+        self.player_counts = player_counts
+        self.player_sums = player_sums
+        self.player_squares = player_squares
+        self.longest = longest
+        self.leading = leading
+        self.trailing = trailing
+        self.unbroken = unbroken
+        self.course_names = course_names
+        self.course_counts = course_counts
+        self.course_sums = course_sums
+        self.course_squares = course_squares
+
+    @classmethod
+    def from_matrix(cls, matrix, skipped=0):
+        holes = matrix.holes
+        squares = holes.astype(float) ** 2
+        buckets = hole_distribution(holes) * matrix.rounds
+
+        def grouped(group_idx, groups):
+            counts = np.bincount(group_idx, minlength=groups)
+            sums = np.zeros((groups, HOLES_PER_ROUND))
+            group_squares = np.zeros((groups, HOLES_PER_ROUND))
+            np.add.at(sums, group_idx, holes)
+            np.add.at(group_squares, group_idx, squares)
+            return counts, sums, group_squares
+
+        player_count = len(matrix.player_names)
+        player_counts, player_sums, player_squares = grouped(matrix.player_idx, player_count)
+        longest, trailing = scoring_streaks(matrix.player_idx, player_count, holes)
+        leading = _leading_runs(matrix.player_idx, player_count, holes)
+        course_counts, course_sums, course_squares = grouped(matrix.course_idx, len(matrix.course_names))
+
+        return cls(matrix.rounds, skipped, holes.sum(axis=0).astype(float), squares.sum(axis=0), buckets,
+                   np.asarray(matrix.player_names, dtype=object), player_counts, player_sums, player_squares,
+                   longest, leading, trailing, leading == player_counts * HOLES_PER_ROUND,
+                   np.asarray(matrix.course_names, dtype=object), course_counts, course_sums, course_squares)
+
+    @classmethod
+    def merge(cls, partials):
+        """Combine partials in play order (oldest first)"""
+        partials = list(partials)
+        players = np.array(sorted({name for p in partials for name in p.player_names}), dtype=object)
+        courses = np.array(sorted({name for p in partials for name in p.course_names}), dtype=object)
+
+        sums = np.zeros(HOLES_PER_ROUND)
+        squares = np.zeros(HOLES_PER_ROUND)
+        buckets = np.zeros((HOLES_PER_ROUND, DISTRIBUTION_BUCKETS))
+        player_counts = np.zeros(len(players), dtype=int)
+        player_sums = np.zeros((len(players), HOLES_PER_ROUND))
+        player_squares = np.zeros((len(players), HOLES_PER_ROUND))
+        longest = np.zeros(len(players), dtype=int)
+        leading = np.zeros(len(players), dtype=int)
+        trailing = np.zeros(len(players), dtype=int)
+        unbroken = np.ones(len(players), dtype=bool)
+        course_counts = np.zeros(len(courses), dtype=int)
+        course_sums = np.zeros((len(courses), HOLES_PER_ROUND))
+        course_squares = np.zeros((len(courses), HOLES_PER_ROUND))
+
+        for p in partials:
+            sums += p.sums
+            squares += p.squares
+            buckets += p.buckets
+
+            at = np.searchsorted(players, p.player_names)
+            player_counts[at] += p.player_counts
+            player_sums[at] += p.player_sums
+            player_squares[at] += p.player_squares
+            # A run can carry on from the end of the earlier period into this one
+            longest[at] = np.maximum(longest[at], np.maximum(p.longest, trailing[at] + p.leading))
+            leading[at] = np.where(unbroken[at], leading[at] + p.leading, leading[at])
+            trailing[at] = np.where(p.unbroken, trailing[at] + p.trailing, p.trailing)
+            unbroken[at] &= p.unbroken
+
+            at = np.searchsorted(courses, p.course_names)
+            course_counts[at] += p.course_counts
+            course_sums[at] += p.course_sums
+            course_squares[at] += p.course_squares
+
+        return cls(sum(p.rounds for p in partials), sum(p.skipped for p in partials), sums, squares, buckets,
+                   players, player_counts, player_sums, player_squares, longest, leading, trailing, unbroken,
+                   courses, course_counts, course_sums, course_squares)
+
+def _moments(counts, sums, squares):
+    """Per group: (per-hole mean, per-hole std, pooled std over every hole played)"""
+    counts = np.asarray(counts, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts[..., None]
+        stds = np.sqrt(np.maximum(squares / counts[..., None] - means ** 2, 0))
+        pooled_mean = sums.sum(axis=-1) / (counts * HOLES_PER_ROUND)
+        pooled = np.sqrt(np.maximum(squares.sum(axis=-1) / (counts * HOLES_PER_ROUND) - pooled_mean ** 2, 0))
+    return np.nan_to_num(means), np.nan_to_num(stds), np.nan_to_num(pooled)
+
+def _best_worst(means, counts):
+    """1-based best and worst hole per row of means (None where there are no rounds)"""
+    best = np.where(counts > 0, means.argmax(axis=1) + 1, 0)
+    worst = np.where(counts > 0, means.argmin(axis=1) + 1, 0)
+    return [int(b) or None for b in best], [int(w) or None for w in worst]
+
+def partial_report(partial):
+    """Everything /stats/holes shows, as plain Python values for the template"""
+
+    hole_means, hole_stds, _ = _moments(partial.rounds, partial.sums, partial.squares)
+    distribution = partial.buckets / partial.rounds if partial.rounds else partial.buckets
+    overall = [{
+        'hole': n + 1,
+        'avg': float(hole_means[n]),
+        'std': float(hole_stds[n]),
+        'distribution': [float(share) for share in distribution[n]],
+    } for n in range(HOLES_PER_ROUND)]
+
+    counts = partial.player_counts
+    means, _, pooled = _moments(counts, partial.player_sums, partial.player_squares)
+    best, worst = _best_worst(means, counts)
+    players = [{
+        'name': partial.player_names[i],
+        'rounds': int(counts[i]),
+        'avg_per_hole': float(means[i].mean()),
+        'consistency': float(pooled[i]),
+        'best_hole': best[i],
+        'worst_hole': worst[i],
+        'longest_streak': int(partial.longest[i]),
+        'current_streak': int(partial.trailing[i]),
+        'hole_avgs': [float(value) for value in means[i]],
+    } for i in range(len(counts))]
+
+    counts = partial.course_counts
+    means, stds, _ = _moments(counts, partial.course_sums, partial.course_squares)
+    best, worst = _best_worst(means, counts)
+    courses = [{
+        'name': partial.course_names[i],
+        'rounds': int(counts[i]),
+        'hole_avgs': [float(value) for value in means[i]],
+        'hole_stds': [float(value) for value in stds[i]],
+        'easiest_hole': best[i],
+        'hardest_hole': worst[i],
+    } for i in range(len(counts))]
+
+    return {
+        'rounds': partial.rounds,
+        'skipped': partial.skipped,
+        'holes': overall,
+        'players': players,
+        'courses': courses,
+    }
+
+def hole_report(matrix, skipped=0):
+    """partial_report() for one HoleMatrix"""
+    return partial_report(HolePartial.from_matrix(matrix, skipped))
+
+def season_fingerprints(cursor):
+    """
+    {season: value that changes whenever that season's scores change}; '' is
+    the rounds without a season. Built from season_standings (a row per season
+    and player), and only re-read after the scores data version moves.
+    """
+    global _fingerprints
+
+    version = get_versions(cursor, ['scores'])['scores'][0]
+    with _reports_lock:
+        if _fingerprints is not None and _fingerprints[0] == version:
+            return _fingerprints[1]
+
+    cursor.execute("SELECT season, COUNT(*), MAX(id), SUM(rounds) FROM season_standings GROUP BY season")
+    fingerprints = {season: (count, max_id, rounds) for season, count, max_id, rounds in cursor.fetchall()}
+    cursor.execute("SELECT COUNT(*), MAX(id), SUM(rounds) FROM stats_cube WHERE season = ''")
+    count, max_id, rounds = cursor.fetchone()
+    if count:
+        fingerprints[''] = (count, max_id, rounds)
+
+    with _reports_lock:
+        _fingerprints = (version, fingerprints)
+    return fingerprints
+
+def _season_where_clause(season, course, player):
+    conditions = ["season = ?" if season else "season IS NULL"]
+    params = [season] if season else []
+    if course:
+        conditions.append("course = ?")
+        params.append(course)
+    if player:
+        conditions.append("player_name = ?")
+        params.append(player)
+    return "WHERE " + " AND ".join(conditions), params
+
+_partials = OrderedDict()
+_reports = OrderedDict()
+_fingerprints = None
+_reports_lock = threading.Lock()
+
+def _season_partial(cursor, season, course, player, fingerprint):
+    key = (season, course, player)
+    with _reports_lock:
+        cached = _partials.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            _partials.move_to_end(key)
+            return cached[1]
+
+    where_clause, params = _season_where_clause(season, course, player)
+    partial = HolePartial.from_matrix(*load_hole_matrix(cursor, where_clause, params))
+
+    with _reports_lock:
+        _partials[key] = (fingerprint, partial)
+        _partials.move_to_end(key)
+        while len(_partials) > HOLE_STATS_CACHE_SIZE:
+            _partials.popitem(last=False)
+    return partial
+
+def cached_hole_report(cursor, season='', course='', player=''):
+    """The report for the /stats filters, merged from per-season partials"""
+
+    fingerprints = season_fingerprints(cursor)
+    seasons = [season] if season else sorted(fingerprints)  # '' (no season) first, then oldest to newest
+    key = (season, course, player)
+    stamp = tuple(fingerprints.get(s) for s in seasons)
+
+    with _reports_lock:
+        cached = _reports.get(key)
+        if cached is not None and cached[0] == stamp:
+            _reports.move_to_end(key)
+            return cached[1]
+
+    partial = HolePartial.merge(_season_partial(cursor, s, course, player, fingerprints.get(s)) for s in seasons)
+    report = partial_report(partial)
+
+    with _reports_lock:
+        _reports[key] = (stamp, report)
+        _reports.move_to_end(key)
+        while len(_reports) > HOLE_STATS_CACHE_SIZE:
+            _reports.popitem(last=False)
+    return report
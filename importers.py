@@ -0,0 +1,415 @@
+"""
+Bulk importers behind the admin import forms, run by the job worker (jobs.py).
+
+Historical scores (/stats/import):
+
+One line per player per nine (from an uploaded CSV file or the pasted textarea):
+    Date,Player,Score[,Nine]
+
+Lines are parsed as they are read, never all at once. Valid rows are written
+in batches - COPY (through a temp table) on Postgres, executemany on SQLite -
+with winner 'No'. Every row carries a content_hash of (date, nine, player,
+score, course) backed by a unique index, and rows whose hash is already in
+scores are skipped, so re-importing overlapping history is a no-op. When
+the input is exhausted one set-based UPDATE recomputes the winner of every
+(date, nine) the import added to, over old and new rows alike, and
+season_standings and stats_cube are rebuilt for just the seasons that were
+touched.
+
+Awards (/awards/import) and hole-in-one balances (/hole-in-one/upload-balances)
+use the same line-by-line parsing and ImportResult.
+
+Rejected lines are collected, exactly as they were written, in the
+ImportResult, which the job stores so /jobs/<id> can report them and offer
+them as a CSV download.
+"""
+import csv
+import hashlib
+import io
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Set, Tuple
+
+from aggregates import rebuild_aggregates
+from app_logging import get_logger
+from data_versions import bump_version
+
+log = get_logger('importers')
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '2000'))
+# Rejected lines kept for the report; anything past this is only counted
+IMPORT_MAX_REPORTED_ERRORS = 10000
+
+HISTORICAL_COURSE = "Historical Course"
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y')
+
+SCORE_COLUMNS = ('date', 'course', 'nine', 'player_name', 'mulligan',
+                 'hole_1', 'hole_2', 'hole_3', 'hole_4', 'hole_5',
+                 'hole_6', 'hole_7', 'hole_8', 'hole_9',
+                 'total', 'winner', 'season', 'content_hash')
+
+def get_season_label(date_obj):
+    """
+    Calculate season based on November 1 - October 31 year.
+    Examples:
+    - Nov 1, 2024 - Oct 31, 2025 = "2025 Season"
+    - Nov 1, 2023 - Oct 31, 2024 = "2024 Season"
+    """
+    if date_obj.month >= 11:  # November or December
+        return f"{date_obj.year + 1} Season"
+    else:  # January through October
+        return f"{date_obj.year} Season"
+
+def score_content_hash(date, nine, player_name, total, course):
+    """Natural key of a score row: same date, nine, player, score and course = same round"""
+    key = "|".join((str(date or ''), str(nine or ''), (player_name or '').strip().lower(),
+                    str(total if total is not None else ''), (course or '').strip().lower()))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def backfill_content_hashes(cursor, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Hash score rows that have no content_hash yet. When several rows share a hash
+    only the oldest gets it, so the unique index can be built.
+    Returns (rows hashed, duplicate rows left unhashed).
+    """
+
+    cursor.execute("SELECT content_hash FROM scores WHERE content_hash IS NOT NULL")
+    seen = {row[0] for row in cursor.fetchall()}
+
+    cursor.execute('''
+        SELECT id, date, nine, player_name, total, course
+        FROM scores
+        WHERE content_hash IS NULL
+        ORDER BY id
+    ''')
+    updates = []
+    duplicates = 0
+    for score_id, date, nine, player_name, total, course in cursor.fetchall():
+        content_hash = score_content_hash(date, nine, player_name, total, course)
+        if content_hash in seen:
+            duplicates += 1
+            continue
+        seen.add(content_hash)
+        updates.append((content_hash, score_id))
+
+    for i in range(0, len(updates), batch_size):
+        cursor.executemany("UPDATE scores SET content_hash = ? WHERE id = ?", updates[i:i + batch_size])
+    return len(updates), duplicates
+
+class DateParser:
+    """
+    Parses dates to ('YYYY-MM-DD', season). The format that matched last is tried
+    first, and each distinct date string is parsed once - a history file has
+    thousands of rows but only a few hundred dates.
+    """
+    def __init__(self, formats=DATE_FORMATS, cache_size=20000):
+        self.formats = list(formats)
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def parse(self, raw):
+        parsed = self._cache.get(raw)
+        if parsed is not None:
+            return parsed
+
+        for i, fmt in enumerate(self.formats):
+            try:
+                date_obj = datetime.strptime(raw, fmt)
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            parsed = (date_obj.strftime('%Y-%m-%d'), get_season_label(date_obj))
+            if len(self._cache) < self.cache_size:
+                self._cache[raw] = parsed
+            return parsed
+
+        raise ValueError(f"Invalid date format: {raw}")
+
+@dataclass
+class ImportResult:
+    """Counters and rejected lines from one import"""
+    imported: int = 0
+    skipped: int = 0  # Rows already present (same content hash)
+    error_count: int = 0
+    errors: List[Tuple[int, str, str]] = field(default_factory=list)  # (line number, line, reason)
+    seasons: Set[str] = field(default_factory=set)
+    duration: float = 0.0
+
+    def add_error(self, line_num, line, reason):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append((line_num, line, reason))
+
+    @property
+    def processed(self):
+        return self.imported + self.skipped + self.error_count
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'seasons': sorted(self.seasons),
+            'duration': round(self.duration, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(imported=data.get('imported', 0),
+                   skipped=data.get('skipped', 0),
+                   error_count=data.get('error_count', 0),
+                   errors=[tuple(error) for error in data.get('errors', [])],
+                   seasons=set(data.get('seasons', [])),
+                   duration=data.get('duration', 0.0))
+
+    def error_report_csv(self):
+        """Rejected lines as CSV: Line,Input,Error"""
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['Line', 'Input', 'Error'])
+        writer.writerows(self.errors)
+        if self.error_count > len(self.errors):
+            writer.writerow(['', '', f"{self.error_count - len(self.errors)} more errors not shown"])
+        return out.getvalue()
+
+class _ScoreWriter:
+    """Buffers score rows and writes them a batch at a time, skipping rows already present"""
+    def __init__(self, cursor, result, batch_size=IMPORT_BATCH_SIZE):
+        self.cursor = cursor
+        self.result = result
+        self.batch_size = batch_size
+        self.rows = []
+        # The Postgres cursor wrapper forwards copy_expert to psycopg2; sqlite3 has no COPY.
+        # COPY can't skip conflicts, so batches go through a temp table first.
+        self.use_copy = hasattr(cursor, 'copy_expert')
+        if self.use_copy:
+            cursor.execute(f"CREATE TEMP TABLE import_scores ON COMMIT DROP AS "
+                           f"SELECT {', '.join(SCORE_COLUMNS)} FROM scores WITH NO DATA")
+
+    def add(self, row):
+        """Buffer a row; returns True if that filled a batch and it was written"""
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if not self.rows:
+            return
+
+        columns = ', '.join(SCORE_COLUMNS)
+        if self.use_copy:
+            buf = io.StringIO()
+            csv.writer(buf).writerows(self.rows)
+            buf.seek(0)
+            self.cursor.copy_expert(f"COPY import_scores ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+            self.cursor.execute(f"INSERT INTO scores ({columns}) SELECT {columns} FROM import_scores "
+                                f"ON CONFLICT (content_hash) DO NOTHING")
+            inserted = self.cursor.rowcount
+            self.cursor.execute("TRUNCATE import_scores")
+        else:
+            self.cursor.executemany(
+                f"INSERT INTO scores ({columns}) VALUES ({', '.join('?' for _ in SCORE_COLUMNS)}) "
+                f"ON CONFLICT (content_hash) DO NOTHING",
+                self.rows)
+            inserted = self.cursor.rowcount
+
+        self.result.imported += inserted
+        self.result.skipped += len(self.rows) - inserted
+        self.rows = []
+
+def parse_score_lines(lines, result, date_parser=None):
+    """Yield (date, nine, player_name, score, season) for each valid line, recording bad ones"""
+
+    date_parser = date_parser or DateParser()
+
+    for line_num, parts, line in _csv_lines(lines):
+        if parts[0].startswith('Date'):  # Skip header
+            continue
+
+        if len(parts) < 3:  # Minimum: date, player, score
+            result.add_error(line_num, line, "Expected Date,Player,Score[,Nine]")
+            continue
+
+        player_name = parts[1]
+        if not player_name:
+            result.add_error(line_num, line, "Missing player name")
+            continue
+
+        try:
+            score = int(parts[2])
+        except ValueError:
+            result.add_error(line_num, line, f"Invalid score: {parts[2]}")
+            continue
+
+        try:
+            date, season = date_parser.parse(parts[0])
+        except ValueError as e:
+            result.add_error(line_num, line, str(e))
+            continue
+
+        nine = parts[3] if len(parts) > 3 and parts[3] in ['Front', 'Back'] else 'Front'
+        yield date, nine, player_name, score, season
+
+def mark_import_winners(cursor, first_id):
+    """
+    Recompute winner for every round (date, course, nine) the import added scores to
+    (scores with id > first_id), counting the rows that round already had
+    """
+    cursor.execute('''
+        UPDATE scores SET winner = CASE WHEN total = (
+                SELECT MAX(s2.total) FROM scores s2
+                WHERE s2.date = scores.date AND s2.course = scores.course AND s2.nine = scores.nine
+            ) THEN 'Yes' ELSE 'No' END
+        WHERE course = ?
+          AND EXISTS (
+              SELECT 1 FROM scores s3
+              WHERE s3.id > ? AND s3.date = scores.date
+                AND s3.course = scores.course AND s3.nine = scores.nine
+          )
+    ''', (HISTORICAL_COURSE, first_id))
+
+def import_scores_csv(cursor, lines, clear_existing=False, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Import Date,Player,Score[,Nine] lines into scores in the cursor's transaction.
+    progress(result) is called after every batch. Returns an ImportResult; the caller commits.
+    """
+
+    started = time.time()
+    result = ImportResult()
+
+    if clear_existing:
+        cursor.execute("DELETE FROM scores")
+        cursor.execute("DELETE FROM season_standings")
+        cursor.execute("DELETE FROM stats_cube")
+        log.info("🗑️ Cleared all existing scores")
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM scores")
+    first_id = cursor.fetchone()[0]
+
+    writer = _ScoreWriter(cursor, result, batch_size)
+    for date, nine, player_name, score, season in parse_score_lines(lines, result):
+        flushed = writer.add((date, HISTORICAL_COURSE, nine, player_name, "No",
+                              0, 0, 0, 0, 0, 0, 0, 0, 0,  # Individual hole scores not available
+                              score, "No", season,
+                              score_content_hash(date, nine, player_name, score, HISTORICAL_COURSE)))
+        result.seasons.add(season)
+        if progress and flushed:
+            progress(result)
+    writer.flush()
+
+    if result.imported:
+        mark_import_winners(cursor, first_id)
+        rebuild_aggregates(cursor, sorted(result.seasons))
+    if result.imported or clear_existing:
+        bump_version(cursor, 'scores')
+
+    result.duration = time.time() - started
+    return result
+
+def _csv_lines(lines):
+    """(line number, stripped parts, original line) for each non-blank, non-comment line"""
+    raw = []
+
+    def remember(lines):
+        for line in lines:
+            raw.append(line)
+            yield line
+
+    for line_num, parts in enumerate(csv.reader(remember(lines), skipinitialspace=True), 1):
+        line = "".join(raw).rstrip('\r\n')
+        raw.clear()
+        parts = [part.strip() for part in parts]
+        if not any(parts) or parts[0].startswith('#'):  # Skip empty lines and comments
+            continue
+        yield line_num, parts, line
+
+def import_awards_csv(cursor, lines, progress=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import Season,Category,Player[,Description,Date] lines into awards"""
+
+    started = time.time()
+    result = ImportResult()
+    rows = []
+
+    for line_num, parts, line in _csv_lines(lines):
+        if len(parts) < 3:  # Minimum: season, category, player
+            result.add_error(line_num, line, "Expected Season,Category,Player[,Description,Date]")
+            continue
+
+        season, category, player = parts[0], parts[1], parts[2]
+        if not season or not player:
+            result.add_error(line_num, line, "Missing season or player name")
+            continue
+        description = parts[3] if len(parts) > 3 else ""
+        award_date = parts[4] if len(parts) > 4 else ""
+        rows.append((season, category, player, description, award_date, "Import"))
+        result.imported += 1
+        result.seasons.add(season)
+
+        if len(rows) >= batch_size:
+            _insert_awards(cursor, rows)
+            rows = []
+            if progress:
+                progress(result)
+
+    _insert_awards(cursor, rows)
+    if result.imported:
+        bump_version(cursor, 'awards')
+    result.duration = time.time() - started
+    return result
+
+def _insert_awards(cursor, rows):
+    if rows:
+        cursor.executemany("""
+            INSERT INTO awards (season, award_category, player_name, description, award_date, created_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+
+def import_hole_in_one_balances(cursor, lines, progress=None):
+    """Import Player,Amount lines into hole_in_one_pot (amounts capped at $50)"""
+
+    started = time.time()
+    result = ImportResult()
+    now = datetime.now().isoformat()
+
+    for line_num, parts, line in _csv_lines(lines):
+        if len(parts) < 2:
+            result.add_error(line_num, line, "Expected Player,Amount")
+            continue
+
+        player_name = parts[0]
+        if not player_name:
+            result.add_error(line_num, line, "Missing player name")
+            continue
+
+        try:
+            amount = float(parts[1])
+        except ValueError:
+            result.add_error(line_num, line, f"Invalid amount: {parts[1]}")
+            continue
+
+        # Cap at $50
+        amount = min(amount, 50.0)
+
+        # Update or insert player balance (one row per player, see migration 12)
+        cursor.execute("""
+            INSERT INTO hole_in_one_pot (player_name, amount_owed, total_contributed, last_updated)
+            VALUES (?, ?, 0.0, ?)
+            ON CONFLICT (player_name) DO UPDATE SET
+                amount_owed = excluded.amount_owed,
+                total_contributed = excluded.total_contributed,
+                last_updated = excluded.last_updated
+        """, (player_name, amount, now))
+        result.imported += 1
+
+    if result.imported:
+        bump_version(cursor, 'hole_in_one_pot')
+    if progress:
+        progress(result)
+    result.duration = time.time() - started
+    return result
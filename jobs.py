@@ -0,0 +1,379 @@
+"""
+Durable background jobs, queued in the jobs table of the main database.
+
+Admin imports used to run inside the web request, so a large paste could run
+past gunicorn's timeout and silently roll back. Now the route passes the
+input lines to enqueue_job() and returns a job id straight away; a worker
+(worker.py, the `worker` process in the Procfile) claims queued jobs one at a
+time and runs the handler for the job's kind.
+
+The input is never held whole: enqueue_job() copies it into job_inputs in
+chunks of about JOB_INPUT_CHUNK_SIZE characters as it is read, and the
+handler reads it back one chunk at a time. The chunks are deleted when the
+job finishes.
+
+A job's work and its 'done' status commit in the same transaction, so a job
+is either fully applied or not at all. Progress counters and the heartbeat are
+written every JOB_PROGRESS_INTERVAL while a job runs: from a separate
+connection on Postgres, and on SQLite (where the import's write lock would
+block another connection) through the job's own, so they show once it commits.
+Workers requeue jobs left 'running' by a worker that died once their heartbeat
+is JOB_STALE_AFTER seconds old, checking every JOB_REQUEUE_INTERVAL seconds.
+
+Without DATABASE_URL (local development) the web process also runs a worker
+thread, so imports complete without starting worker.py; JOB_WORKER_THREAD
+overrides that either way.
+
+/jobs/<id> reports status, counters, duration and the rejected lines.
+"""
+import io
+import json
+import os
+import threading
+import time
+
+from app_logging import get_logger
+from db_helper import get_db
+from importers import ImportResult, import_awards_csv, import_hole_in_one_balances, import_scores_csv
+
+log = get_logger('jobs')
+
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1'))
+JOB_PROGRESS_INTERVAL = float(os.environ.get('JOB_PROGRESS_INTERVAL', '2'))
+JOB_STALE_AFTER = float(os.environ.get('JOB_STALE_AFTER', '1800'))
+JOB_REQUEUE_INTERVAL = float(os.environ.get('JOB_REQUEUE_INTERVAL', '60'))
+JOB_MAX_ATTEMPTS = 3
+JOB_INPUT_CHUNK_SIZE = int(os.environ.get('JOB_INPUT_CHUNK_SIZE', '262144'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+def create_job_tables(cursor, using_postgres=False):
+    """Create the jobs table and its indexes if they don't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id SERIAL PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT NOT NULL,
+            processed INTEGER DEFAULT 0,
+            succeeded INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER DEFAULT 0,
+            created_at DOUBLE PRECISION NOT NULL,
+            started_at DOUBLE PRECISION,
+            heartbeat_at DOUBLE PRECISION,
+            finished_at DOUBLE PRECISION
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT NOT NULL,
+            processed INTEGER DEFAULT 0,
+            succeeded INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL
+        )
+        ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_jobs_status_id
+    ON jobs (status, id)
+    ''')
+
+def create_job_input_tables(cursor, using_postgres=False):
+    """Create the job_inputs table (a queued job's input, in chunks) if it doesn't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_inputs (
+            id SERIAL PRIMARY KEY,
+            job_id INTEGER NOT NULL,
+            data TEXT NOT NULL
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_inputs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            data TEXT NOT NULL
+        )
+        ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_job_inputs_job_id
+    ON job_inputs (job_id, id)
+    ''')
+
+# Job kinds: handler(cursor, payload, lines, progress) returning an ImportResult
+def _import_scores(cursor, payload, lines, progress):
+    return import_scores_csv(cursor, lines, clear_existing=payload.get('clear_existing', False),
+                             progress=progress)
+
+def _import_awards(cursor, payload, lines, progress):
+    return import_awards_csv(cursor, lines, progress=progress)
+
+def _upload_balances(cursor, payload, lines, progress):
+    return import_hole_in_one_balances(cursor, lines, progress=progress)
+
+JOB_HANDLERS = {
+    'import_scores': _import_scores,
+    'import_awards': _import_awards,
+    'upload_balances': _upload_balances,
+}
+
+def _chunk_lines(lines, chunk_size=JOB_INPUT_CHUNK_SIZE):
+    """Join lines (newlines kept) into strings of about chunk_size characters"""
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+def enqueue_job(cursor, kind, payload, lines):
+    """
+    Queue a job (visible to workers once the caller commits), copying its input
+    lines into job_inputs as they are read. Returns the job id, or None if the
+    input was blank.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    chunks = _chunk_lines(lines)
+    first = next(chunks, None)
+    if first is None or not first.strip():
+        return None
+
+    cursor.execute("INSERT INTO jobs (kind, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                   (kind, QUEUED, json.dumps(payload), time.time()))
+    job_id = cursor.lastrowid
+    cursor.execute("INSERT INTO job_inputs (job_id, data) VALUES (?, ?)", (job_id, first))
+    for chunk in chunks:
+        cursor.execute("INSERT INTO job_inputs (job_id, data) VALUES (?, ?)", (job_id, chunk))
+    return job_id
+
+def read_job_input(cursor, job_id):
+    """Yield a job's input lines, fetching one chunk at a time"""
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, data FROM job_inputs WHERE job_id = ? AND id > ? ORDER BY id LIMIT 1",
+                       (job_id, last_id))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        last_id, data = row
+        yield from io.StringIO(data, newline='')
+
+def get_job(cursor, job_id):
+    """Job status as a dict, or None"""
+    cursor.execute('''
+        SELECT id, kind, status, processed, succeeded, failed, result, error,
+               attempts, created_at, started_at, finished_at
+        FROM jobs
+        WHERE id = ?
+    ''', (job_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+
+    (job_id, kind, status, processed, succeeded, failed, result, error,
+     attempts, created_at, started_at, finished_at) = row
+    end = finished_at or time.time()
+    return {
+        'id': job_id,
+        'kind': kind,
+        'status': status,
+        'processed': processed or 0,
+        'succeeded': succeeded or 0,
+        'failed': failed or 0,
+        'result': ImportResult.from_dict(json.loads(result)) if result else None,
+        'error': error,
+        'attempts': attempts,
+        'created_at': created_at,
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'duration': round(end - started_at, 3) if started_at else None,
+    }
+
+def requeue_stale_jobs(cursor, now=None):
+    """Put back jobs whose worker stopped heartbeating (they were rolled back with it)"""
+    now = now or time.time()
+    cursor.execute('''
+        UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                        error = 'Worker stopped while running this job'
+        WHERE status = 'running' AND heartbeat_at < ?
+    ''', (JOB_MAX_ATTEMPTS, now - JOB_STALE_AFTER))
+    requeued = cursor.rowcount
+    cursor.execute("DELETE FROM job_inputs WHERE job_id IN (SELECT id FROM jobs WHERE status = 'failed')")
+    return requeued
+
+def claim_next_job(conn):
+    """Mark the oldest queued job running and return (id, kind, payload), or None"""
+
+    c = conn.cursor()
+    while True:
+        c.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1")
+        row = c.fetchone()
+        if row is None:
+            conn.commit()
+            return None
+
+        # Only one worker's UPDATE matches status = 'queued'; the others look again
+        now = time.time()
+        c.execute('''
+            UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = attempts + 1
+            WHERE id = ? AND status = 'queued'
+        ''', (now, now, row[0]))
+        if c.rowcount == 1:
+            c.execute("SELECT kind, payload FROM jobs WHERE id = ?", (row[0],))
+            kind, payload = c.fetchone()
+            conn.commit()
+            return row[0], kind, json.loads(payload)
+        conn.commit()
+
+PROGRESS_UPDATE = '''
+    UPDATE jobs SET processed = ?, succeeded = ?, failed = ?, heartbeat_at = ?
+    WHERE id = ?
+'''
+
+class _ProgressReporter:
+    """
+    Writes a running job's counters (and heartbeat) at most every JOB_PROGRESS_INTERVAL.
+    SQLite writes go through the job's own cursor: while the job holds the write
+    lock nobody else can requeue it, and if the worker dies the rollback leaves
+    the heartbeat to go stale.
+    """
+    def __init__(self, job_id, cursor):
+        self.job_id = job_id
+        self.cursor = None if os.environ.get('DATABASE_URL') else cursor
+        self._last = 0.0
+
+    def __call__(self, result):
+        now = time.time()
+        if now - self._last < JOB_PROGRESS_INTERVAL:
+            return
+        self._last = now
+
+        params = (result.processed, result.imported, result.error_count, now, self.job_id)
+        if self.cursor is not None:
+            self.cursor.execute(PROGRESS_UPDATE, params)
+            return
+
+        conn = get_db()
+        try:
+            conn.cursor().execute(PROGRESS_UPDATE, params)
+            conn.commit()
+        except Exception as e:
+            log.warning("⚠️ Could not record progress for job %s: %s", self.job_id, e)
+        finally:
+            conn.close()
+
+def run_job(conn, job_id, kind, payload):
+    """Run one claimed job; its work and its final status commit together"""
+
+    c = conn.cursor()
+    try:
+        if 'data' in payload:  # Queued before inputs moved to job_inputs
+            lines = io.StringIO(payload['data'], newline='')
+        else:
+            lines = read_job_input(conn.cursor(), job_id)
+        result = JOB_HANDLERS[kind](c, payload, lines, _ProgressReporter(job_id, c))
+        c.execute('''
+            UPDATE jobs SET status = 'done', processed = ?, succeeded = ?, failed = ?,
+                            result = ?, error = NULL, finished_at = ?
+            WHERE id = ?
+        ''', (result.processed, result.imported, result.error_count,
+              json.dumps(result.as_dict()), time.time(), job_id))
+        c.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+        conn.commit()
+        log.info("✅ Job %s (%s): %d imported, %d errors in %.1fs",
+                 job_id, kind, result.imported, result.error_count, result.duration)
+
+    except Exception as e:
+        conn.rollback()
+        c.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                  (str(e), time.time(), job_id))
+        c.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+        conn.commit()
+        log.error("❌ Job %s (%s) failed: %s", job_id, kind, e)
+
+def _requeue_stale():
+    conn = get_db()
+    try:
+        requeued = requeue_stale_jobs(conn.cursor())
+        conn.commit()
+        if requeued:
+            log.info("🔁 Requeued %d stale job(s)", requeued)
+    except Exception as e:
+        log.warning("⚠️ Could not requeue stale jobs: %s", e)
+    finally:
+        conn.close()
+
+def work(poll_interval=JOB_POLL_INTERVAL, once=False):
+    """Claim and run jobs until stopped (or until the queue is empty when once=True)"""
+
+    last_requeue = None
+    while True:
+        # Another worker may have died mid-job since the last check
+        if last_requeue is None or time.monotonic() - last_requeue >= JOB_REQUEUE_INTERVAL:
+            last_requeue = time.monotonic()
+            _requeue_stale()
+
+        try:
+            conn = get_db()
+            try:
+                claimed = claim_next_job(conn)
+                if claimed:
+                    run_job(conn, *claimed)
+            finally:
+                conn.close()
+        except Exception as e:
+            claimed = None
+            log.warning("⚠️ Job worker error: %s", e)
+
+        if not claimed:
+            if once:
+                return
+            time.sleep(poll_interval)
+
+_thread_pid = None
+_thread_lock = threading.Lock()
+
+def job_thread_enabled():
+    default = '0' if os.environ.get('DATABASE_URL') else '1'
+    return os.environ.get('JOB_WORKER_THREAD', default) == '1'
+
+def ensure_job_thread():
+    """Start an in-process worker thread (once per process) when configured"""
+    global _thread_pid
+
+    if not job_thread_enabled() or _thread_pid == os.getpid():
+        return
+
+    with _thread_lock:
+        if _thread_pid != os.getpid():
+            threading.Thread(target=work, name='job-worker', daemon=True).start()
+            _thread_pid = os.getpid()
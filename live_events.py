@@ -0,0 +1,256 @@
+"""
+Live scoring events pushed to viewers over Server-Sent Events.
+
+Writers (live scorecard updates, submitted scores) add a small JSON delta to
+the live_events table inside their own transaction. Each gunicorn worker runs
+one poller thread that reads new rows and hands them to an in-process broker;
+every /api/live-match-stream connection on that worker just waits on the
+broker's Condition. So the database sees one cheap indexed query per worker
+per poll interval no matter how many people are watching, and any worker can
+serve any viewer.
+
+Event ids are live_events.id, which is the same on every worker, so an
+EventSource reconnecting with Last-Event-ID resumes from the worker's ring
+buffer of recent events. If it has fallen further behind than the buffer
+holds, the stream sends a `resync` event and the page refetches
+/api/live-match-status.
+
+Every open stream occupies a worker thread (though no database connection),
+so a worker serves at most LIVE_STREAM_MAX_CONNECTIONS of them; past that
+the stream answers 503 and the page polls /api/live-match-status instead.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from app_logging import get_logger
+from db_helper import get_db
+from live_store import progress_payload
+
+log = get_logger('live')
+
+LIVE_EVENT_POLL_INTERVAL = float(os.environ.get('LIVE_EVENT_POLL_INTERVAL', '0.5'))
+LIVE_EVENT_BUFFER_SIZE = int(os.environ.get('LIVE_EVENT_BUFFER_SIZE', '512'))
+LIVE_EVENT_RETENTION = int(os.environ.get('LIVE_EVENT_RETENTION', '3600'))
+LIVE_STREAM_HEARTBEAT = float(os.environ.get('LIVE_STREAM_HEARTBEAT', '15'))
+# Streams close after this long and the browser reconnects with Last-Event-ID,
+# so abandoned tabs don't hold a worker thread forever
+LIVE_STREAM_MAX_AGE = float(os.environ.get('LIVE_STREAM_MAX_AGE', '300'))
+LIVE_STREAM_RETRY_MS = 3000
+# Open streams per worker; gunicorn.conf.py defaults it to half the worker's threads
+LIVE_STREAM_MAX_CONNECTIONS = int(os.environ.get('LIVE_STREAM_MAX_CONNECTIONS', '6'))
+
+def create_live_event_tables(cursor, using_postgres=False):
+    """Create the live_events table and its indexes if they don't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_events (
+            id SERIAL PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at DOUBLE PRECISION NOT NULL
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_live_events_created
+    ON live_events (created_at)
+    ''')
+
+def publish_event(cursor, payload):
+    """Queue a delta for every viewer; delivered once the caller's transaction commits"""
+    cursor.execute(
+        "INSERT INTO live_events (payload, created_at) VALUES (?, ?)",
+        (json.dumps(payload, separators=(',', ':')), time.time())
+    )
+
+def format_event(event, data, event_id=None):
+    """One Server-Sent Events frame; `data` is a dict or an already-encoded JSON string"""
+    if not isinstance(data, str):
+        data = json.dumps(data, separators=(',', ':'))
+    frame = f"event: {event}\ndata: {data}\n\n"
+    if event_id:
+        frame = f"id: {event_id}\n" + frame
+    return frame
+
+class LiveEventBroker:
+    """Ring buffer of recent pre-rendered frames plus one Condition every stream waits on"""
+    def __init__(self, buffer_size=LIVE_EVENT_BUFFER_SIZE):
+        self._frames = deque(maxlen=buffer_size)  # (event_id, frame)
+        self._cond = threading.Condition()
+        self.last_id = 0
+        self.subscribers = 0
+
+    def reset(self, last_id):
+        """Start from last_id without replaying anything older"""
+        with self._cond:
+            self._frames.clear()
+            self.last_id = last_id
+
+    def publish(self, event_id, payload):
+        frame = format_event('delta', payload, event_id)
+        with self._cond:
+            if event_id <= self.last_id:
+                return
+            self._frames.append((event_id, frame))
+            self.last_id = event_id
+            self._cond.notify_all()
+
+    def _frames_after(self, last_id):
+        """Frames newer than last_id, or None if some have already left the buffer"""
+        oldest = self._frames[0][0] if self._frames else self.last_id + 1
+        if last_id < oldest - 1 and last_id < self.last_id:
+            return None
+        return [frame for event_id, frame in self._frames if event_id > last_id]
+
+    def can_resume(self, last_id):
+        with self._cond:
+            return self._frames_after(last_id) is not None
+
+    def wait(self, last_id, timeout):
+        """
+        Block until there are frames newer than last_id or timeout passes.
+        Returns (new last id, frames); frames is None if the caller fell too far behind.
+        """
+        with self._cond:
+            frames = self._frames_after(last_id)
+            if frames == []:
+                self._cond.wait(timeout)
+                frames = self._frames_after(last_id)
+            if frames:
+                return self.last_id, frames
+            return (last_id, frames) if frames is not None else (self.last_id, None)
+
+    def reserve(self, limit=LIVE_STREAM_MAX_CONNECTIONS):
+        """Claim a stream slot; False when this worker already has `limit` streams open"""
+        with self._cond:
+            if self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.subscribers -= 1
+
+class LiveEventPoller(threading.Thread):
+    """Copies new live_events rows into the broker and prunes old ones"""
+    def __init__(self, broker, interval=LIVE_EVENT_POLL_INTERVAL):
+        super().__init__(name='live-event-poller', daemon=True)
+        self.broker = broker
+        self.interval = interval
+        self._last_purge = 0.0
+
+    def _fetch(self, conn, last_id):
+        # Ids come from one sequence, so "id > last seen" works on every worker.
+        # A row whose transaction commits after a higher id was already read is
+        # skipped; viewers still converge because every delta carries totals.
+        c = conn.cursor()
+        c.execute("SELECT id, payload FROM live_events WHERE id > ? ORDER BY id LIMIT 500", (last_id,))
+        rows = c.fetchall()
+
+        now = time.time()
+        if now - self._last_purge > 60:
+            c.execute("DELETE FROM live_events WHERE created_at < ?", (now - LIVE_EVENT_RETENTION,))
+            self._last_purge = now
+        conn.commit()
+        return rows
+
+    def baseline(self):
+        """Only events written after this worker started are streamed"""
+        conn = get_db()
+        try:
+            c = conn.cursor()
+            c.execute("SELECT MAX(id) FROM live_events")
+            last_id = c.fetchone()[0] or 0
+            conn.commit()
+        finally:
+            conn.close()
+        self.broker.reset(last_id)
+
+    def run(self):
+        while True:
+            try:
+                conn = get_db()
+                try:
+                    for event_id, payload in self._fetch(conn, self.broker.last_id):
+                        self.broker.publish(event_id, payload)
+                finally:
+                    conn.close()
+            except Exception as e:
+                log.warning("⚠️ Live event poll failed: %s", e)
+            time.sleep(self.interval)
+
+_broker = None
+_broker_pid = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    """This worker's broker, starting its poller on first use (once per process)"""
+    global _broker, _broker_pid
+
+    pid = os.getpid()
+    if _broker is not None and _broker_pid == pid:
+        return _broker
+
+    with _broker_lock:
+        if _broker is None or _broker_pid != pid:
+            broker = LiveEventBroker()
+            poller = LiveEventPoller(broker)
+            poller.baseline()
+            poller.start()
+            _broker, _broker_pid = broker, pid
+        return _broker
+
+def event_stream(broker, last_id, snapshot=None,
+                 heartbeat=LIVE_STREAM_HEARTBEAT, max_age=LIVE_STREAM_MAX_AGE):
+    """Generator of SSE frames for one viewer (who holds a broker slot); never touches the database"""
+
+    yield f"retry: {LIVE_STREAM_RETRY_MS}\n\n"
+    if snapshot is not None:
+        yield format_event('snapshot', snapshot, last_id)
+
+    deadline = time.monotonic() + max_age
+    while time.monotonic() < deadline:
+        last_id, frames = broker.wait(last_id, heartbeat)
+        if frames is None:
+            yield format_event('resync', {}, last_id)
+        elif frames:
+            yield "".join(frames)
+        else:
+            yield ": heartbeat\n\n"
+
+def publish_round_changes(cursor, round_id, old_players, new_players):
+    """Publish one 'hole' delta per changed (player, hole) between two versions of a round"""
+
+    old_holes = {p['name']: p['holes'] for p in old_players or []}
+    _, text = progress_payload(new_players)
+    published = 0
+
+    for player in new_players:
+        before = old_holes.get(player['name'], [0] * len(player['holes']))
+        for hole, (was, score) in enumerate(zip(before, player['holes']), start=1):
+            if was == score:
+                continue
+            publish_event(cursor, {
+                'type': 'hole',
+                'roundId': round_id,
+                'player': player['name'],
+                'hole': hole,
+                'score': score,
+                'total': sum(player['holes']),
+                'holesPlayed': sum(1 for hole_score in player['holes'] if hole_score > 0),
+                'progressText': text,
+            })
+            published += 1
+    return published
@@ -0,0 +1,215 @@
+"""
+Server-side store for in-progress (live) scorecards.
+
+Live rounds live in the live_rounds table of the main database, so every
+gunicorn worker - and everyone watching /home - sees the same state, and the
+browser entering scores only carries a short round id in its session cookie.
+Rounds expire LIVE_ROUND_TTL seconds after their last update. A submitted
+round is not deleted straight away: delete_round marks it finished, so a
+late hole update still waiting in some worker's buffer finds the marker and
+is dropped instead of bringing the round back to life on /home.
+
+Players are stored as JSON: [{"name": ..., "holes": [9 ints], "total": ...,
+"seqs": [9 ints]}, ...]. seqs holds the client sequence number of the last
+change applied to each hole, so replayed or out-of-order hole updates from
+the scorer's browser are ignored (see apply_hole_updates).
+"""
+import json
+import os
+import time
+import uuid
+
+LIVE_ROUND_TTL = int(os.environ.get('LIVE_ROUND_TTL', str(4 * 60 * 60)))
+HOLES_PER_ROUND = 9
+
+def create_live_tables(cursor, using_postgres=False):
+    """Create the live_rounds table and its indexes if they don't exist"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_rounds (
+            id SERIAL PRIMARY KEY,
+            round_id TEXT UNIQUE NOT NULL,
+            course TEXT,
+            nine TEXT,
+            players TEXT NOT NULL DEFAULT '[]',
+            updated_at DOUBLE PRECISION NOT NULL,
+            expires_at DOUBLE PRECISION NOT NULL
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_rounds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            round_id TEXT UNIQUE NOT NULL,
+            course TEXT,
+            nine TEXT,
+            players TEXT NOT NULL DEFAULT '[]',
+            updated_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_live_rounds_expires
+    ON live_rounds (expires_at, updated_at)
+    ''')
+
+def add_finished_column(cursor, using_postgres=False):
+    """finished_at marks rounds whose scorecard was submitted (see delete_round)"""
+    column_type = "DOUBLE PRECISION" if using_postgres else "REAL"
+    cursor.execute(f"ALTER TABLE live_rounds ADD COLUMN finished_at {column_type}")
+
+def new_round_id():
+    return uuid.uuid4().hex
+
+def _int_list(values, minimum=0):
+    out = []
+    for value in list(values or [])[:HOLES_PER_ROUND]:
+        try:
+            out.append(max(int(value), minimum))
+        except (TypeError, ValueError):
+            out.append(minimum)
+    return out + [minimum] * (HOLES_PER_ROUND - len(out))
+
+def _clean_players(players, seq=0):
+    """Normalize player data to name, 9 hole scores, total and per-hole seqs"""
+    cleaned = []
+    for player in players or []:
+        name = (player.get('name') or '').strip()
+        if not name:
+            continue
+        holes = _int_list(player.get('holes'))
+        seqs = _int_list(player.get('seqs')) if player.get('seqs') else [seq] * HOLES_PER_ROUND
+        cleaned.append({'name': name, 'holes': holes, 'total': sum(holes), 'seqs': seqs})
+    return cleaned
+
+def progress_text(holes_played):
+    """Progress label shown on the home page for a round"""
+    if holes_played == 0:
+        return "Starting Soon"
+    if holes_played == HOLES_PER_ROUND:
+        return "Round Complete"
+    return f"Through {holes_played} Hole{'s' if holes_played != 1 else ''}"
+
+def progress_payload(players):
+    """(holes played by the furthest player, progress text) for a round's players"""
+    holes_played = max((sum(1 for score in p['holes'] if score > 0) for p in players), default=0)
+    return holes_played, progress_text(holes_played)
+
+def save_round(cursor, round_id, course, nine, players, now=None, seq=0):
+    """
+    Replace the full state of a live round (creating it if needed); returns the cleaned players.
+    seq is the client's sequence number at the time of the snapshot - hole updates numbered
+    at or below it are treated as already included. A finished round is left as it is.
+    """
+
+    now = now or time.time()
+    players = _clean_players(players, seq)
+    cursor.execute('''
+        INSERT INTO live_rounds (round_id, course, nine, players, updated_at, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (round_id) DO UPDATE SET
+            course = excluded.course,
+            nine = excluded.nine,
+            players = excluded.players,
+            updated_at = excluded.updated_at,
+            expires_at = excluded.expires_at
+        WHERE live_rounds.finished_at IS NULL
+    ''', (round_id, course, nine, json.dumps(players), now, now + LIVE_ROUND_TTL))
+    return players
+
+def load_round(cursor, round_id, now=None):
+    """Return {'round_id', 'course', 'nine', 'players', 'updated_at'} or None if missing/expired"""
+
+    now = now or time.time()
+    cursor.execute('''
+        SELECT round_id, course, nine, players, updated_at
+        FROM live_rounds
+        WHERE round_id = ? AND expires_at > ? AND finished_at IS NULL
+    ''', (round_id, now))
+    return _row_to_round(cursor.fetchone())
+
+def latest_round(cursor, now=None):
+    """The most recently updated live round that hasn't expired, or None"""
+
+    now = now or time.time()
+    cursor.execute('''
+        SELECT round_id, course, nine, players, updated_at
+        FROM live_rounds
+        WHERE expires_at > ? AND finished_at IS NULL
+        ORDER BY updated_at DESC
+        LIMIT 1
+    ''', (now,))
+    return _row_to_round(cursor.fetchone())
+
+def apply_hole_updates(cursor, round_id, changes, course='', nine='', now=None):
+    """
+    Apply {(player_name, hole): (score, seq)} to a live round in one write, creating the
+    round if needed. A change is skipped unless its seq is newer than the one recorded for
+    that hole, which makes retries idempotent. Returns (players before, players after);
+    both are empty when the round has already been submitted.
+    """
+
+    # Take the row's write lock before reading so concurrent flushes from
+    # different workers can't lose each other's holes
+    cursor.execute("UPDATE live_rounds SET updated_at = updated_at WHERE round_id = ?", (round_id,))
+
+    cursor.execute("SELECT finished_at FROM live_rounds WHERE round_id = ?", (round_id,))
+    row = cursor.fetchone()
+    if row is not None and row[0] is not None:
+        return [], []
+
+    live_round = load_round(cursor, round_id, now)
+    if live_round is None:
+        live_round = {'course': course, 'nine': nine, 'players': []}
+
+    before = _clean_players(live_round['players'])
+    players = [dict(p, holes=list(p['holes']), seqs=list(p['seqs'])) for p in before]
+
+    for (player_name, hole), (score, seq) in changes.items():
+        if not 1 <= hole <= HOLES_PER_ROUND:
+            raise ValueError(f"Hole must be between 1 and {HOLES_PER_ROUND}")
+
+        player = next((p for p in players if p['name'] == player_name), None)
+        if player is None:
+            player = _clean_players([{'name': player_name}])[0]
+            players.append(player)
+
+        if seq > player['seqs'][hole - 1]:
+            player['holes'][hole - 1] = max(int(score), 0)
+            player['seqs'][hole - 1] = seq
+
+    after = save_round(cursor, round_id, live_round['course'] or course, live_round['nine'] or nine, players, now)
+    return before, after
+
+def delete_round(cursor, round_id, now=None):
+    """
+    Take a round off the live list once its scores have been submitted. The row stays
+    (as a finished marker) until it expires, so late hole updates can't recreate it.
+    """
+    now = now or time.time()
+    cursor.execute('''
+        INSERT INTO live_rounds (round_id, players, updated_at, expires_at, finished_at)
+        VALUES (?, '[]', ?, ?, ?)
+        ON CONFLICT (round_id) DO UPDATE SET
+            players = excluded.players,
+            expires_at = excluded.expires_at,
+            finished_at = excluded.finished_at
+    ''', (round_id, now, now + LIVE_ROUND_TTL, now))
+
+def purge_expired(cursor, now=None):
+    """Delete rounds past their TTL"""
+    cursor.execute("DELETE FROM live_rounds WHERE expires_at <= ?", (now or time.time(),))
+
+def _row_to_round(row):
+    if row is None:
+        return None
+    round_id, course, nine, players, updated_at = row
+    return {
+        'round_id': round_id,
+        'course': course,
+        'nine': nine,
+        'players': json.loads(players or '[]'),
+        'updated_at': updated_at,
+    }
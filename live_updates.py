@@ -0,0 +1,105 @@
+"""
+Coalesces hole-by-hole live scorecard changes.
+
+PATCH /api/live-scorecard/hole only records the change in this worker's
+buffer, keeping the newest seq per (round, player, hole). A timer flushes the
+buffer once per LIVE_UPDATE_DEBOUNCE window: each round touched in the window
+gets a single read-modify-write (live_store.apply_hole_updates) and one batch
+of live_events deltas, however many taps went into it.
+
+Sequence numbers come from the scorer's browser and only ever increase, so a
+retried or late request is dropped here if a newer change for the same hole is
+already pending, and by apply_hole_updates if a newer one was already written.
+"""
+import atexit
+import os
+import threading
+
+from app_logging import get_logger
+from db_helper import get_db
+from live_events import publish_round_changes
+from live_store import apply_hole_updates
+
+log = get_logger('live')
+
+LIVE_UPDATE_DEBOUNCE = float(os.environ.get('LIVE_UPDATE_DEBOUNCE', '0.75'))
+
+class HoleUpdateBuffer:
+    """Pending hole changes for this worker, written out once per debounce window"""
+    def __init__(self, debounce=LIVE_UPDATE_DEBOUNCE):
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._pending = {}  # round_id -> {'course', 'nine', 'changes': {(player, hole): (score, seq)}}
+        self._timer = None
+
+    def add(self, round_id, player_name, hole, score, seq, course='', nine=''):
+        """Queue a change; returns False if an equal or newer change for that hole is already queued"""
+        with self._lock:
+            entry = self._pending.setdefault(round_id, {'course': course, 'nine': nine, 'changes': {}})
+            if course:
+                entry['course'], entry['nine'] = course, nine
+
+            queued = entry['changes'].get((player_name, hole))
+            if queued is not None and queued[1] >= seq:
+                return False
+            entry['changes'][(player_name, hole)] = (score, seq)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return True
+
+    def discard(self, round_id):
+        """Drop a round's pending changes (its scorecard has been submitted)"""
+        with self._lock:
+            self._pending.pop(round_id, None)
+
+    def flush(self):
+        """Write every pending round (one transaction per round)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        if not pending:
+            return
+
+        conn = get_db()
+        try:
+            c = conn.cursor()
+            for round_id, entry in pending.items():
+                try:
+                    before, after = apply_hole_updates(c, round_id, entry['changes'],
+                                                       entry['course'], entry['nine'])
+                    publish_round_changes(c, round_id, before, after)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    log.error("❌ Error saving live round %s: %s", round_id, e)
+        finally:
+            conn.close()
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+def get_hole_buffer():
+    """This worker's buffer (timers don't survive a fork, so one per process)"""
+    global _buffer, _buffer_pid
+
+    pid = os.getpid()
+    if _buffer is not None and _buffer_pid == pid:
+        return _buffer
+
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != pid:
+            _buffer, _buffer_pid = HoleUpdateBuffer(), pid
+            atexit.register(_buffer.flush)
+        return _buffer
+
+def queue_hole_update(round_id, player_name, hole, score, seq, course='', nine=''):
+    return get_hole_buffer().add(round_id, player_name, hole, score, seq, course, nine)
+
+def discard_hole_updates(round_id):
+    """Forget this worker's pending changes for a round; other workers' are stopped by delete_round"""
+    get_hole_buffer().discard(round_id)
@@ -0,0 +1,98 @@
+"""
+Prometheus metrics for /metrics.
+
+Every request is counted and timed per route (the @app.route rule, so label
+values stay bounded), together with its database time and query count from
+request_timing. After each request the worker also copies its connection
+pool gauges and cache counters (query translations, rendered fragments) into
+metrics.
+
+Under gunicorn each worker is a separate process, so gunicorn.conf.py points
+PROMETHEUS_MULTIPROC_DIR at a shared directory before the workers start.
+prometheus_client then keeps every worker's values in mmap files there and
+/metrics adds them up across workers. Without the variable (python app.py)
+the metrics are simply this process's own.
+"""
+import os
+import threading
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+# Shared secret for scrapers: /metrics needs ?token= or a Bearer header, and is closed while unset
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUESTS = Counter('pgg_http_requests_total', 'HTTP requests', ['route', 'method', 'status'])
+REQUEST_SECONDS = Histogram('pgg_http_request_duration_seconds', 'Time to produce a response',
+                            ['route', 'method'], buckets=LATENCY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram('pgg_http_request_db_seconds', 'Database time per request',
+                               ['route'], buckets=DB_BUCKETS)
+REQUEST_RENDER_SECONDS = Histogram('pgg_http_request_render_seconds', 'Template render time per request',
+                                   ['route'], buckets=DB_BUCKETS)
+DB_QUERIES = Counter('pgg_db_queries_total', 'Statements executed', ['route'])
+
+POOL_CONNECTIONS = Gauge('pgg_db_pool_connections', 'Postgres pool connections by state',
+                         ['state'], multiprocess_mode='livesum')
+POOL_EVENTS = Counter('pgg_db_pool_events_total', 'Postgres pool borrows, waits and discarded connections',
+                      ['event'])
+POOL_WAIT_SECONDS = Counter('pgg_db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection')
+
+CACHE_LOOKUPS = Counter('pgg_cache_lookups_total', 'Cache lookups by cache and result', ['cache', 'result'])
+CACHE_BYTES = Gauge('pgg_cache_bytes', 'Size of in-process caches', ['cache'], multiprocess_mode='livesum')
+
+# Last values copied from this process's cumulative stats, so counters only get the difference
+_seen = {}
+_seen_lock = threading.Lock()
+
+def _sync(counter, key, value):
+    with _seen_lock:
+        delta = value - _seen.get(key, 0)
+        _seen[key] = value
+    if delta > 0:
+        counter.inc(delta)
+
+def observe_request(route, method, status, timing):
+    """Record one finished request (timing is request_timing.RequestTiming)"""
+    REQUESTS.labels(route, method, str(status)).inc()
+    if timing is None:
+        return
+    REQUEST_SECONDS.labels(route, method).observe(timing.elapsed)
+    REQUEST_DB_SECONDS.labels(route).observe(timing.db_time)
+    REQUEST_RENDER_SECONDS.labels(route).observe(timing.render_time)
+    if timing.queries:
+        DB_QUERIES.labels(route).inc(timing.queries)
+
+def observe_process(pool=None, translations=None, fragments=None):
+    """Copy this worker's pool gauges and cache counters into the metrics"""
+    if pool is not None:
+        POOL_CONNECTIONS.labels('in_use').set(pool['in_use'])
+        POOL_CONNECTIONS.labels('idle').set(pool['idle'])
+        for event in ('borrows', 'waits', 'discarded'):
+            _sync(POOL_EVENTS.labels(event), ('pool', event), pool[event])
+        _sync(POOL_WAIT_SECONDS, ('pool', 'wait_time'), pool['wait_time_total'])
+
+    if translations is not None:
+        _sync(CACHE_LOOKUPS.labels('query_translation', 'hit'), ('translations', 'hits'), translations['hits'])
+        _sync(CACHE_LOOKUPS.labels('query_translation', 'miss'), ('translations', 'misses'), translations['misses'])
+
+    if fragments is not None:
+        _sync(CACHE_LOOKUPS.labels('fragment', 'hit'), ('fragments', 'hits'), fragments.hits)
+        _sync(CACHE_LOOKUPS.labels('fragment', 'miss'), ('fragments', 'misses'), fragments.misses)
+        CACHE_BYTES.labels('fragment').set(fragments.size)
+
+def authorized(token, authorization):
+    if not METRICS_TOKEN:
+        return False
+    return token == METRICS_TOKEN or authorization == f"Bearer {METRICS_TOKEN}"
+
+def render_metrics():
+    """(body, content type) for a scrape, summed across workers when running under gunicorn"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,198 @@
+"""
+Versioned schema migrations for both SQLite (local) and Postgres (production).
+
+Each migration runs once and is recorded in the schema_migrations table.
+A step is either a SQL string (portable across both databases) or a
+callable taking (cursor, using_postgres) for anything database-specific.
+
+Usage:
+    python migrations.py          # apply pending migrations
+    python migrations.py status   # list applied/pending migrations
+
+Runs automatically on Heroku in the release phase (see Procfile).
+"""
+import os
+import sys
+from app_logging import get_logger
+from db_helper import get_db
+from aggregates import (create_aggregate_tables, create_head_to_head_tables, create_stats_cube_tables,
+                        rebuild_head_to_head, rebuild_season_standings, rebuild_stats_cube)
+from live_store import add_finished_column, create_live_tables
+from live_events import create_live_event_tables
+from jobs import create_job_input_tables, create_job_tables
+from importers import backfill_content_hashes
+from data_versions import create_data_version_tables
+
+log = get_logger('migrations')
+
+def _create_season_standings(cursor, using_postgres):
+    create_aggregate_tables(cursor, using_postgres)
+    rebuild_season_standings(cursor)
+
+def _create_stats_cube(cursor, using_postgres):
+    create_stats_cube_tables(cursor, using_postgres)
+    rebuild_stats_cube(cursor)
+
+def _create_head_to_head(cursor, using_postgres):
+    create_head_to_head_tables(cursor, using_postgres)
+    rebuild_head_to_head(cursor)
+
+def _backfill_content_hashes(cursor, using_postgres):
+    hashed, duplicates = backfill_content_hashes(cursor)
+    if duplicates:
+        log.warning("⚠️ %d duplicate score row(s) left without a content hash", duplicates)
+
+def _dedupe_hole_in_one_pot(cursor, using_postgres):
+    # Balance uploads used INSERT OR REPLACE without a unique key, which added a
+    # row per upload; the newest one is the current balance
+    cursor.execute('''
+        DELETE FROM hole_in_one_pot
+        WHERE id NOT IN (SELECT MAX(id) FROM hole_in_one_pot GROUP BY player_name)
+    ''')
+    if cursor.rowcount:
+        log.warning("⚠️ Removed %d duplicate hole-in-one balance row(s)", cursor.rowcount)
+
+MIGRATIONS = [
+    (1, "season_standings", [
+        _create_season_standings,
+    ]),
+    (2, "hot_query_indexes", [
+        # /stats season filter, DISTINCT season dropdown
+        "CREATE INDEX IF NOT EXISTS idx_scores_season_player ON scores (season, player_name)",
+        # Recent matches, live match status (date = ?), match lookups
+        "CREATE INDEX IF NOT EXISTS idx_scores_date_course_nine ON scores (date, course, nine)",
+        # /stats player filter, roster join, DISTINCT player_name dropdown
+        "CREATE INDEX IF NOT EXISTS idx_scores_player_season ON scores (player_name, season)",
+        # /stats course filter, DISTINCT course dropdown
+        "CREATE INDEX IF NOT EXISTS idx_scores_course ON scores (course)",
+        # Recent rounds: ORDER BY date DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_scores_date_id ON scores (date DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_awards_player_season ON awards (player_name, season)",
+        "CREATE INDEX IF NOT EXISTS idx_hole_in_one_pot_player ON hole_in_one_pot (player_name)",
+    ]),
+    (3, "live_rounds", [
+        create_live_tables,
+    ]),
+    (4, "live_events", [
+        create_live_event_tables,
+    ]),
+    (5, "jobs", [
+        create_job_tables,
+    ]),
+    (6, "score_content_hash", [
+        # Natural key for scores, so re-imports skip rows that are already there
+        "ALTER TABLE scores ADD COLUMN content_hash TEXT",
+        _backfill_content_hashes,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_scores_content_hash ON scores (content_hash)",
+    ]),
+    (7, "stats_cube", [
+        _create_stats_cube,
+    ]),
+    (8, "data_versions", [
+        create_data_version_tables,
+    ]),
+    (9, "live_round_finished", [
+        # Submitted rounds stay as markers so late hole updates can't bring them back
+        add_finished_column,
+    ]),
+    (10, "job_inputs", [
+        # Import input in chunks, instead of one JSON payload per job
+        create_job_input_tables,
+    ]),
+    (11, "head_to_head", [
+        _create_head_to_head,
+    ]),
+    (12, "hole_in_one_pot_unique_player", [
+        # One balance per player, so imports can upsert with ON CONFLICT (player_name)
+        _dedupe_hole_in_one_pot,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_hole_in_one_pot_player_unique ON hole_in_one_pot (player_name)",
+        "DROP INDEX IF EXISTS idx_hole_in_one_pot_player",
+    ]),
+]
+
+def create_migrations_table(cursor, using_postgres=False):
+    """Create the schema_migrations bookkeeping table"""
+
+    if using_postgres:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            id SERIAL PRIMARY KEY,
+            version INTEGER UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            applied_date TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+    else:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version INTEGER UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            applied_date TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_migrations(conn, using_postgres=False, verbose=True):
+    """Apply every pending migration in order, one transaction per migration"""
+
+    c = conn.cursor()
+    create_migrations_table(c, using_postgres)
+    conn.commit()
+
+    done = applied_versions(c)
+    applied = []
+
+    for version, name, steps in MIGRATIONS:
+        if version in done:
+            continue
+
+        try:
+            for step in steps:
+                if callable(step):
+                    step(c, using_postgres)
+                else:
+                    c.execute(step)
+
+            c.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        if verbose:
+            print(f"✅ Applied migration {version:03d}_{name}")
+
+    return applied
+
+def main(argv):
+    using_postgres = os.environ.get('DATABASE_URL') is not None
+    conn = get_db()
+
+    try:
+        if len(argv) > 1 and argv[1] == 'status':
+            c = conn.cursor()
+            create_migrations_table(c, using_postgres)
+            done = applied_versions(c)
+            for version, name, _ in MIGRATIONS:
+                state = "applied" if version in done else "pending"
+                print(f"{version:03d}_{name}: {state}")
+            return
+
+        applied = apply_migrations(conn, using_postgres)
+        if not applied:
+            print("ℹ️ Database schema is up to date")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main(sys.argv)
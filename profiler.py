@@ -0,0 +1,216 @@
+"""
+Opt-in request profiling for production.
+
+One request in PROFILE_SAMPLE_RATE (0, the default, turns sampling off) -
+or any request sent with the X-Profile-Request header set to the admin
+password - runs under cProfile. While it runs, a sampler thread records the
+request thread's call stack every PROFILE_SAMPLE_INTERVAL seconds, which
+gives real stacks for a flame graph (cProfile only knows caller/callee
+pairs).
+
+Each worker keeps the last PROFILE_KEEP profiles per route in memory. The
+admin page /admin/profiles lists them and serves each as pstats text, as a
+.prof file for pstats/snakeviz, or as folded stacks for flamegraph.pl or
+speedscope.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+
+from app_logging import get_logger
+
+log = get_logger('profiler')
+
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '10'))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.005'))
+PROFILE_HEADER = 'X-Profile-Request'
+PROFILE_TEXT_LINES = 80
+
+# Long-lived or self-referential routes are never sampled
+PROFILE_SKIP_ROUTES = ('/api/live-match-stream', '/metrics', '/static/<path:filename>',
+                       '/admin/profiles', '/admin/profiles/<int:profile_id>.<fmt>')
+
+class _StatsSnapshot:
+    """Stands in for a Profile so pstats.Stats can load a stored dump (it takes the dict it's given)"""
+    def __init__(self, data):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+class RequestProfile:
+    """A finished profile: cProfile stats (as a dump_stats() blob) plus sampled stacks"""
+    def __init__(self, profile_id, route, method, path, started_at, duration, status, stats_data, stacks):
+        self.id = profile_id
+        self.route = route
+        self.method = method
+        self.path = path
+        self.started_at = started_at
+        self.duration = duration
+        self.status = status
+        self.stats_data = stats_data
+        self.stacks = stacks
+        self.samples = sum(stacks.values())
+
+    @property
+    def started_text(self):
+        return datetime.fromtimestamp(self.started_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+    def pstats_text(self, limit=PROFILE_TEXT_LINES):
+        out = io.StringIO()
+        out.write(f"{self.method} {self.path} -> {self.status} in {self.duration * 1000:.1f} ms\n\n")
+        stats = pstats.Stats(_StatsSnapshot(self.stats_data), stream=out)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def pstats_bytes(self):
+        """Same format as cProfile's dump_stats(), for pstats.Stats(path) or snakeviz"""
+        return self.stats_data
+
+    def folded_stacks(self):
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileStore:
+    """Last PROFILE_KEEP profiles per route"""
+    def __init__(self, keep=PROFILE_KEEP):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._routes = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def next_id(self):
+        return next(self._ids)
+
+    def add(self, profile):
+        with self._lock:
+            self._routes.setdefault(profile.route, deque(maxlen=self.keep)).append(profile)
+
+    def by_route(self):
+        """{route: [profiles, newest first]}"""
+        with self._lock:
+            return {route: list(reversed(profiles)) for route, profiles in sorted(self._routes.items())}
+
+    def get(self, profile_id):
+        with self._lock:
+            for profiles in self._routes.values():
+                for profile in profiles:
+                    if profile.id == profile_id:
+                        return profile
+        return None
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of the threads currently being profiled"""
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._targets = {}  # thread id -> Counter of folded stacks
+
+    def register(self, thread_id):
+        with self._cond:
+            self._targets[thread_id] = Counter()
+            self._cond.notify()
+
+    def unregister(self, thread_id):
+        with self._cond:
+            return self._targets.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._targets:
+                    self._cond.wait()
+                targets = list(self._targets.items())
+
+            frames = sys._current_frames()
+            for thread_id, stacks in targets:
+                frame = frames.get(thread_id)
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if labels:
+                    with self._cond:
+                        stacks[";".join(reversed(labels))] += 1
+            time.sleep(self.interval)
+
+class ActiveProfile:
+    """A request being profiled"""
+    def __init__(self, route, method, path):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+
+_store = ProfileStore()
+_sampler = None
+_sampler_pid = None
+_sampler_lock = threading.Lock()
+_request_counter = itertools.count(1)
+
+def get_store():
+    return _store
+
+def get_sampler():
+    """This process's sampler thread (threads don't survive a fork, so one per process)"""
+    global _sampler, _sampler_pid
+
+    pid = os.getpid()
+    if _sampler is not None and _sampler_pid == pid:
+        return _sampler
+
+    with _sampler_lock:
+        if _sampler is None or _sampler_pid != pid:
+            _sampler = StackSampler()
+            _sampler.start()
+            _sampler_pid = pid
+        return _sampler
+
+def should_profile(route, header_value, secret):
+    """Profile when the admin header is present, otherwise one request in PROFILE_SAMPLE_RATE"""
+    if route in PROFILE_SKIP_ROUTES:
+        return False
+    if header_value:
+        return header_value == secret
+    return PROFILE_SAMPLE_RATE > 0 and next(_request_counter) % PROFILE_SAMPLE_RATE == 0
+
+def start_profile(route, method, path):
+    """Begin profiling the current thread; returns an ActiveProfile or None"""
+    active = ActiveProfile(route, method, path)
+    try:
+        active.profiler.enable()
+    except ValueError:
+        return None  # Another profiler is already running on this thread
+    get_sampler().register(active.thread_id)
+    return active
+
+def finish_profile(active, status):
+    """Stop profiling and keep the result; returns the RequestProfile"""
+    active.profiler.disable()
+    duration = time.perf_counter() - active.started
+    stacks = get_sampler().unregister(active.thread_id)
+    active.profiler.create_stats()
+
+    profile = RequestProfile(_store.next_id(), active.route, active.method, active.path,
+                             active.started_at, duration, status, marshal.dumps(active.profiler.stats), stacks)
+    _store.add(profile)
+    log.info("🔬 Profiled %s %s: %.0f ms, %d stack samples", active.method, active.path,
+             duration * 1000, profile.samples, extra={'profile_id': profile.id})
+    return profile
@@ -0,0 +1,168 @@
+"""
+Query and render timing for each request.
+
+db_helper's cursors (Postgres and SQLite alike) report every statement here
+with its duration and row count. Statements are grouped by fingerprint - the
+SQL with whitespace collapsed and literals replaced by ? - so the same query
+with different values is counted as one.
+
+While a request is running (start_request/finish_request, called from app.py)
+its database time, query count and template render time are added up for the
+Server-Timing header and for per-route totals. Any statement slower than
+SLOW_QUERY_MS is logged as a warning with its route, duration and row count.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+# app_logging imports this module, so take the logger directly; its handlers hang off 'pgg'
+log = logging.getLogger('pgg.queries')
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+# Distinct fingerprints kept in query_stats(); the rest are counted under '(other)'
+QUERY_STATS_MAX_FINGERPRINTS = int(os.environ.get('QUERY_STATS_MAX_FINGERPRINTS', '500'))
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+_IN_LIST_RE = re.compile(r'\(\?(?:, \?)+\)')
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """SQL with literals replaced by ? and IN lists collapsed, for grouping"""
+    sql = _SPACE_RE.sub(' ', sql).strip()
+    sql = _LITERAL_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('(?, ...)', sql)
+
+class RequestTiming:
+    """Totals for one request"""
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.render_time = 0.0
+        self._render_depth = 0
+        self._render_started = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Value for the Server-Timing response header (durations in ms)"""
+        return (f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+                f'render;dur={self.render_time * 1000:.1f}, '
+                f'total;dur={self.elapsed * 1000:.1f}')
+
+class QueryRecord:
+    """One executed statement; fetches on the same cursor add to it"""
+    __slots__ = ('fingerprint', 'duration', 'rows', 'route', 'logged')
+
+    def __init__(self, fingerprint, route):
+        self.fingerprint = fingerprint
+        self.duration = 0.0
+        self.rows = 0
+        self.route = route
+        self.logged = False
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_query_stats = {}  # fingerprint -> [count, total seconds, max seconds, rows]
+_route_stats = {}  # route -> [requests, total seconds, db seconds, queries, render seconds]
+
+def current_request():
+    return getattr(_local, 'request', None)
+
+def start_request(route):
+    _local.request = RequestTiming(route)
+    return _local.request
+
+def finish_request():
+    """End the current request's timing and fold it into the per-route totals"""
+    timing = current_request()
+    _local.request = None
+    if timing is None:
+        return None
+
+    with _stats_lock:
+        totals = _route_stats.setdefault(timing.route, [0, 0.0, 0.0, 0, 0.0])
+        totals[0] += 1
+        totals[1] += timing.elapsed
+        totals[2] += timing.db_time
+        totals[3] += timing.queries
+        totals[4] += timing.render_time
+    return timing
+
+def record_query(sql, duration, rows, fetch_pending=False):
+    """
+    Called by the db_helper cursors after each execute; returns the QueryRecord.
+    fetch_pending defers the slow-query check to record_fetch, once rows are known.
+    """
+    timing = current_request()
+    record = QueryRecord(fingerprint(sql), timing.route if timing else threading.current_thread().name)
+    if timing is not None:
+        timing.queries += 1
+    _add(record, duration, max(rows, 0), new=True, check=not fetch_pending)
+    return record
+
+def record_fetch(record, duration, rows):
+    """Add fetch time and rows to the statement they belong to (SQLite reads rows lazily)"""
+    if record is not None:
+        _add(record, duration, rows, new=False, check=True)
+
+def _add(record, duration, rows, new, check):
+    record.duration += duration
+    record.rows += rows
+
+    timing = current_request()
+    if timing is not None:
+        timing.db_time += duration
+
+    with _stats_lock:
+        key = record.fingerprint
+        if key not in _query_stats and len(_query_stats) >= QUERY_STATS_MAX_FINGERPRINTS:
+            key = '(other)'
+        stats = _query_stats.setdefault(key, [0, 0.0, 0.0, 0])
+        stats[0] += 1 if new else 0
+        stats[1] += duration
+        stats[2] = max(stats[2], record.duration)
+        stats[3] += rows
+
+    if check and not record.logged and record.duration * 1000 >= SLOW_QUERY_MS:
+        record.logged = True
+        # Inside a request the log line carries the route already; elsewhere name the thread
+        extra = {} if current_request() is not None else {'source': record.route}
+        log.warning("🐢 Slow query: %.0f ms, %d rows - %s", record.duration * 1000, record.rows,
+                    record.fingerprint[:500], extra=extra)
+
+def render_started():
+    """Template render timing; nested renders count once, as part of the outer one"""
+    timing = current_request()
+    if timing is None:
+        return
+    if timing._render_depth == 0:
+        timing._render_started = time.perf_counter()
+    timing._render_depth += 1
+
+def render_finished():
+    timing = current_request()
+    if timing is None or timing._render_depth == 0:
+        return
+    timing._render_depth -= 1
+    if timing._render_depth == 0:
+        timing.render_time += time.perf_counter() - timing._render_started
+
+def query_stats():
+    """{fingerprint: {'count', 'total', 'max', 'rows'}} for this process (seconds)"""
+    with _stats_lock:
+        return {key: {'count': count, 'total': total, 'max': longest, 'rows': rows}
+                for key, (count, total, longest, rows) in _query_stats.items()}
+
+def route_stats():
+    """{route: {'requests', 'total', 'db', 'queries', 'render'}} for this process (seconds)"""
+    with _stats_lock:
+        return {route: {'requests': requests, 'total': total, 'db': db, 'queries': queries, 'render': render}
+                for route, (requests, total, db, queries, render) in _route_stats.items()}
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Background job worker (see jobs.py).
+
+Usage:
+    python worker.py          # run jobs until stopped (Procfile `worker` process)
+    python worker.py --once   # run every queued job, then exit
+"""
+import sys
+from jobs import work
+
+if __name__ == "__main__":
+    once = '--once' in sys.argv
+    print("🛠️ Job worker started" + (" (until queue is empty)" if once else ""))
+    work(once=once)